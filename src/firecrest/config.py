@@ -365,6 +365,55 @@ class DataOperation(BaseModel):
             "download. Larger files will go through the staging area."
         ),
     )
+    ls_cache_max_entries: int = Field(
+        1000,
+        description=(
+            "Maximum number of `ops/ls` listings cached, the least recently "
+            "used are evicted first."
+        ),
+        gt=0,
+    )
+    ls_cache_max_size: int = Field(
+        64 * 1024 * 1024,
+        description="Maximum approximate size (in bytes) of the cached `ops/ls` listings.",
+        gt=0,
+    )
+    find_max_results: int = Field(
+        10000,
+        description="Maximum number of entries returned by `ops/find`.",
+        gt=0,
+    )
+    find_timeout: int = Field(
+        60,
+        description="Timeout (in seconds) of the remote `find` run by `ops/find`.",
+        gt=0,
+    )
+    batch_chunk_size: int = Field(
+        10,
+        description=(
+            "Number of `ops/batch` operations run per remote invocation, the "
+            "invocations of a batch run concurrently. Each operation has the "
+            "`command_execution` timeout."
+        ),
+        gt=0,
+    )
+    tail_follow_idle_timeout: int = Field(
+        60,
+        description=(
+            "Time (in seconds) the remote reader of a file followed with "
+            "`ops/tail/follow` is kept once its last subscriber disconnected."
+        ),
+        ge=0,
+    )
+    tail_follow_max_duration: int = Field(
+        3600,
+        description=(
+            "Time (in seconds) after which an `ops/tail/follow` stream is "
+            "closed, clients reconnect to keep following the file. Bounds "
+            "the time an idle client holds the remote reader."
+        ),
+        gt=0,
+    )
     data_transfer: Optional[
         S3DataTransfer | WormholeDataTransfer | StreamerDataTransfer
     ] = Field(
@@ -389,6 +438,30 @@ class FileSystem(CamelModel):
     default_work_dir: bool = Field(
         False, description="Mark this as the default working directory."
     )
+    ls_cache_ttl: int = Field(
+        0,
+        description=(
+            "Time (in seconds) `ops/ls` listings of this file system are "
+            "cached. Listings are invalidated when modified through the API, "
+            "other changes are only visible once the TTL expires. The cache "
+            "is kept per process: with several workers, only the worker "
+            "handling the change invalidates its listings, keep the TTL short. "
+            "`0` disables caching."
+        ),
+        ge=0,
+    )
+    du_cache_ttl: int = Field(
+        0,
+        description=(
+            "Time (in seconds) `ops/du` results of this file system are "
+            "cached. Results are invalidated when the directory is modified "
+            "through the API, other changes are only visible once the TTL "
+            "expires. The cache is kept per process: with several workers, "
+            "only the worker handling the change invalidates its results, "
+            "keep the TTL short. `0` disables caching."
+        ),
+        ge=0,
+    )
 
     model_config = ConfigDict(use_enum_values=True)
 
@@ -411,20 +484,119 @@ class SSHTimeouts(CamelModel):
     )
 
 
+class SSHEndpoint(CamelModel):
+    """Additional SSH login node of a cluster."""
+
+    host: str = Field(..., description="SSH target hostname.")
+    port: int = Field(22, description="SSH port.")
+
+
 class SSHClientPool(CamelModel):
     """SSH connection pool configuration for remote execution."""
 
     host: str = Field(..., description="SSH target hostname.")
     port: int = Field(..., description="SSH port.")
+    endpoints: List[SSHEndpoint] = Field(
+        default_factory=list,
+        description=(
+            "Additional login nodes of the cluster. New SSH connections are "
+            "balanced among `host` and these endpoints, preferring the ones "
+            "with lower connection latency and fewer busy channels."
+        ),
+    )
+    endpoint_ejection_threshold: int = Field(
+        3,
+        description=(
+            "Number of consecutive connection failures after which a login "
+            "node is temporarily excluded from the selection."
+        ),
+        gt=0,
+    )
+    endpoint_ejection_time: int = Field(
+        30,
+        description="Time (seconds) a failing login node is excluded for.",
+        gt=0,
+    )
     proxy_host: Optional[str] = Field(
         None, description="Optional proxy host for tunneling.", nullable=True
     )
     proxy_port: Optional[int] = Field(
         None, description="Optional proxy port.", nullable=True
     )
+    max_connections_per_tunnel: int = Field(
+        10,
+        description=(
+            "Maximum number of SSH connections of a user forwarded through a "
+            "single connection to the proxy host. Connections to the proxy "
+            "host are shared by the SSH connections of the same user."
+        ),
+        gt=0,
+    )
     max_clients: int = Field(
         100,
-        description="Maximum number of concurrent SSH clients (not a hard limit, might be temporarily exceeded under heavy load).",
+        description=(
+            "Maximum number of concurrent SSH connections, counted across all "
+            "users (each user can hold up to `max_connections_per_user` of "
+            "them). Not a hard limit, might be temporarily exceeded under "
+            "heavy load."
+        ),
+    )
+    max_capacity_waiters: int = Field(
+        100,
+        description=(
+            "When `max_clients` is reached and every connection is in use, "
+            "maximum number of requests waiting (up to the connection "
+            "timeout) for a connection to become idle. Further requests are "
+            "rejected. Idle connections are evicted, least recently used "
+            "first, to make room for new users."
+        ),
+        ge=0,
+    )
+    max_channels_per_connection: int = Field(
+        10,
+        description=(
+            "Maximum number of concurrent channels (commands) opened on a "
+            "single SSH connection. Further commands wait in a FIFO queue. "
+            "Should not exceed the `MaxSessions` setting of the target sshd."
+        ),
+        gt=0,
+    )
+    max_connections_per_user: int = Field(
+        4,
+        description=(
+            "Maximum number of SSH connections opened for a single user. A "
+            "new connection is only opened when all the existing ones of the "
+            "user have no free channel left, not counting the channels held "
+            "by the persistent shell and the SFTP session."
+        ),
+        gt=0,
+    )
+    persistent_shell: bool = Field(
+        False,
+        description=(
+            "Keep a long-lived remote shell on each SSH connection and run "
+            "commands without standard input through it, avoiding the setup "
+            "of a new SSH channel (and PAM session) for each command."
+        ),
+    )
+    sftp: bool = Field(
+        False,
+        description=(
+            "Use the SFTP subsystem of the target sshd for the file data of "
+            "the `ops/upload`, `ops/download` and `ops/view` endpoints, "
+            "instead of streaming it through the standard input and output of "
+            "remote commands (`WriteFileCommand` for uploads, "
+            "`ReadRangeCommand` for downloads and `DdCommand` for views)."
+        ),
+    )
+    parse_offload_threshold: int = Field(
+        1024 * 1024,
+        description=(
+            "Size (in bytes) of a command output above which it is parsed in "
+            "a worker thread instead of the event loop, so that large outputs "
+            "(e.g. recursive listings) don't stall concurrent requests."
+        ),
+        gt=0,
     )
     timeout: SSHTimeouts = Field(
         default_factory=SSHTimeouts, description="SSH timeout settings."
@@ -500,6 +672,35 @@ class OpenFGA(CamelModel):
         100,
         description="Max HTTP connections per host. When set to `0`, there is no limit.",
     )
+    allow_cache_ttl: int = Field(
+        60,
+        description=(
+            "Time (in seconds) allowed decisions are cached per user and system. "
+            "When set to `0`, they are not cached."
+        ),
+        ge=0,
+    )
+    deny_cache_ttl: int = Field(
+        10,
+        description=(
+            "Time (in seconds) denied decisions are cached per user and system. "
+            "When set to `0`, they are not cached."
+        ),
+        ge=0,
+    )
+    cache_max_entries: int = Field(
+        10000,
+        description="Maximum number of cached authorization decisions.",
+        ge=0,
+    )
+    batch_check_url: Optional[str] = Field(
+        None,
+        description=(
+            "OpenFGA batch check API URL (`/stores/{store_id}/batch-check`), used to "
+            "authorize users on all the systems at once when listing them. When not "
+            "set, the systems are checked individually."
+        ),
+    )
 
 
 class SSHKeysServiceType(str, Enum):
@@ -530,6 +731,20 @@ class SSHService(BaseSSHKeysService):
             "`0`, there is no limit."
         ),
     )
+    cache_credentials: bool = Field(
+        True,
+        description=(
+            "Cache the issued SSH credentials per user until their "
+            "certificate expires (`valid_before`)."
+        ),
+    )
+    cache_refresh_margin: int = Field(
+        15,
+        description=(
+            "Seconds before the certificate expiry when cached credentials "
+            "are refreshed in the background."
+        ),
+    )
     type: Literal[SSHKeysServiceType.SSHService]
 
 
@@ -544,6 +759,20 @@ class SSHCA(BaseSSHKeysService):
             "`0`, there is no limit."
         ),
     )
+    cache_credentials: bool = Field(
+        True,
+        description=(
+            "Cache the issued SSH credentials per user until their "
+            "certificate expires (`valid_before`)."
+        ),
+    )
+    cache_refresh_margin: int = Field(
+        15,
+        description=(
+            "Seconds before the certificate expiry when cached credentials "
+            "are refreshed in the background."
+        ),
+    )
     type: Literal[SSHKeysServiceType.SSHCA]
 
 
@@ -583,6 +812,15 @@ class Logger(CamelModel):
         [],
         description="Custom HTTP Request's headers to be included in tracing log.",
     )
+    enable_metrics_log: bool = Field(
+        False,
+        description="Enable periodic logging of internal metrics (e.g. SSH connection pools).",
+    )
+    metrics_log_interval: int = Field(
+        60,
+        description="Interval in seconds between two metrics log entries.",
+        gt=0,
+    )
 
 
 class Settings(BaseSettings):
@@ -35,7 +35,11 @@ from lib.dependencies import AuthDependency
 
 # clients
 from lib.ssh_clients.deic_sshca_credentials_provider import DeiCSSHCACredentialsProvider
+from lib.ssh_clients.ssh_cached_credentials_provider import (
+    SSHCachedCredentialsProvider,
+)
 from lib.ssh_clients.ssh_client import SSHClientPool
+from lib.ssh_clients.ssh_credentials_provider import SSHCredentialsProvider
 from lib.helpers.api_auth_helper import ApiAuthHelper
 from lib.scheduler_clients.pbs.pbs_client import PbsClient
 from lib.scheduler_clients.slurm.slurm_client import SlurmClient
@@ -60,6 +64,9 @@ class APIAuthDependency(AuthDependency):
                 username_claim=settings.auth.authentication.username_claim,
                 jwk_algorithm=settings.auth.authentication.jwk_algorithm,
                 min_token_ttl=settings.auth.authentication.min_token_ttl,
+                token_cache_max_entries=settings.auth.authentication.token_cache_max_entries,
+                jwks_refresh_interval=settings.auth.authentication.jwks_refresh_interval,
+                jwks_min_refresh_interval=settings.auth.authentication.jwks_min_refresh_interval,
             )
 
         # Init sigleton authZ services
@@ -69,6 +76,10 @@ class APIAuthDependency(AuthDependency):
                     url=settings.auth.authorization.url,
                     timeout=settings.auth.authorization.timeout,
                     max_connections=settings.auth.authorization.max_connections,
+                    allow_cache_ttl=settings.auth.authorization.allow_cache_ttl,
+                    deny_cache_ttl=settings.auth.authorization.deny_cache_ttl,
+                    cache_max_entries=settings.auth.authorization.cache_max_entries,
+                    batch_check_url=settings.auth.authorization.batch_check_url,
                 )
             else:
                 APIAuthDependency.globalAuthZ = None
@@ -95,6 +106,26 @@ class APIAuthDependency(AuthDependency):
         ApiAuthHelper.set_access_token(access_token=token)
         request.state.username = auth.username
 
+    @staticmethod
+    def get_token_cache_stats() -> dict:
+        token_cache = getattr(
+            getattr(APIAuthDependency, "globalAuthN", None), "token_cache", None
+        )
+        return token_cache.get_stats() if token_cache is not None else {}
+
+    @staticmethod
+    def get_decision_cache_stats() -> dict:
+        decision_cache = getattr(
+            getattr(APIAuthDependency, "globalAuthZ", None), "decision_cache", None
+        )
+        return decision_cache.get_stats() if decision_cache is not None else {}
+
+    @staticmethod
+    async def close_aiohttp_clients() -> None:
+        authZ = getattr(APIAuthDependency, "globalAuthZ", None)
+        if authZ is not None and hasattr(authZ, "close_aiohttp_client"):
+            await authZ.close_aiohttp_client()
+
 
 class ServiceAvailabilityDependency:
     def __init__(self, service_type: BackendServiceType, ignore_health: bool = False):
@@ -120,6 +151,10 @@ class ServiceAvailabilityDependency:
                 detail="All filesystem requests require a path or source_path parameter.",
             )
 
+        self.check_file_system_path(system, path)
+
+    def check_file_system_path(self, system: HPCCluster, path: str):
+        # Also used to validate each path of requests on multiple paths
         if not os.path.isabs(path):
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
@@ -226,6 +261,8 @@ class ServiceAvailabilityDependency:
 class SSHClientDependency:
 
     client_pools: SSHClientPool = {}
+    # Shared by all the pools, so that cached credentials are reused across systems
+    key_provider: SSHCredentialsProvider = None
     lock = asyncio.Lock()
 
     def __init__(
@@ -233,24 +270,36 @@ class SSHClientDependency:
         ignore_health: bool = False,
     ):
         self.ignore_health = ignore_health
+        if SSHClientDependency.key_provider is None:
+            SSHClientDependency.key_provider = self._get_key_provider()
+
+    @staticmethod
+    def _get_key_provider() -> SSHCredentialsProvider:
         match settings.ssh_credentials.type:
             case SSHKeysServiceType.SSHCA:
-                self.key_provider = DeiCSSHCACredentialsProvider(
+                key_provider = DeiCSSHCACredentialsProvider(
                     settings.ssh_credentials.url,
                     settings.ssh_credentials.max_connections,
                     app_version=settings.app_version,
                 )
             case SSHKeysServiceType.SSHService:
-                self.key_provider = SSHKeygenCredentialsProvider(
+                key_provider = SSHKeygenCredentialsProvider(
                     settings.ssh_credentials.url,
                     settings.ssh_credentials.max_connections,
                     app_version=settings.app_version,
                 )
             case SSHKeysServiceType.SSHStaticKeys:
-                self.key_provider = SSHStaticKeysProvider(settings.ssh_credentials.keys)
+                return SSHStaticKeysProvider(settings.ssh_credentials.keys)
             case _:
                 raise TypeError("Unsupported SSHKeysProvider")
 
+        if settings.ssh_credentials.cache_credentials:
+            key_provider = SSHCachedCredentialsProvider(
+                key_provider,
+                refresh_margin=settings.ssh_credentials.cache_refresh_margin,
+            )
+        return key_provider
+
     async def __call__(self, system_name: str):
         system = ServiceAvailabilityDependency(
             service_type=BackendServiceType.ssh, ignore_health=self.ignore_health
@@ -273,6 +322,17 @@ class SSHClientDependency:
                 idle_timeout=system.ssh.timeout.idle_timeout,
                 max_clients=system.ssh.max_clients,
                 keep_alive=system.ssh.timeout.keep_alive,
+                max_channels_per_connection=system.ssh.max_channels_per_connection,
+                max_connections_per_user=system.ssh.max_connections_per_user,
+                persistent_shell=system.ssh.persistent_shell,
+                max_connections_per_tunnel=system.ssh.max_connections_per_tunnel,
+                endpoints=[
+                    (endpoint.host, endpoint.port) for endpoint in system.ssh.endpoints
+                ],
+                endpoint_ejection_threshold=system.ssh.endpoint_ejection_threshold,
+                endpoint_ejection_time=system.ssh.endpoint_ejection_time,
+                max_capacity_waiters=system.ssh.max_capacity_waiters,
+                parse_offload_threshold=system.ssh.parse_offload_threshold,
             )
             SSHClientDependency.client_pools[system_name] = client_pool
             return client_pool
@@ -291,6 +351,21 @@ class SSHClientDependency:
     def prune_client_pools(self):
         for client_pool in SSHClientDependency.client_pools.values():
             client_pool.prune_connection_pool()
+        if isinstance(SSHClientDependency.key_provider, SSHCachedCredentialsProvider):
+            SSHClientDependency.key_provider.prune()
+
+    @classmethod
+    def get_credentials_cache_stats(cls) -> dict:
+        if isinstance(cls.key_provider, SSHCachedCredentialsProvider):
+            return cls.key_provider.get_stats()
+        return {}
+
+    @classmethod
+    def get_pool_stats(cls) -> dict:
+        return {
+            system_name: client_pool.get_stats()
+            for system_name, client_pool in cls.client_pools.items()
+        }
 
 
 class SchedulerClientDependency:
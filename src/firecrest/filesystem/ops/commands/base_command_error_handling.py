@@ -3,6 +3,13 @@
 # Please, refer to the LICENSE file in the root directory.
 # SPDX-License-Identifier: BSD-3-Clause
 
+from asyncssh import (
+    SFTPError,
+    SFTPFileAlreadyExists,
+    SFTPNoSuchFile,
+    SFTPNoSuchPath,
+    SFTPPermissionDenied,
+)
 from fastapi import HTTPException, status
 
 
@@ -58,3 +65,21 @@ class BaseCommandErrorHandling:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=error_mess
         )
+
+
+def sftp_error_handling(error: SFTPError):
+
+    error_mess = f"Remote SFTP operation failed with error message:{error.reason}"
+
+    if isinstance(error, (SFTPNoSuchFile, SFTPNoSuchPath)):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=error_mess)
+    if isinstance(error, SFTPPermissionDenied):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail=error_mess)
+    if isinstance(error, SFTPFileAlreadyExists):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail=error_mess
+        )
+
+    raise HTTPException(
+        status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=error_mess
+    )
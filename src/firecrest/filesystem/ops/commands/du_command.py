@@ -0,0 +1,69 @@
+# Copyright (c) 2025, ETH Zurich. All rights reserved.
+#
+# Please, refer to the LICENSE file in the root directory.
+# SPDX-License-Identifier: BSD-3-Clause
+
+import os
+
+from fastapi import HTTPException, status
+
+# commands
+from firecrest.filesystem.ops.commands.base_command_with_timeout import (
+    BaseCommandWithTimeout,
+)
+
+
+class DuCommand(BaseCommandWithTimeout):
+    """Summarizes the disk usage of a folder and of its subfolders.
+
+    Returns the usage (in bytes) of the folder and the one of each subfolder
+    up to `max_depth` levels below it, as `{"name", "size"}` entries named
+    relative to the folder, the largest first. Errors on entries below the
+    folder (e.g. unreadable subfolders) are ignored, their usage is missing
+    from the totals.
+    """
+
+    def __init__(
+        self,
+        target_path: str = None,
+        max_depth: int = 1,
+        command_timeout: int = 5,
+    ) -> None:
+        super().__init__(command_timeout=command_timeout)
+        self.target_path = target_path
+        self.max_depth = max_depth
+
+    def get_command(self) -> str:
+        return (
+            f"{super().get_command()} du --block-size=1 --null "
+            f"--max-depth={self.max_depth} -- '{self.target_path}'"
+        )
+
+    def parse_output(self, stdout: str, stderr: str, exit_status: int = 0):
+        # Example of du output ("\0" is a NUL character)
+        # 8192\t/home/user/dir/sub\04096\t/home/user/dir/other\016384\t/home/user/dir\0
+        prefix = f"'{self.target_path.rstrip('/')}/"
+        lines = stderr.strip().splitlines()
+        # du exits with status 1 when it could not read some entries
+        if exit_status != 0 and not (
+            exit_status == 1 and lines and all(prefix in line for line in lines)
+        ):
+            super().error_handling(stderr, exit_status)
+
+        size = None
+        entries = []
+        for record in stdout.split("\0")[:-1]:
+            usage, path = record.split("\t", 1)
+            name = os.path.relpath(path, self.target_path)
+            if name == ".":
+                size = int(usage)
+            else:
+                entries.append({"name": name, "size": int(usage)})
+
+        if size is None:
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail=f"Invalid output: {stdout} {stderr}",
+            )
+        entries.sort(key=lambda entry: entry["size"], reverse=True)
+        return {"path": self.target_path, "size": size, "entries": entries}
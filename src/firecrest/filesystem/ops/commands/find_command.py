@@ -0,0 +1,132 @@
+# Copyright (c) 2025, ETH Zurich. All rights reserved.
+#
+# Please, refer to the LICENSE file in the root directory.
+# SPDX-License-Identifier: BSD-3-Clause
+
+import shlex
+from typing import List, Optional
+
+# commands
+from firecrest.filesystem.ops.commands.base_command_with_timeout import (
+    BaseCommandWithTimeout,
+)
+from lib.ssh_clients.ssh_client import LineStreamCommand
+
+
+# `find -type` of the searched file types
+FIND_TYPES = {"file": "f", "directory": "d", "link": "l"}
+
+# Each entry is printed as three NUL-terminated fields: the attributes, the
+# path relative to the searched folder and the link target (empty if none)
+FIND_FORMAT = "%M %u %g %s %TY-%Tm-%TdT%TH:%TM:%TS\\0%P\\0%l\\0"
+FIND_FIELDS = 3
+
+
+class FindCommand(BaseCommandWithTimeout, LineStreamCommand):
+    """Searches the entries below a folder matching the given predicates.
+
+    Entries are returned with the fields of the `File` model, their names
+    relative to the searched folder. Errors on entries below the folder
+    (e.g. unreadable subfolders) are ignored, the entries found elsewhere
+    are still returned.
+    """
+
+    stream_delimiter = b"\0"
+
+    def __init__(
+        self,
+        target_path: str = None,
+        name: Optional[str] = None,
+        file_type: Optional[str] = None,
+        min_size: Optional[int] = None,
+        max_size: Optional[int] = None,
+        modified_after: Optional[int] = None,
+        modified_before: Optional[int] = None,
+        max_depth: Optional[int] = None,
+        command_timeout: int = 60,
+    ) -> None:
+        super().__init__(command_timeout=command_timeout)
+        self.target_path = target_path
+        self.name = name
+        self.file_type = file_type
+        self.min_size = min_size
+        self.max_size = max_size
+        self.modified_after = modified_after
+        self.modified_before = modified_before
+        self.max_depth = max_depth
+        self.fields: List[str] = []
+
+    def get_command(self) -> str:
+        # Global options must precede the tests
+        options = "-mindepth 1 "
+        if self.max_depth is not None:
+            options += f"-maxdepth {self.max_depth} "
+        if self.name is not None:
+            # The pattern is user supplied, it's quoted for the remote shell
+            options += f"-name {shlex.quote(self.name)} "
+        if self.file_type is not None:
+            options += f"-type {FIND_TYPES[self.file_type]} "
+        if self.min_size:
+            # -size compares whole units, `c` are bytes: +N is "more than N"
+            options += f"-size +{self.min_size - 1}c "
+        if self.max_size is not None:
+            options += f"-size -{self.max_size + 1}c "
+        if self.modified_after is not None:
+            options += f"-newermt '@{self.modified_after}' "
+        if self.modified_before is not None:
+            options += f"! -newermt '@{self.modified_before}' "
+
+        return (
+            f"{super().get_command()} find -P '{self.target_path}' "
+            f"{options}-printf '{FIND_FORMAT}'"
+        )
+
+    def _parse_fields(self, attributes: str, name: str, link_target: str) -> dict:
+        mode, user, group, size, last_modified = attributes.split(" ", 4)
+        return {
+            "name": name,
+            "type": mode[0],
+            "link_target": link_target or None,
+            "user": user,
+            "group": group,
+            "permissions": mode[1:],
+            # Without the fractional seconds, as listed by `ls`
+            "last_modified": last_modified.split(".")[0],
+            "size": size,
+        }
+
+    def parse_stream_line(self, line: str) -> Optional[dict]:
+        self.fields.append(line)
+        if len(self.fields) < FIND_FIELDS:
+            return None
+        entry = self._parse_fields(*self.fields)
+        self.fields = []
+        return entry
+
+    def _check_errors(self, stderr: str, exit_status: int) -> None:
+        if exit_status == 0:
+            return
+        # find exits with status 1 when it could not read some entries
+        prefix = f"find: '{self.target_path.rstrip('/')}/"
+        lines = stderr.strip().splitlines()
+        if exit_status == 1 and lines and all(
+            line.startswith(prefix) for line in lines
+        ):
+            return
+        super().error_handling(stderr, exit_status)
+
+    def parse_stream_end(self, stderr: str, exit_status: int) -> List[dict]:
+        self._check_errors(stderr, exit_status)
+        return super().parse_stream_end(stderr, 0)
+
+    def parse_output(self, stdout: str, stderr: str, exit_status: int = 0):
+        # Example of find output ("\0" is a NUL character)
+        # -rw-r--r-- user group 8 2023-07-24T11:45:35.5264673550\0file.txt\0\0
+        # lrwxrwxrwx user group 8 2023-07-24T11:45:35.5264673550\0link\0file.txt\0
+        self._check_errors(stderr, exit_status)
+
+        fields = stdout.split("\0")[:-1]
+        return [
+            self._parse_fields(*fields[i : i + FIND_FIELDS])
+            for i in range(0, len(fields) - FIND_FIELDS + 1, FIND_FIELDS)
+        ]
@@ -4,17 +4,58 @@
 # SPDX-License-Identifier: BSD-3-Clause
 
 import re
-import shlex
+from typing import Optional
 from fastapi import HTTPException, status
 
 # commands
 from firecrest.filesystem.ops.commands.base_command_with_timeout import (
     BaseCommandWithTimeout,
 )
-from firecrest.filesystem.ops.models import File
+from lib.ssh_clients.ssh_client import LineStreamCommand
 
 
-class LsBaseCommand(BaseCommandWithTimeout):
+# A C-quoted string, as printed by `ls --quoting-style=c`
+C_QUOTED = r'"((?:[^"\\\n]|\\.)*)"'
+
+# Matches, in a single pass over the whole output, both the folder headers of
+# recursive listings and the file entries
+LS_OUTPUT_PATTERN = re.compile(
+    rf"^(?:{C_QUOTED}:"
+    r"|(\S)(\S+)\s+\d+\s+(\S+)\s+(\S+)\s+(\d+)\s+([\dT:-]+)\s+"
+    rf"{C_QUOTED}(?: -> {C_QUOTED})?)$",
+    re.MULTILINE,
+)
+
+C_ESCAPE_PATTERN = re.compile(rb"\\([0-7]{1,3}|.)", re.DOTALL)
+C_ESCAPES = {
+    b"a": b"\a",
+    b"b": b"\b",
+    b"t": b"\t",
+    b"n": b"\n",
+    b"v": b"\v",
+    b"f": b"\f",
+    b"r": b"\r",
+}
+
+
+def _c_escape(match: re.Match) -> bytes:
+    escape = match.group(1)
+    if escape[:1].isdigit():
+        return bytes([int(escape, 8) & 0xFF])
+    return C_ESCAPES.get(escape, escape)
+
+
+def c_unquote(text: str) -> str:
+    # Non-printable bytes are escaped in octal, so escapes are resolved on
+    # the encoded string and the result decoded again
+    if "\\" not in text:
+        return text
+    return C_ESCAPE_PATTERN.sub(
+        _c_escape, text.encode("utf-8", errors="surrogateescape")
+    ).decode("utf-8", errors="replace")
+
+
+class LsBaseCommand(BaseCommandWithTimeout, LineStreamCommand):
 
     def __init__(
         self,
@@ -33,6 +74,8 @@ class LsBaseCommand(BaseCommandWithTimeout):
         self.numeric_uid = numeric_uid
         self.recursion = recursion
         self.dereference = dereference
+        self.root_folder = None
+        self.folder_name = ""
 
         if self.no_recursion and self.recursion:
             raise HTTPException(
@@ -58,79 +101,73 @@ class LsBaseCommand(BaseCommandWithTimeout):
 
         return f"{super().get_command()} ls " f"{options}" f"-- '{self.target_path}'"
 
+    def _parse_fields(self, fields) -> Optional[dict]:
+        (
+            folder,
+            file_type,
+            permissions,
+            user,
+            group,
+            size,
+            last_modified,
+            name,
+            link_target,
+        ) = fields
+        if not file_type:
+            # Header of the folder listed by the following entries, names
+            # are relative to the first (listed) folder
+            folder = c_unquote(folder).rstrip("/") + "/"
+            if self.root_folder is None:
+                self.root_folder = folder
+            self.folder_name = (
+                folder[len(self.root_folder) :]
+                if folder.startswith(self.root_folder)
+                else folder
+            )
+            return None
+        return {
+            "name": self.folder_name + c_unquote(name),
+            "type": file_type,
+            "link_target": c_unquote(link_target) if link_target else None,
+            "user": user,
+            "group": group,
+            "permissions": permissions,
+            "last_modified": last_modified,
+            "size": size,
+        }
+
+    def parse_stream_line(self, line: str) -> Optional[dict]:
+        # Used when the listing is streamed, entries are returned as soon as
+        # their line is received
+        match = LS_OUTPUT_PATTERN.match(line)
+        return self._parse_fields(match.groups("")) if match else None
+
     def parse_output(self, stdout: str, stderr: str, exit_status: int = 0):
         # Example of ls output
-        # ".":
+        # "/home/user":
         # total 8
         # lrwxrwxrwx 1 username groupname 46 2023-07-25T14:18:00 "filename" -> "target link"
         # -rw-rw-r-- 1 root root           0 2023-07-24T11:45:35 "root_file.txt"
         # drwxrwxr-x 3 username groupname 4096 2023-07-24T11:45:35 "folder"
-        # "./folder":
+        # "/home/user/folder":
         # total 1
         # -rw-rw-r-- 1 username groupname 0 2023-07-24T11:45:35 "file_in_folder.txt"
         # ...
-
-        def remove_prefix(text, prefix):
-            return text[text.startswith(prefix) and len(prefix) :]
+        #
+        # Entries are returned as plain dicts with the fields of the `File`
+        # model, which is only built when the response is serialized.
 
         if exit_status != 0:
             return super().error_handling(stderr, exit_status)
 
-        file_list = []
-        # Check if ls has recursive folders
-        if re.match(r"\"(.+)\":\n", stdout):
-            folders = re.split(r"\"(.+)\":\n", stdout)
-            root_folder = ""
-            for i in range(1, len(folders), 2):
-                folder = folders[i].rstrip("/")
-                if i == 1:
-                    root_folder = folder + "/"
-                folder_name = remove_prefix(folder + "/", root_folder)
-                folder_content = folders[i + 1]
-                file_list += self.ls_parse_folder(folder_content, folder_name)
-        else:
-            file_list += self.ls_parse_folder(stdout)
+        self.root_folder = None
+        self.folder_name = ""
+        file_list = [
+            entry
+            for entry in map(self._parse_fields, LS_OUTPUT_PATTERN.findall(stdout))
+            if entry is not None
+        ]
 
         if self.no_recursion:
             return file_list[0] if len(file_list) > 0 else None
         return file_list
-
-    def ls_parse_folder(self, folder_content: str, path: str = ""):
-        # Example of ls output
-        # total 8
-        # lrwxrwxrwx 1 username groupname 46 2023-07-25T14:18:00 'filename' -> 'target link'
-        # -rw-rw-r-- 1 root root           0 2023-07-24T11:45:35 'root_file.txt'
-        # ...
-        file_pattern = (
-            r"^(?P<type>\S)(?P<permissions>\S+)\s+\d+\s+(?P<user>\S+)\s+"
-            r"(?P<group>\S+)\s+(?P<size>\d+)\s+(?P<last_modified>(\d|-|T|:)+)\s+(?P<filename>.+)$"
-        )
-        lines = folder_content.splitlines()
-        file_list = []
-        for entry in lines:
-            matches = re.finditer(file_pattern, entry)
-            for m in matches:
-                tokens = shlex.split(m.group("filename"))
-                if len(tokens) == 1:
-                    name = tokens[0]
-                    link_target = None
-                elif len(tokens) == 3:
-                    # We could add an assertion that m.group("type") == 'l' if
-                    # we want to be sure that this is a link
-                    name = tokens[0]
-                    link_target = tokens[2]
-                else:
-                    continue
-                file_list.append(
-                    File(
-                        name=path + name,
-                        type=m.group("type"),
-                        link_target=link_target,
-                        user=m.group("user"),
-                        group=m.group("group"),
-                        permissions=m.group("permissions"),
-                        last_modified=m.group("last_modified"),
-                        size=m.group("size"),
-                    )
-                )
-        return file_list
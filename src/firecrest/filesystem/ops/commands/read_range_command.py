@@ -0,0 +1,43 @@
+# Copyright (c) 2025, ETH Zurich. All rights reserved.
+#
+# Please, refer to the LICENSE file in the root directory.
+# SPDX-License-Identifier: BSD-3-Clause
+
+from firecrest.filesystem.ops.commands.base_command_error_handling import (
+    BaseCommandErrorHandling,
+)
+from lib.ssh_clients.ssh_client import BaseCommand
+
+
+class ReadRangeCommand(BaseCommand, BaseCommandErrorHandling):
+    """Outputs `size` bytes of a file starting at `offset`, to be streamed.
+
+    The command is not wrapped in `timeout`: the remote process is throttled
+    by the consumer of the stream, `SSHClient.execute_stream` applies the
+    execution timeout to each read instead.
+    """
+
+    def __init__(
+        self,
+        target_path: str = None,
+        offset: int = 0,
+        size: int = 0,
+        block_size: int = 64 * 1024,
+    ) -> None:
+        super().__init__()
+        self.target_path = target_path
+        self.offset = offset
+        self.size = size
+        self.block_size = block_size
+
+    def get_command(self) -> str:
+        return (
+            f"dd if='{self.target_path}' bs={self.block_size} skip={self.offset} "
+            f"count={self.size} iflag=skip_bytes,count_bytes status=none"
+        )
+
+    def parse_output(self, stdout: str, stderr: str, exit_status: int):
+        if exit_status != 0:
+            super().error_handling(stderr, exit_status)
+
+        return stdout
@@ -0,0 +1,31 @@
+# Copyright (c) 2025, ETH Zurich. All rights reserved.
+#
+# Please, refer to the LICENSE file in the root directory.
+# SPDX-License-Identifier: BSD-3-Clause
+
+from firecrest.filesystem.ops.commands.base_command_error_handling import (
+    BaseCommandErrorHandling,
+)
+from lib.ssh_clients.ssh_client import BaseCommand
+
+
+class TailFollowCommand(BaseCommand, BaseCommandErrorHandling):
+    """Outputs the bytes appended to a file from now on (`tail -F`).
+
+    The file is followed by name, so that it is reopened when it is rotated
+    or recreated. The command runs until its channel is closed, so it is not
+    wrapped in `timeout`.
+    """
+
+    def __init__(self, target_path: str = None) -> None:
+        super().__init__()
+        self.target_path = target_path
+
+    def get_command(self) -> str:
+        return f"tail --bytes=0 --follow=name --retry -- '{self.target_path}'"
+
+    def parse_output(self, stdout: str, stderr: str, exit_status: int):
+        if exit_status != 0:
+            super().error_handling(stderr, exit_status)
+
+        return stdout
@@ -0,0 +1,49 @@
+# Copyright (c) 2025, ETH Zurich. All rights reserved.
+#
+# Please, refer to the LICENSE file in the root directory.
+# SPDX-License-Identifier: BSD-3-Clause
+
+import os
+import shlex
+
+from firecrest.filesystem.ops.commands.base_command_error_handling import (
+    BaseCommandErrorHandling,
+)
+from lib.ssh_clients.ssh_client import BaseCommand
+
+
+class WriteFileCommand(BaseCommand, BaseCommandErrorHandling):
+    """Writes `size` bytes of standard input to a file, atomically.
+
+    The data is written to a temporary file in the target directory, which
+    is renamed over the target only once exactly `size` bytes have been
+    received, so an interrupted upload never replaces the file. The
+    temporary file gets the permissions of the replaced file, or the default
+    ones for new files.
+    As for `ReadRangeCommand` there is no `timeout` wrapper, the input is
+    streamed with `SSHClient.execute_stdin_stream`.
+    """
+
+    def __init__(self, target_path: str = None, size: int = 0) -> None:
+        super().__init__()
+        self.target_path = target_path
+        self.size = size
+
+    def get_command(self) -> str:
+        directory, name = os.path.split(self.target_path)
+        # The script needs a POSIX shell, login shells may not be (e.g. csh)
+        return "sh -c " + shlex.quote(
+            f"tmp=$(mktemp -- '{directory}/.{name}.XXXXXXXX') || exit 1; "
+            f"head -c {self.size} > \"$tmp\" "
+            f"&& [ \"$(stat -c %s -- \"$tmp\")\" -eq {self.size} ] "
+            f"&& {{ chmod --reference='{self.target_path}' -- \"$tmp\" 2>/dev/null "
+            "|| chmod -- \"$(printf '%o' $((0666 & ~0$(umask))))\" \"$tmp\"; } "
+            f"&& mv -f -- \"$tmp\" '{self.target_path}' "
+            "|| { rm -f -- \"$tmp\"; exit 1; }"
+        )
+
+    def parse_output(self, stdout: str, stderr: str, exit_status: int):
+        if exit_status != 0:
+            super().error_handling(stderr, exit_status)
+
+        return None
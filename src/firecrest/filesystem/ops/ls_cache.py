@@ -0,0 +1,205 @@
+# Copyright (c) 2025, ETH Zurich. All rights reserved.
+#
+# Please, refer to the LICENSE file in the root directory.
+# SPDX-License-Identifier: BSD-3-Clause
+
+import os
+from collections import OrderedDict
+from time import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+# configs
+from firecrest.config import HPCCluster
+
+
+# Approximate memory footprint of a listed entry besides its names
+ENTRY_SIZE = 512
+
+
+def _is_parent_or_same(parent: str, path: str) -> bool:
+    return path == parent or path.startswith(parent.rstrip("/") + "/")
+
+
+def listing_size(output: List[dict]) -> int:
+    return sum(
+        ENTRY_SIZE + len(entry["name"]) + len(entry["link_target"] or "")
+        for entry in output
+    )
+
+
+def usage_size(output: dict) -> int:
+    return ENTRY_SIZE + sum(
+        ENTRY_SIZE + len(entry["name"]) for entry in output["entries"]
+    )
+
+
+class LsCache:
+    """Caches the `ops/ls` listings of a system per user, path and flags.
+
+    Listings are kept for the `ls_cache_ttl` of the file system they belong
+    to (`0` disables caching), and dropped when an operation of this API
+    modifies the listed path, one of its parents or children. The cache
+    holds at most `max_entries` listings and `max_size` bytes (approximate),
+    the least recently used listings are evicted first.
+    Changes made outside of this API, or through another process of it
+    (e.g. another worker), are only visible once the TTL expires.
+    The outputs of other commands depending on the contents of the path
+    (e.g. `ops/du`) can be cached by giving their `sizeof` estimate.
+    """
+
+    class CacheEntry:
+        def __init__(self, output: Any, size: int, expires: float):
+            self.output = output
+            self.size = size
+            self.expires = expires
+
+    def __init__(
+        self,
+        file_systems: Dict[str, int],
+        max_entries: int = 1000,
+        max_size: int = 64 * 1024 * 1024,
+        sizeof: Callable[[Any], int] = listing_size,
+    ):
+        # Mount path -> TTL, the longest mount path containing a path applies
+        self.file_systems = {
+            os.path.normpath(mount): ttl for mount, ttl in file_systems.items()
+        }
+        self.max_entries = max_entries
+        self.max_size = max_size
+        self.sizeof = sizeof
+        self.entries: OrderedDict[Tuple, LsCache.CacheEntry] = OrderedDict()
+        self.size = 0
+        self.hits = {mount: 0 for mount in self.file_systems}
+        self.misses = {mount: 0 for mount in self.file_systems}
+        self.evictions = 0
+        self.invalidations = 0
+
+    def _file_system(self, path: str) -> Optional[str]:
+        mounts = [
+            mount for mount in self.file_systems if _is_parent_or_same(mount, path)
+        ]
+        return max(mounts, key=len) if mounts else None
+
+    def _remove(self, key: Tuple) -> None:
+        self.size -= self.entries.pop(key).size
+
+    def get(self, username: str, path: str, flags: Tuple) -> Optional[Any]:
+        path = os.path.normpath(path)
+        mount = self._file_system(path)
+        if mount is None or self.file_systems[mount] <= 0:
+            return None
+
+        key = (username, path, flags)
+        entry = self.entries.get(key)
+        if entry is not None and entry.expires <= time():
+            self._remove(key)
+            entry = None
+        if entry is None:
+            self.misses[mount] += 1
+            return None
+
+        self.entries.move_to_end(key)
+        self.hits[mount] += 1
+        return entry.output
+
+    def put(self, username: str, path: str, flags: Tuple, output: Any) -> None:
+        path = os.path.normpath(path)
+        mount = self._file_system(path)
+        if mount is None or self.file_systems[mount] <= 0:
+            return
+
+        size = self.sizeof(output)
+        if size > self.max_size:
+            return
+
+        key = (username, path, flags)
+        if key in self.entries:
+            self._remove(key)
+        self.entries[key] = LsCache.CacheEntry(
+            output, size, time() + self.file_systems[mount]
+        )
+        self.size += size
+        while len(self.entries) > self.max_entries or self.size > self.max_size:
+            self._remove(next(iter(self.entries)))
+            self.evictions += 1
+
+    def invalidate(self, path: str) -> None:
+        # The listings of the path, of its children (e.g. removed with it)
+        # and of its parents (which list it) are stale, for all the users
+        path = os.path.normpath(path)
+        stale_keys = [
+            key
+            for key in self.entries
+            if _is_parent_or_same(key[1], path) or _is_parent_or_same(path, key[1])
+        ]
+        for key in stale_keys:
+            self._remove(key)
+        self.invalidations += len(stale_keys)
+
+    def get_stats(self) -> dict:
+        return {
+            "entries": len(self.entries),
+            "size": self.size,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+            "file_systems": {
+                mount: {
+                    "ttl": ttl,
+                    "hits": self.hits[mount],
+                    "misses": self.misses[mount],
+                    "hit_rate": (
+                        self.hits[mount] / (self.hits[mount] + self.misses[mount])
+                        if self.hits[mount] + self.misses[mount]
+                        else 0.0
+                    ),
+                }
+                for mount, ttl in self.file_systems.items()
+            },
+        }
+
+
+# Listing caches per system name, created on first use
+ls_caches: Dict[str, LsCache] = {}
+
+
+def get_ls_cache(system: HPCCluster) -> LsCache:
+    if system.name not in ls_caches:
+        ls_caches[system.name] = LsCache(
+            {
+                file_system.path: file_system.ls_cache_ttl
+                for file_system in system.file_systems
+            },
+            max_entries=system.data_operation.ls_cache_max_entries,
+            max_size=system.data_operation.ls_cache_max_size,
+        )
+    return ls_caches[system.name]
+
+
+def get_ls_cache_stats() -> dict:
+    return {
+        system_name: ls_cache.get_stats() for system_name, ls_cache in ls_caches.items()
+    }
+
+
+# Directory usage caches per system name, created on first use
+du_caches: Dict[str, LsCache] = {}
+
+
+def get_du_cache(system: HPCCluster) -> LsCache:
+    if system.name not in du_caches:
+        du_caches[system.name] = LsCache(
+            {
+                file_system.path: file_system.du_cache_ttl
+                for file_system in system.file_systems
+            },
+            max_entries=system.data_operation.ls_cache_max_entries,
+            max_size=system.data_operation.ls_cache_max_size,
+            sizeof=usage_size,
+        )
+    return du_caches[system.name]
+
+
+def get_du_cache_stats() -> dict:
+    return {
+        system_name: du_cache.get_stats() for system_name, du_cache in du_caches.items()
+    }
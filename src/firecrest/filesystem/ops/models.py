@@ -13,6 +13,9 @@ from pydantic import Field
 from firecrest.filesystem.ops.commands.tar_command import TarCommand
 
 
+MAX_BATCH_OPERATIONS = 100
+
+
 class ContentUnit(str, Enum):
     lines = "lines"
     bytes = "bytes"
@@ -71,6 +74,41 @@ class PatchFileMetadataRequest(CamelModel):
 
 class GetDirectoryLsResponse(CamelModel):
     output: Optional[list[File]] = Field(None, nullable=True)
+    next_cursor: Optional[str] = Field(
+        None,
+        nullable=True,
+        description="Cursor of the next page, `null` on the last page",
+    )
+
+
+class FindFileType(str, Enum):
+    file = "file"
+    directory = "directory"
+    link = "link"
+
+
+class GetFindResponse(CamelModel):
+    output: Optional[list[File]] = Field(None, nullable=True)
+    truncated: bool = Field(
+        False, description="More entries match than the ones returned"
+    )
+
+
+class DirectoryUsageEntry(CamelModel):
+    name: str = Field(..., description="Path relative to the directory")
+    size: int = Field(..., description="Disk usage (in bytes)")
+
+
+class DirectoryUsage(CamelModel):
+    path: str
+    size: int = Field(..., description="Disk usage of the directory (in bytes)")
+    entries: list[DirectoryUsageEntry] = Field(
+        ..., description="Disk usage of the subdirectories, the largest first"
+    )
+
+
+class GetDirectoryUsageResponse(CamelModel):
+    output: Optional[DirectoryUsage] = Field(None, nullable=True)
 
 
 class GetFileHeadResponse(CamelModel):
@@ -224,3 +262,66 @@ class PostExtractRequest(FilesystemRequestBase):
             ]
         }
     }
+
+
+class BatchOperationType(str, Enum):
+    stat = "stat"
+    ls = "ls"
+    checksum = "checksum"
+    file = "file"
+
+
+class BatchOperation(CamelModel):
+    operation: BatchOperationType = Field(..., description="Operation to run")
+    path: str = Field(..., description="Target path of the operation")
+    dereference: bool = Field(
+        default=False,
+        description="Follow symbolic links (`stat` and `ls` operations)",
+    )
+    show_hidden: bool = Field(
+        default=False, description="Show hidden files (`ls` operation)"
+    )
+    numeric_uid: bool = Field(
+        default=False,
+        description="List numeric user and group IDs (`ls` operation)",
+    )
+
+
+class PostBatchRequest(CamelModel):
+    operations: list[BatchOperation] = Field(
+        ...,
+        min_length=1,
+        max_length=MAX_BATCH_OPERATIONS,
+        description=f"Operations to run, at most {MAX_BATCH_OPERATIONS}",
+    )
+    model_config = {
+        "json_schema_extra": {
+            "examples": [
+                {
+                    "operations": [
+                        {"operation": "stat", "path": "/home/user/file.txt"},
+                        {"operation": "checksum", "path": "/home/user/file.txt"},
+                        {"operation": "ls", "path": "/home/user/dir"},
+                    ]
+                }
+            ]
+        }
+    }
+
+
+class BatchOperationError(CamelModel):
+    status_code: int
+    message: str
+
+
+class BatchOperationResult(CamelModel):
+    output: Optional[FileStat | FileChecksum | list[File] | str] = Field(
+        None, nullable=True
+    )
+    error: Optional[BatchOperationError] = Field(None, nullable=True)
+
+
+class PostBatchResponse(CamelModel):
+    output: list[BatchOperationResult] = Field(
+        ..., description="Results in the order of the requested operations"
+    )
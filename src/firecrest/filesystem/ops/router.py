@@ -3,18 +3,30 @@
 # Please, refer to the LICENSE file in the root directory.
 # SPDX-License-Identifier: BSD-3-Clause
 
+import asyncio
+import codecs
+import heapq
+import json
+import os
+import re
+import stat
+from contextlib import aclosing, contextmanager
+from email.utils import formatdate
+from operator import itemgetter
+from typing import Any, Annotated, AsyncIterator, Iterator, List, Optional, Tuple
+
+from asyncssh import SFTPError
 from fastapi import (
     Depends,
     File,
+    Header,
     HTTPException,
     Path,
-    Response,
     UploadFile,
     status,
     Query,
 )
-from typing import Any, Annotated
-from base64 import b64decode, b64encode
+from fastapi.responses import StreamingResponse
 
 # configs
 from firecrest.config import HPCCluster, BackendServiceType
@@ -28,15 +40,28 @@ from firecrest.dependencies import (
 )
 
 # helpers
-from firecrest.filesystem.ops.commands.base64_command import Base64Command
+from firecrest.filesystem.ops.commands.base_command_error_handling import (
+    sftp_error_handling,
+)
 from firecrest.filesystem.ops.commands.file_command import FileCommand
+from firecrest.filesystem.ops.commands.find_command import FindCommand
 from firecrest.filesystem.ops.commands.rm_command import RmCommand
 from firecrest.filesystem.ops.commands.dd_command import DdCommand
+from firecrest.filesystem.ops.commands.du_command import DuCommand
+from firecrest.filesystem.ops.commands.read_range_command import ReadRangeCommand
+from firecrest.filesystem.ops.commands.write_file_command import WriteFileCommand
+from firecrest.filesystem.ops.ls_cache import get_du_cache, get_ls_cache
+from firecrest.filesystem.ops.tail_followers import get_tail_followers
 from lib.helpers.api_auth_helper import ApiAuthHelper
 from lib.helpers.router_helper import create_router
+from lib.models.apis.api_response_model import ApiResponseError
 
 # clients
-from lib.ssh_clients.ssh_client import SSHClientPool
+from lib.ssh_clients.ssh_client import (
+    BaseCommand,
+    SSHClientPool,
+    TimeoutLimitExceeded,
+)
 
 # commands
 from firecrest.filesystem.ops.commands.ls_command import LsCommand
@@ -45,19 +70,29 @@ from firecrest.filesystem.ops.commands.checksum_command import ChecksumCommand
 from firecrest.filesystem.ops.commands.stat_command import StatCommand
 from firecrest.filesystem.ops.commands.head_command import HeadCommand
 from firecrest.filesystem.ops.commands.tail_command import TailCommand
+from firecrest.filesystem.ops.commands.tail_follow_command import TailFollowCommand
 from firecrest.filesystem.ops.commands.chmod_command import ChmodCommand
 from firecrest.filesystem.ops.commands.chown_command import ChownCommand
 from firecrest.filesystem.ops.commands.symlink_command import SymlinkCommand
 
 # models
 from firecrest.filesystem.ops.models import (
+    BatchOperation,
+    BatchOperationError,
+    BatchOperationType,
+    File as FileEntry,
+    FindFileType,
     GetDirectoryLsResponse,
+    GetDirectoryUsageResponse,
+    GetFindResponse,
     GetFileHeadResponse,
     GetFileTailResponse,
     GetFileChecksumResponse,
     GetFileTypeResponse,
     GetFileStatResponse,
     GetViewFileResponse,
+    PostBatchRequest,
+    PostBatchResponse,
     PostCompressRequest,
     PostExtractRequest,
     PostMakeDirRequest,
@@ -76,6 +111,301 @@ router = create_router(
     dependencies=[Depends(APIAuthDependency(authorize=True))],
 )
 
+TRANSFER_CHUNK_SIZE = 64 * 1024
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+SSE_MEDIA_TYPE = "text/event-stream"
+SSE_KEEPALIVE_INTERVAL = 15
+RANGE_PATTERN = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+
+async def _download_stat(
+    ssh_client: SSHClientPool,
+    username: str,
+    access_token: str,
+    system: HPCCluster,
+    path: str,
+) -> Tuple[int, int, int]:
+    # Returns the mode, size and modification time of the file to download
+    async with ssh_client.get_client(username, access_token) as client:
+        if system.ssh.sftp:
+            try:
+                attributes = await client.sftp_stat(path)
+            except SFTPError as e:
+                sftp_error_handling(e)
+            return attributes.permissions or 0, attributes.size, attributes.mtime or 0
+
+        output = await client.execute(
+            StatCommand(
+                path,
+                dereference=True,
+                command_timeout=system.ssh.timeout.command_execution,
+            )
+        )
+        return output["mode"], output["size"], output["mtime"]
+
+
+async def _download_stream(
+    ssh_client: SSHClientPool,
+    username: str,
+    access_token: str,
+    system: HPCCluster,
+    path: str,
+    offset: int,
+    size: int,
+) -> AsyncIterator[bytes]:
+    # The SSH client is held until the whole range has been sent
+    async with ssh_client.get_client(username, access_token) as client:
+        if system.ssh.sftp:
+            chunks = client.sftp_read_stream(
+                path, size=size, offset=offset, chunk_size=TRANSFER_CHUNK_SIZE
+            )
+        else:
+            chunks = client.execute_stream(
+                ReadRangeCommand(path, offset, size, block_size=TRANSFER_CHUNK_SIZE),
+                chunk_size=TRANSFER_CHUNK_SIZE,
+                parse=False,
+            )
+        async with aclosing(chunks):
+            async for chunk in chunks:
+                yield chunk
+
+
+def _parse_range(range_header: str, size: int) -> Optional[Tuple[int, int]]:
+    # Returns the first and last byte of a single byte range, other ranges
+    # (e.g. multiple ranges) are ignored and the whole file is sent
+    match = RANGE_PATTERN.match(range_header.strip())
+    if match is None or match.groups() == ("", ""):
+        return None
+
+    first, last = match.groups()
+    if first:
+        start = int(first)
+        if last and int(last) < start:
+            return None
+        end = min(int(last), size - 1) if last else size - 1
+    else:
+        start = max(size - int(last), 0)
+        end = size - 1 if int(last) > 0 else -1
+
+    if start >= size or end < start:
+        raise HTTPException(
+            status_code=status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE,
+            detail="Requested range is not satisfiable.",
+            headers={"Content-Range": f"bytes */{size}"},
+        )
+    return start, end
+
+
+async def _entries_stream(
+    ssh_client: SSHClientPool,
+    username: str,
+    access_token: str,
+    command: BaseCommand,
+    limit: Optional[int],
+    timeout: int,
+    timeout_reads: bool = True,
+) -> AsyncIterator[bytes]:
+    # Entries (`ls` or `find`) are sent one per line as soon as they are
+    # parsed, the SSH client is held until the whole listing has been sent or
+    # `timeout` seconds have passed. Once entries were sent the response
+    # status can't change anymore, errors are sent as a final error line.
+    deadline = asyncio.get_running_loop().time() + timeout
+    count = 0
+    try:
+        async with ssh_client.get_client(username, access_token) as client:
+            async with aclosing(
+                client.execute_stream(command, timeout_reads=timeout_reads)
+            ) as entries:
+                while limit is None or count < limit:
+                    try:
+                        async with asyncio.timeout_at(deadline):
+                            entry = await anext(entries)
+                    except StopAsyncIteration:
+                        break
+                    except TimeoutError as e:
+                        raise TimeoutLimitExceeded(
+                            "Command execution timeout limit exceeded."
+                        ) from e
+                    line = FileEntry(**entry).model_dump_json(by_alias=True)
+                    yield line.encode() + b"\n"
+                    count += 1
+    except Exception as e:
+        if count == 0:
+            raise
+        error = BatchOperationError(**_error_details(e))
+        yield b'{"error": ' + error.model_dump_json(by_alias=True).encode() + b"}\n"
+
+
+async def _follow_stream(
+    ssh_client: SSHClientPool, username: str, access_token: str, path: str
+) -> AsyncIterator[bytes]:
+    # Runs in the reader task shared by the subscribers of the file, the SSH
+    # client is held until the reader is stopped
+    async with ssh_client.get_client(username, access_token) as client:
+        async with aclosing(
+            client.execute_stream(
+                TailFollowCommand(path),
+                chunk_size=TRANSFER_CHUNK_SIZE,
+                parse=False,
+                timeout_reads=False,
+            )
+        ) as chunks:
+            async for chunk in chunks:
+                yield chunk
+
+
+def _sse_error_event(error: Exception) -> bytes:
+    # Errors of a started stream end it with an `error` event
+    return f"event: error\ndata: {json.dumps(_error_details(error))}\n\n".encode()
+
+
+async def _sse_events(chunks: AsyncIterator[bytes]) -> AsyncIterator[bytes]:
+    # Each chunk is sent as an event with one `data` field per line, which
+    # clients join back with newlines. Empty chunks become keep-alive comments
+    decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+    async with aclosing(chunks):
+        try:
+            async for chunk in chunks:
+                if not chunk:
+                    yield b": keep-alive\n\n"
+                    continue
+                text = decoder.decode(chunk)
+                if text:
+                    data = "".join(f"data: {line}\n" for line in text.split("\n"))
+                    yield f"{data}\n".encode()
+        except Exception as e:
+            yield _sse_error_event(e)
+
+
+def _paginate_ls(
+    entries: List[dict], limit: Optional[int], cursor: Optional[str]
+) -> Tuple[List[dict], Optional[str]]:
+    # Pages are in name order and start after the name given as cursor
+    if cursor is not None:
+        entries = [entry for entry in entries if entry["name"] > cursor]
+    if limit is None:
+        return sorted(entries, key=itemgetter("name")), None
+
+    page = heapq.nsmallest(limit + 1, entries, key=itemgetter("name"))
+    if len(page) > limit:
+        return page[:limit], page[limit - 1]["name"]
+    return page, None
+
+
+@contextmanager
+def _invalidating_ls_cache(system: HPCCluster, *paths: str) -> Iterator[None]:
+    # Failed commands may still have modified the paths (e.g. a partial
+    # `rm -r`), so the caches are invalidated in any case. Directory usages
+    # depend on the same contents as the listings.
+    try:
+        yield
+    finally:
+        ls_cache = get_ls_cache(system)
+        du_cache = get_du_cache(system)
+        for path in paths:
+            ls_cache.invalidate(path)
+            du_cache.invalidate(path)
+
+
+def _batch_command(operation: BatchOperation, command_timeout: int) -> BaseCommand:
+    match operation.operation:
+        case BatchOperationType.stat:
+            return StatCommand(
+                operation.path,
+                operation.dereference,
+                command_timeout=command_timeout,
+            )
+        case BatchOperationType.ls:
+            return LsCommand(
+                operation.path,
+                operation.show_hidden,
+                operation.numeric_uid,
+                dereference=operation.dereference,
+                command_timeout=command_timeout,
+            )
+        case BatchOperationType.checksum:
+            return ChecksumCommand(operation.path, command_timeout=command_timeout)
+        case BatchOperationType.file:
+            return FileCommand(operation.path, command_timeout=command_timeout)
+
+
+def _error_details(error: Exception) -> dict:
+    # Errors reported within a response (e.g. per batch operation or at the
+    # end of a stream), with the status code of the same error of a request
+    if isinstance(error, HTTPException):
+        return {"status_code": error.status_code, "message": error.detail}
+    _, status_code = ApiResponseError.build_http_error_from_exception(error)
+    return {"status_code": status_code, "message": str(error)}
+
+
+def _batch_result(result: Any) -> dict:
+    if isinstance(result, Exception):
+        return {"error": _error_details(result)}
+    return {"output": result}
+
+
+async def _execute_batch_chunk(
+    ssh_client: SSHClientPool,
+    username: str,
+    access_token: str,
+    commands: List[BaseCommand],
+) -> List[Any]:
+    # Errors of the whole invocation (e.g. its connection) are the result of
+    # each of its operations, the other chunks are not affected
+    try:
+        async with ssh_client.get_client(username, access_token) as client:
+            return await client.execute_many(commands, return_exceptions=True)
+    except Exception as e:
+        return [e] * len(commands)
+
+
+class _PrefetchedStream:
+    """Chunks of a stream whose first chunk was already read.
+
+    `aclose` closes the underlying stream, releasing its SSH channel, even
+    when the chunks were never iterated.
+    """
+
+    def __init__(self, first_chunk: bytes, chunks: AsyncIterator[bytes]):
+        self.first_chunk = first_chunk
+        self.chunks = chunks
+
+    def __aiter__(self) -> "_PrefetchedStream":
+        return self
+
+    async def __anext__(self) -> bytes:
+        if self.first_chunk is not None:
+            chunk, self.first_chunk = self.first_chunk, None
+            return chunk
+        return await anext(self.chunks)
+
+    async def aclose(self) -> None:
+        self.first_chunk = None
+        await self.chunks.aclose()
+
+
+class _PrefetchedStreamingResponse(StreamingResponse):
+    # The stream is closed once the response is sent, or failed to be sent
+    # (e.g. when the client disconnected before it started)
+    async def __call__(self, scope, receive, send) -> None:
+        try:
+            await super().__call__(scope, receive, send)
+        finally:
+            await self.body_iterator.aclose()
+
+
+async def _prefetch_stream(chunks: AsyncIterator[bytes]) -> _PrefetchedStream:
+    # Reading the first chunk before the response starts lets errors of the
+    # remote command still be reported with an HTTP error status
+    try:
+        first_chunk = await anext(chunks)
+    except StopAsyncIteration:
+        first_chunk = b""
+    except SFTPError as e:
+        sftp_error_handling(e)
+
+    return _PrefetchedStream(first_chunk, chunks)
+
 
 @router.put(
     "/chmod",
@@ -103,11 +433,12 @@ async def put_chmod(
         mode=request_model.mode,
         command_timeout=system.ssh.timeout.command_execution,
     )
-    async with ssh_client.get_client(
-        username=username, jwt_token=access_token
-    ) as client:
-        output = await client.execute(chmod)
-        return {"output": output}
+    with _invalidating_ls_cache(system, request_model.path):
+        async with ssh_client.get_client(
+            username=username, jwt_token=access_token
+        ) as client:
+            output = await client.execute(chmod)
+    return {"output": output}
 
 
 @router.put(
@@ -138,16 +469,22 @@ async def put_chown(
         command_timeout=system.ssh.timeout.command_execution,
     )
 
-    async with ssh_client.get_client(
-        username=username, jwt_token=access_token
-    ) as client:
-        output = await client.execute(chown)
-        return {"output": output}
+    with _invalidating_ls_cache(system, request_model.path):
+        async with ssh_client.get_client(
+            username=username, jwt_token=access_token
+        ) as client:
+            output = await client.execute(chown)
+    return {"output": output}
 
 
 @router.get(
     "/ls",
-    description="List the contents of the given directory (`ls`)",
+    description=(
+        "List the contents of the given directory (`ls`). With `limit` and "
+        "`cursor` the listing is returned in pages in name order. With "
+        f"`Accept: {NDJSON_MEDIA_TYPE}` the entries are streamed one JSON "
+        "object per line as they are listed."
+    ),
     status_code=status.HTTP_200_OK,
     response_model=GetDirectoryLsResponse,
     response_description="Directory listed successfully",
@@ -179,6 +516,17 @@ async def get_ls(
             description="Show information for the file the link references.",
         ),
     ] = False,
+    limit: Annotated[
+        int | None,
+        Query(gt=0, description="Maximum number of entries to return"),
+    ] = None,
+    cursor: Annotated[
+        str | None,
+        Query(
+            description="Return the entries after this one in name order, as given by `nextCursor`"
+        ),
+    ] = None,
+    accept: Annotated[str | None, Header(include_in_schema=False)] = None,
 ) -> Any:
     username = ApiAuthHelper.get_auth().username
     access_token = ApiAuthHelper.get_access_token()
@@ -190,9 +538,194 @@ async def get_ls(
         dereference,
         command_timeout=system.ssh.timeout.command_execution,
     )
-    async with ssh_client.get_client(username, access_token) as client:
-        output = await client.execute(ls)
+
+    if accept is not None and NDJSON_MEDIA_TYPE in accept:
+        if cursor is not None:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="The cursor parameter is not supported by streamed listings",
+            )
+        content = await _prefetch_stream(
+            _entries_stream(
+                ssh_client,
+                username,
+                access_token,
+                ls,
+                limit,
+                system.ssh.timeout.command_execution,
+            )
+        )
+        return _PrefetchedStreamingResponse(content, media_type=NDJSON_MEDIA_TYPE)
+
+    ls_cache = get_ls_cache(system)
+    ls_flags = (show_hidden, numeric_uid, recursive, dereference)
+    output = ls_cache.get(username, path, ls_flags)
+    if output is None:
+        async with ssh_client.get_client(username, access_token) as client:
+            output = await client.execute(ls)
+        ls_cache.put(username, path, ls_flags, output)
+
+    if limit is None and cursor is None:
         return {"output": output}
+    output, next_cursor = _paginate_ls(output, limit, cursor)
+    return {"output": output, "next_cursor": next_cursor}
+
+
+@router.get(
+    "/find",
+    description=(
+        "Search the entries below the given directory matching all the given "
+        "predicates (`find`). Entry names are relative to the directory. At "
+        "most `limit` entries are returned, bounded by the system "
+        "configuration. With `Accept: application/x-ndjson` the entries are "
+        "streamed one JSON object per line as they are found."
+    ),
+    status_code=status.HTTP_200_OK,
+    response_model=GetFindResponse,
+    response_description="Search finished successfully",
+)
+async def get_find(
+    path: Annotated[str, Query(description="The directory to search in")],
+    ssh_client: Annotated[
+        SSHClientPool,
+        Path(alias="system_name", description="Target system"),
+        Depends(SSHClientDependency()),
+    ],
+    system: HPCCluster = Depends(
+        ServiceAvailabilityDependency(service_type=BackendServiceType.filesystem),
+        use_cache=False,
+    ),
+    name: Annotated[
+        str | None,
+        Query(description="Shell pattern the entry names must match (e.g. `*.out`)"),
+    ] = None,
+    file_type: Annotated[
+        FindFileType | None, Query(alias="type", description="Type of the entries")
+    ] = None,
+    min_size: Annotated[
+        int | None,
+        Query(alias="minSize", ge=0, description="Minimum size (in bytes)"),
+    ] = None,
+    max_size: Annotated[
+        int | None,
+        Query(alias="maxSize", ge=0, description="Maximum size (in bytes)"),
+    ] = None,
+    modified_after: Annotated[
+        int | None,
+        Query(
+            alias="modifiedAfter",
+            description="Only entries modified after this time (Unix timestamp)",
+        ),
+    ] = None,
+    modified_before: Annotated[
+        int | None,
+        Query(
+            alias="modifiedBefore",
+            description="Only entries modified at or before this time (Unix timestamp)",
+        ),
+    ] = None,
+    max_depth: Annotated[
+        int | None,
+        Query(
+            alias="maxDepth",
+            gt=0,
+            description="Maximum depth below the directory (`1` for its entries only)",
+        ),
+    ] = None,
+    limit: Annotated[
+        int | None,
+        Query(gt=0, description="Maximum number of entries to return"),
+    ] = None,
+    accept: Annotated[str | None, Header(include_in_schema=False)] = None,
+) -> Any:
+    username = ApiAuthHelper.get_auth().username
+    access_token = ApiAuthHelper.get_access_token()
+    max_results = system.data_operation.find_max_results
+    limit = min(limit, max_results) if limit is not None else max_results
+    find = FindCommand(
+        path,
+        name,
+        file_type.value if file_type is not None else None,
+        min_size,
+        max_size,
+        modified_after,
+        modified_before,
+        max_depth,
+        command_timeout=system.data_operation.find_timeout,
+    )
+
+    # The remote `find` is bounded by its own timeout, reads wait for it
+    # since it may run for a while before matching any entry. Once `limit`
+    # entries were received the channel is closed, stopping the search.
+    if accept is not None and NDJSON_MEDIA_TYPE in accept:
+        content = await _prefetch_stream(
+            _entries_stream(
+                ssh_client,
+                username,
+                access_token,
+                find,
+                limit,
+                system.data_operation.find_timeout,
+                timeout_reads=False,
+            )
+        )
+        return _PrefetchedStreamingResponse(content, media_type=NDJSON_MEDIA_TYPE)
+
+    output = []
+    async with ssh_client.get_client(username, access_token) as client:
+        async with aclosing(client.execute_stream(find, timeout_reads=False)) as entries:
+            async for entry in entries:
+                if len(output) == limit:
+                    return {"output": output, "truncated": True}
+                output.append(entry)
+    return {"output": output, "truncated": False}
+
+
+@router.get(
+    "/du",
+    description=(
+        "Summarize the disk usage of a directory and of its subdirectories up "
+        "to `maxDepth` levels below it (`du`). Results are cached for a short "
+        "time. For directories too large to be summarized within the command "
+        "timeout, use `POST /filesystem/{system_name}/transfer/du`."
+    ),
+    status_code=status.HTTP_200_OK,
+    response_model=GetDirectoryUsageResponse,
+    response_description="Disk usage summarized successfully",
+)
+async def get_du(
+    path: Annotated[str, Query(description="The directory to summarize")],
+    ssh_client: Annotated[
+        SSHClientPool,
+        Path(alias="system_name", description="Target system"),
+        Depends(SSHClientDependency()),
+    ],
+    system: HPCCluster = Depends(
+        ServiceAvailabilityDependency(service_type=BackendServiceType.filesystem),
+        use_cache=False,
+    ),
+    max_depth: Annotated[
+        int,
+        Query(
+            alias="maxDepth",
+            ge=0,
+            description="Levels of subdirectories to report (`0` for the total only)",
+        ),
+    ] = 1,
+) -> Any:
+    username = ApiAuthHelper.get_auth().username
+    access_token = ApiAuthHelper.get_access_token()
+
+    du_cache = get_du_cache(system)
+    output = du_cache.get(username, path, (max_depth,))
+    if output is None:
+        du = DuCommand(
+            path, max_depth, command_timeout=system.ssh.timeout.command_execution
+        )
+        async with ssh_client.get_client(username, access_token) as client:
+            output = await client.execute(du)
+        du_cache.put(username, path, (max_depth,), output)
+    return {"output": output}
 
 
 @router.get(
@@ -333,6 +866,14 @@ async def get_view(
             detail=f"`size` value must be less than {system.data_operation.max_ops_file_size} bytes",
         )
 
+    if system.ssh.sftp:
+        async with ssh_client.get_client(username, access_token) as client:
+            try:
+                data = await client.sftp_read(path, size, offset)
+            except SFTPError as e:
+                sftp_error_handling(e)
+            return {"output": data.decode("utf-8", errors="replace")}
+
     view = DdCommand(
         path,
         size,
@@ -422,6 +963,56 @@ async def get_tail(
         }
 
 
+@router.get(
+    "/tail/follow",
+    description=(
+        "Stream the data appended to a file from now on (`tail -F`) as "
+        f"Server-Sent Events (`{SSE_MEDIA_TYPE}`). Each event carries the new "
+        "data, one `data` field per line. The file is followed by name, so "
+        "rotated or recreated files keep being followed. Concurrent "
+        "subscribers to the same file share a single remote reader."
+    ),
+    status_code=status.HTTP_200_OK,
+    response_class=StreamingResponse,
+    response_description="Data appended to the file, as Server-Sent Events",
+)
+async def get_tail_follow(
+    path: Annotated[str, Query(description="File path")],
+    ssh_client: Annotated[
+        SSHClientPool,
+        Path(alias="system_name", description="Target system"),
+        Depends(SSHClientDependency()),
+    ],
+    system: HPCCluster = Depends(
+        ServiceAvailabilityDependency(service_type=BackendServiceType.filesystem),
+        use_cache=False,
+    ),
+) -> Any:
+    username = ApiAuthHelper.get_auth().username
+    access_token = ApiAuthHelper.get_access_token()
+
+    # Errors (e.g. missing file) are reported before the stream starts, the
+    # shared reader is only reused by users allowed to access the file
+    mode, _, _ = await _download_stat(ssh_client, username, access_token, system, path)
+    if stat.S_ISDIR(mode):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Path to follow is a directory.",
+        )
+
+    chunks = get_tail_followers(system).follow(
+        username,
+        path,
+        lambda: _follow_stream(ssh_client, username, access_token, path),
+        keepalive=SSE_KEEPALIVE_INTERVAL,
+    )
+    return StreamingResponse(
+        _sse_events(chunks),
+        media_type=SSE_MEDIA_TYPE,
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
 @router.get(
     "/checksum",
     description="Output the checksum of a file (using SHA-256 algotithm)",
@@ -530,9 +1121,10 @@ async def delete_rm(
     username = ApiAuthHelper.get_auth().username
     access_token = ApiAuthHelper.get_access_token()
     rm = RmCommand(path, command_timeout=system.ssh.timeout.command_execution)
-    async with ssh_client.get_client(username, access_token) as client:
-        await client.execute(rm)
-        return None
+    with _invalidating_ls_cache(system, path):
+        async with ssh_client.get_client(username, access_token) as client:
+            await client.execute(rm)
+    return None
 
 
 @router.post(
@@ -562,9 +1154,10 @@ async def post_mkdir(
         parent=request_model.parent,
         command_timeout=system.ssh.timeout.command_execution,
     )
-    async with ssh_client.get_client(username, access_token) as client:
-        output = await client.execute(mkdir)
-        return {"output": output}
+    with _invalidating_ls_cache(system, request_model.path):
+        async with ssh_client.get_client(username, access_token) as client:
+            output = await client.execute(mkdir)
+    return {"output": output}
 
 
 @router.post(
@@ -593,14 +1186,18 @@ async def post_symlink(
         request_model.link_path,
         command_timeout=system.ssh.timeout.command_execution,
     )
-    async with ssh_client.get_client(username, access_token) as client:
-        output = await client.execute(symlink)
-        return {"output": output}
+    with _invalidating_ls_cache(system, request_model.link_path):
+        async with ssh_client.get_client(username, access_token) as client:
+            output = await client.execute(symlink)
+    return {"output": output}
 
 
 @router.get(
     "/download",
-    description="Download a small file",
+    description=(
+        "Download a small file, streamed in chunks. A single byte range can "
+        "be requested with the `Range` and `If-Range` headers."
+    ),
     status_code=status.HTTP_200_OK,
     response_model=None,
     response_description="File downloaded successfully",
@@ -616,22 +1213,73 @@ async def get_download(
         ServiceAvailabilityDependency(service_type=BackendServiceType.filesystem),
         use_cache=False,
     ),
+    range_header: Annotated[
+        str | None,
+        Header(
+            alias="Range",
+            description="Single byte range to download, e.g. `bytes=0-1023`",
+        ),
+    ] = None,
+    if_range: Annotated[
+        str | None,
+        Header(
+            alias="If-Range",
+            description="Only download the range if the `ETag` or `Last-Modified` value still matches",
+        ),
+    ] = None,
 ) -> Any:
     username = ApiAuthHelper.get_auth().username
     access_token = ApiAuthHelper.get_access_token()
-    base64 = Base64Command(path, command_timeout=system.ssh.timeout.command_execution)
 
-    async with ssh_client.get_client(username, access_token) as client:
-        output = await client.execute(base64)
-        file_content = b64decode(output)
+    # The size is checked before any data is transferred
+    mode, size, mtime = await _download_stat(
+        ssh_client, username, access_token, system, path
+    )
+    if stat.S_ISDIR(mode):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Path to download is a directory.",
+        )
+    if size > system.data_operation.max_ops_file_size:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail="File to download is too large.",
+        )
 
-        if len(file_content) > system.data_operation.max_ops_file_size:
-            raise HTTPException(
-                status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
-                detail="File to download is too large.",
-            )
+    etag = f'"{size:x}-{mtime:x}"'
+    last_modified = formatdate(mtime, usegmt=True)
+    headers = {
+        "Accept-Ranges": "bytes",
+        "ETag": etag,
+        "Last-Modified": last_modified,
+    }
+
+    byte_range = None
+    # A range is only served if the file did not change since If-Range
+    if range_header is not None and if_range in (None, etag, last_modified):
+        byte_range = _parse_range(range_header, size)
 
-        return Response(content=file_content, media_type="application/octet-stream")
+    if byte_range is None:
+        offset, length = 0, size
+        status_code = status.HTTP_200_OK
+    else:
+        offset, length = byte_range[0], byte_range[1] - byte_range[0] + 1
+        status_code = status.HTTP_206_PARTIAL_CONTENT
+        headers["Content-Range"] = f"bytes {byte_range[0]}-{byte_range[1]}/{size}"
+    headers["Content-Length"] = str(length)
+
+    # At most the size reported by stat is sent, even if the file grows
+    content = await _prefetch_stream(
+        _download_stream(
+            ssh_client, username, access_token, system, path, offset, length
+        )
+    )
+    return _PrefetchedStreamingResponse(
+        content,
+        status_code=status_code,
+        headers=headers,
+        media_type="application/octet-stream",
+    )
 
 
 @router.post(
@@ -658,30 +1306,51 @@ async def post_upload(
 ) -> Any:
     username = ApiAuthHelper.get_auth().username
     access_token = ApiAuthHelper.get_access_token()
-    base64 = Base64Command(
-        path=f"{path}/{file.filename}",
-        decode=True,
-        command_timeout=system.ssh.timeout.command_execution,
-    )
-
-    raw_content = file.file.read()
 
-    if len(raw_content) > system.data_operation.max_ops_file_size:
+    max_size = system.data_operation.max_ops_file_size
+    # The request body has already been spooled by the multipart parser, so
+    # its size is known before anything is sent
+    size = file.size
+    if size is None:
+        size = file.file.seek(0, os.SEEK_END)
+        file.file.seek(0)
+    if size > max_size:
         raise HTTPException(
             status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
             detail="File to upload is too large.",
         )
 
+    async def chunks():
+        # Only one chunk is held in memory, the size limit is also enforced
+        # while reading in case the spooled file grows
+        uploaded = 0
+        while chunk := await file.read(TRANSFER_CHUNK_SIZE):
+            uploaded += len(chunk)
+            if uploaded > max_size:
+                raise HTTPException(
+                    status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                    detail="File to upload is too large.",
+                )
+            yield chunk
+
     # Note about overwrite
-    # Providing a setting to control the overwrite behavior is non trivial.
-    # To be reliable this setting should be implemented via an atomic operation (no multiple commands)
-    # This could be accived by changing the default bash behavior with "set -o noclobber;"
-    # The idea is to append "set -o noclobber;" to the bas64 command and relax the ssh wrapper to allow it.
+    # Existing files are overwritten: the data is written to a temporary file
+    # renamed over the target once complete, so an interrupted upload never
+    # replaces the file.
 
-    content = b64encode(raw_content).decode("utf-8")
-    async with ssh_client.get_client(username, access_token) as client:
-        await client.execute(base64, content)
-        return None
+    target_path = f"{path}/{file.filename}"
+    with _invalidating_ls_cache(system, target_path):
+        async with ssh_client.get_client(username, access_token) as client:
+            if system.ssh.sftp:
+                try:
+                    await client.sftp_write(target_path, chunks())
+                except SFTPError as e:
+                    sftp_error_handling(e)
+            else:
+                await client.execute_stdin_stream(
+                    WriteFileCommand(target_path, size), chunks()
+                )
+    return None
 
 
 @router.post(
@@ -715,9 +1384,10 @@ async def post_compress(
         command_timeout=system.ssh.timeout.command_execution,
     )
 
-    async with ssh_client.get_client(username, access_token) as client:
-        await client.execute(tar)
-        return None
+    with _invalidating_ls_cache(system, request_model.target_path):
+        async with ssh_client.get_client(username, access_token) as client:
+            await client.execute(tar)
+    return None
 
 
 @router.post(
@@ -749,6 +1419,75 @@ async def post_extract(
         command_timeout=system.ssh.timeout.command_execution,
     )
 
-    async with ssh_client.get_client(username, access_token) as client:
-        await client.execute(tar)
-        return None
+    with _invalidating_ls_cache(system, request_model.target_path):
+        async with ssh_client.get_client(username, access_token) as client:
+            await client.execute(tar)
+    return None
+
+
+@router.post(
+    "/batch",
+    description=(
+        "Run `stat`, `ls`, `checksum` and `file` operations on multiple paths "
+        "in a few remote invocations. Each operation returns either its "
+        "output or its error, in the order of the request."
+    ),
+    status_code=status.HTTP_200_OK,
+    response_model=PostBatchResponse,
+    response_description="Operations executed",
+)
+async def post_batch(
+    request_model: PostBatchRequest,
+    ssh_client: Annotated[
+        SSHClientPool,
+        Path(alias="system_name", description="Target system"),
+        Depends(SSHClientDependency()),
+    ],
+    system: HPCCluster = Depends(
+        ServiceAvailabilityDependency(service_type=BackendServiceType.ssh),
+        use_cache=False,
+    ),
+) -> Any:
+    username = ApiAuthHelper.get_auth().username
+    access_token = ApiAuthHelper.get_access_token()
+    file_system_availability = ServiceAvailabilityDependency(
+        service_type=BackendServiceType.filesystem
+    )
+
+    results: List[Any] = [None] * len(request_model.operations)
+    commands = {}
+    for index, operation in enumerate(request_model.operations):
+        try:
+            # Paths are validated per operation, as for the single path endpoints
+            if system.probing.services:
+                file_system_availability.check_file_system_path(system, operation.path)
+            commands[index] = _batch_command(
+                operation, system.ssh.timeout.command_execution
+            )
+        except HTTPException as e:
+            results[index] = e
+
+    # Operations run in chunks of concurrent remote invocations, so that the
+    # slow operations of a large batch only delay their own chunk
+    chunk_size = system.data_operation.batch_chunk_size
+    indexes = list(commands.keys())
+    chunks = [
+        indexes[start : start + chunk_size]
+        for start in range(0, len(indexes), chunk_size)
+    ]
+    outputs = await asyncio.gather(
+        *(
+            _execute_batch_chunk(
+                ssh_client,
+                username,
+                access_token,
+                [commands[index] for index in chunk],
+            )
+            for chunk in chunks
+        )
+    )
+    for chunk, chunk_outputs in zip(chunks, outputs, strict=True):
+        for index, output in zip(chunk, chunk_outputs, strict=True):
+            results[index] = output
+
+    return {"output": [_batch_result(result) for result in results]}
@@ -0,0 +1,198 @@
+# Copyright (c) 2025, ETH Zurich. All rights reserved.
+#
+# Please, refer to the LICENSE file in the root directory.
+# SPDX-License-Identifier: BSD-3-Clause
+
+import asyncio
+import os
+from contextlib import aclosing
+from typing import AsyncIterator, Callable, Dict, Optional, Set, Tuple
+
+# configs
+from firecrest.config import HPCCluster
+
+
+class SubscriberLagging(Exception):
+    pass
+
+
+class TailFollower:
+
+    def __init__(self):
+        self.subscribers: Set[asyncio.Queue] = set()
+        self.task: asyncio.Task = None
+        self.idle_handle: asyncio.TimerHandle = None
+
+
+class TailFollowers:
+    """Shares a single remote reader per user and file among its subscribers.
+
+    The reader (e.g. a remote `tail -F`) is started by the first subscriber
+    and its chunks are pushed to the queue of every subscriber. A subscriber
+    with more than `max_queued` pending chunks is disconnected with
+    `SubscriberLagging`, so that a slow client neither holds back the others
+    nor buffers without bounds. Once the last subscriber left, the reader is
+    kept for `idle_timeout` seconds for clients reconnecting, then stopped.
+    Subscriptions end after `max_duration` seconds, so that idle clients
+    kept connected by keep-alives don't hold the reader (and its SSH
+    channel) forever.
+    """
+
+    def __init__(
+        self, idle_timeout: int = 60, max_queued: int = 64, max_duration: int = 3600
+    ):
+        self.idle_timeout = idle_timeout
+        self.max_queued = max_queued
+        self.max_duration = max_duration
+        self.followers: Dict[Tuple[str, str], TailFollower] = {}
+        self.readers_started = 0
+        self.subscriptions = 0
+        self.lagging = 0
+
+    async def follow(
+        self,
+        username: str,
+        path: str,
+        open_reader: Callable[[], AsyncIterator[bytes]],
+        keepalive: Optional[float] = None,
+    ) -> AsyncIterator[bytes]:
+        """Yield the chunks read from `path` from now on.
+
+        `open_reader` is only called when no reader of the file is running
+        for the user. Without data for `keepalive` seconds an empty chunk is
+        yielded. Errors of the reader are raised to all its subscribers.
+        Chunks stop once the subscription lasted `max_duration` seconds.
+        """
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.max_duration
+        key = (username, os.path.normpath(path))
+        follower = self.followers.get(key)
+        if follower is None:
+            follower = TailFollower()
+            follower.task = asyncio.create_task(
+                self._read(key, follower, open_reader())
+            )
+            self.followers[key] = follower
+            self.readers_started += 1
+
+        if follower.idle_handle is not None:
+            follower.idle_handle.cancel()
+            follower.idle_handle = None
+        # One more slot than `max_queued` for the end of the stream
+        queue = asyncio.Queue(self.max_queued + 1)
+        follower.subscribers.add(queue)
+        self.subscriptions += 1
+        try:
+            while True:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                if keepalive is not None:
+                    remaining = min(keepalive, remaining)
+                try:
+                    async with asyncio.timeout(remaining):
+                        chunk = await queue.get()
+                except TimeoutError:
+                    if loop.time() < deadline:
+                        yield b""
+                    continue
+                if chunk is None:
+                    break
+                if isinstance(chunk, Exception):
+                    raise chunk
+                yield chunk
+        finally:
+            self._unsubscribe(key, follower, queue)
+
+    async def _read(
+        self,
+        key: Tuple[str, str],
+        follower: TailFollower,
+        reader: AsyncIterator[bytes],
+    ) -> None:
+        end = None
+        try:
+            async with aclosing(reader):
+                async for chunk in reader:
+                    self._publish(follower, chunk)
+        except Exception as e:
+            end = e
+        finally:
+            if self.followers.get(key) is follower:
+                del self.followers[key]
+            for queue in follower.subscribers:
+                queue.put_nowait(end)
+
+    def _publish(self, follower: TailFollower, chunk: bytes) -> None:
+        for queue in list(follower.subscribers):
+            if queue.qsize() < self.max_queued:
+                queue.put_nowait(chunk)
+                continue
+            follower.subscribers.discard(queue)
+            while not queue.empty():
+                queue.get_nowait()
+            queue.put_nowait(
+                SubscriberLagging("Subscriber too slow, data appended was dropped.")
+            )
+            self.lagging += 1
+
+    def _unsubscribe(
+        self, key: Tuple[str, str], follower: TailFollower, queue: asyncio.Queue
+    ) -> None:
+        follower.subscribers.discard(queue)
+        if follower.subscribers or follower.task.done():
+            return
+        follower.idle_handle = asyncio.get_running_loop().call_later(
+            self.idle_timeout, self._stop, key, follower
+        )
+
+    def _stop(self, key: Tuple[str, str], follower: TailFollower) -> None:
+        if self.followers.get(key) is follower:
+            del self.followers[key]
+        follower.task.cancel()
+
+    async def close(self) -> None:
+        followers = list(self.followers.items())
+        for key, follower in followers:
+            if follower.idle_handle is not None:
+                follower.idle_handle.cancel()
+            self._stop(key, follower)
+        await asyncio.gather(
+            *(follower.task for _, follower in followers), return_exceptions=True
+        )
+
+    def get_stats(self) -> dict:
+        return {
+            "readers": len(self.followers),
+            "subscribers": sum(
+                len(follower.subscribers) for follower in self.followers.values()
+            ),
+            "readers_started": self.readers_started,
+            "subscriptions": self.subscriptions,
+            "lagging": self.lagging,
+        }
+
+
+# File followers per system name, created on first use
+tail_followers: Dict[str, TailFollowers] = {}
+
+
+def get_tail_followers(system: HPCCluster) -> TailFollowers:
+    if system.name not in tail_followers:
+        tail_followers[system.name] = TailFollowers(
+            idle_timeout=system.data_operation.tail_follow_idle_timeout,
+            max_duration=system.data_operation.tail_follow_max_duration,
+        )
+    return tail_followers[system.name]
+
+
+def get_tail_followers_stats() -> dict:
+    return {
+        system_name: followers.get_stats()
+        for system_name, followers in tail_followers.items()
+    }
+
+
+async def close_tail_followers() -> None:
+    for followers in tail_followers.values():
+        await followers.close()
@@ -228,3 +228,29 @@ class ExtractRequest(FilesystemRequestBase):
 
 class ExtractResponse(CamelModel):
     transfer_job: TransferJob
+
+
+class DuRequest(FilesystemRequestBase):
+    account: Optional[str] = Field(
+        default=None, description="Name of the account in the scheduler", nullable=True
+    )
+    max_depth: int = Field(
+        default=1,
+        description="Levels of subdirectories to report (`0` for the total only)",
+        ge=0,
+    )
+    model_config = {
+        "json_schema_extra": {
+            "examples": [
+                {
+                    "sourcePath": "/home/user/dir",
+                    "account": "group",
+                    "maxDepth": 1,
+                }
+            ]
+        }
+    }
+
+
+class DuResponse(CamelModel):
+    transfer_job: TransferJob
@@ -49,6 +49,8 @@ from firecrest.filesystem.transfer.models import (
     TransferJobLogs,
     CompressRequest,
     CompressResponse,
+    DuRequest,
+    DuResponse,
     ExtractRequest,
     ExtractResponse,
 )
@@ -385,6 +387,68 @@ async def delete_rm(
     }
 
 
+@router.post(
+    "/du",
+    description=(
+        "Create disk usage summary operation of a directory (`du`), for "
+        "directories too large for `GET /filesystem/{system_name}/ops/du`. The "
+        "disk usage (in bytes) and path of the directory and of its "
+        "subdirectories are written to the output log, one per line."
+    ),
+    status_code=status.HTTP_201_CREATED,
+    response_model=DuResponse,
+    response_description="Disk usage summary operation created successfully",
+)
+async def post_du(
+    request: DuRequest,
+    system_name: Annotated[str, Path(description="System where the jobs are running")],
+    scheduler_client: SlurmRestClient = Depends(SchedulerClientDependency()),
+    system: HPCCluster = Depends(
+        ServiceAvailabilityDependency(service_type=BackendServiceType.filesystem),
+        use_cache=False,
+    ),
+) -> Any:
+    username = ApiAuthHelper.get_auth().username
+    access_token = ApiAuthHelper.get_access_token()
+    job_id = None
+
+    work_dir = next(
+        iter([fs.path for fs in system.file_systems if fs.default_work_dir]), None
+    )
+    if not work_dir:
+        raise ValueError(
+            f"The system {system_name} has no filesystem defined as default_work_dir"
+        )
+
+    parameters = {
+        "sbatch_directives": _format_directives(
+            system.data_operation.datatransfer_jobs_directives, request.account
+        ),
+        "path": request.path,
+        "max_depth": request.max_depth,
+    }
+    job_script = _build_script("job_du.sh", parameters)
+    job = JobHelper(f"{work_dir}/{username}", job_script, "DiskUsage")
+
+    job_id = await scheduler_client.submit_job(
+        job_description=JobDescriptionModel(**job.job_param),
+        username=username,
+        jwt_token=access_token,
+    )
+
+    return {
+        "transferJob": TransferJob(
+            job_id=job_id,
+            system=system_name,
+            working_directory=job.working_dir,
+            logs=TransferJobLogs(
+                output_log=job.job_param["standard_output"],
+                error_log=job.job_param["standard_error"],
+            ),
+        ),
+    }
+
+
 @router.post(
     "/compress",
     description="Create compress file or directory operation (`tar`)",
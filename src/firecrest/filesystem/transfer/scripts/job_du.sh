@@ -0,0 +1,24 @@
+#!/bin/bash
+# Copyright (c) 2025, ETH Zurich. All rights reserved.
+#
+# Please, refer to the LICENSE file in the root directory.
+# SPDX-License-Identifier: BSD-3-Clause
+
+
+{{ sbatch_directives }}
+
+echo $(date -u) "Disk Usage Job (id:${SLURM_JOB_ID:-${PBS_JOBID:-unknown}})"
+
+# Disk usage (in bytes) and path of the directory and its subdirectories,
+# one per line
+du --block-size=1 --max-depth={{ max_depth }} -- '{{ path }}'
+status=$?
+
+if [[ "$status" == '0' ]]
+then
+    echo $(date -u) "Disk usage was successfully summarized."
+    exit 0
+else
+    echo $(date -u) "Unable to summarize disk usage exit code:${status}" >&2
+    exit $status
+fi
@@ -10,9 +10,8 @@ from firecrest.plugins import settings
 
 
 import logging
-import types
 from contextlib import asynccontextmanager
-from fastapi import FastAPI, Request
+from fastapi import FastAPI
 from fastapi.exceptions import RequestValidationError
 
 from starlette.exceptions import HTTPException as StarletteHTTPException
@@ -23,22 +22,18 @@ from lib.exceptions import (
 from lib.ssh_clients.ssh_client import SSHClientError
 from firecrest.status.health_check.health_checker_cluster import ClusterHealthChecker
 from starlette_context import plugins
-from starlette_context.middleware import RawContextMiddleware
 
 # configs
 from firecrest import config
 from firecrest.plugins import settings as plugin_settings
 
-# request vars
-from lib import request_vars
+# middlewares
+from lib.middleware import RequestMiddleware
 
 # helpers
-from lib.handlers.api_response_handler import (
-    response_error_handler,
-    meta_headers_handler,
-)
+from lib.handlers.api_response_handler import response_error_handler
 from lib.ssh_clients.ssh_keygen_credentials_provider import SSHKeygenCredentialsProvider
-from firecrest.dependencies import SSHClientDependency
+from firecrest.dependencies import APIAuthDependency, SSHClientDependency
 
 # routers
 from firecrest.status.router import (
@@ -59,8 +54,19 @@ from apscheduler.eventbrokers.local import LocalEventBroker
 from starlette_context import context
 from starlette_context.header_keys import HeaderKeys
 
-# FirecREST tracing JSON logger
-from lib.loggers.tracing_log import Log_operation, tracing_log_middleware
+# FirecREST metrics JSON logger
+from lib.loggers.metrics_log import log_metrics, register_metrics_source
+from lib.loggers.loop_lag_monitor import loop_lag_monitor
+from firecrest.filesystem.ops.ls_cache import get_du_cache_stats, get_ls_cache_stats
+from lib.auth.authN.jwks_store import (
+    get_jwks_stores_stats,
+    start_jwks_stores,
+    stop_jwks_stores,
+)
+from firecrest.filesystem.ops.tail_followers import (
+    close_tail_followers,
+    get_tail_followers_stats,
+)
 
 # Uvicorn logger
 logger = logging.getLogger(__name__)
@@ -104,10 +110,6 @@ def create_app(settings: config.Settings) -> FastAPI:
     # Register exception handlers
     register_exception_handlers(app=app)
 
-    app.add_middleware(
-        RawContextMiddleware,
-        plugins=(plugins.RequestIdPlugin(), plugins.CorrelationIdPlugin()),
-    )
     return app
 
 
@@ -122,14 +124,22 @@ async def lifespan(app: FastAPI):
     # Init Slurm REST Client
     await SlurmRestClient.get_aiohttp_client()
     await SSHKeygenCredentialsProvider.get_aiohttp_client()
+    # Fetch the public keys in the background, requests with a token signed
+    # by a key not fetched yet wait for it
+    start_jwks_stores()
     async with app.state.scheduler as scheduler:
         await schedule_tasks(scheduler)
         await scheduler.start_in_background()
         yield
         await scheduler.stop()
+    # Stop the remote readers of followed files
+    await close_tail_followers()
+    await stop_jwks_stores()
     # Clean up Slurm REST Client
     await SlurmRestClient.close_aiohttp_client()
     await SSHKeygenCredentialsProvider.close_aiohttp_client()
+    # Clean up the authorization service session
+    await APIAuthDependency.close_aiohttp_clients()
 
 
 async def schedule_tasks(scheduler: AsyncScheduler):
@@ -144,70 +154,38 @@ async def schedule_tasks(scheduler: AsyncScheduler):
         IntervalTrigger(seconds=5),
         id="prune-connection-pool",
     )
+    if plugin_settings.logger.enable_metrics_log:
+        register_metrics_source("ssh_client_pools", SSHClientDependency.get_pool_stats)
+        register_metrics_source(
+            "ssh_credentials_cache", SSHClientDependency.get_credentials_cache_stats
+        )
+        register_metrics_source("ls_cache", get_ls_cache_stats)
+        register_metrics_source("du_cache", get_du_cache_stats)
+        register_metrics_source("token_cache", APIAuthDependency.get_token_cache_stats)
+        register_metrics_source(
+            "decision_cache", APIAuthDependency.get_decision_cache_stats
+        )
+        register_metrics_source("jwks", get_jwks_stores_stats)
+        register_metrics_source("tail_followers", get_tail_followers_stats)
+        loop_lag_monitor.start()
+        register_metrics_source("event_loop", loop_lag_monitor.get_stats)
+        await scheduler.add_schedule(
+            log_metrics,
+            IntervalTrigger(seconds=plugin_settings.logger.metrics_log_interval),
+            id="log-metrics",
+        )
 
 
 def register_middlewares(app: FastAPI):
     logging.getLogger("uvicorn.access").addFilter(EndpointFilter())
 
-    @app.middleware("http")
-    async def init_request_vars(request: Request, call_next):
-        # A fresh namespace per request, bound in this async context, so
-        # per-request state (e.g. auth in api_auth_helper.py) never leaks
-        # across concurrent requests sharing the contextvar's default.
-        request_vars.request_global.set(types.SimpleNamespace())
-        response = await call_next(request)
-        return response
-
-    @app.middleware("http")
-    async def init_response_headers(request: Request, call_next):
-        return await meta_headers_handler(request=request, call_next=call_next)
-
-    @app.middleware("http")
-    async def log_middleware(request: Request, call_next):
-        try:
-            # Logging from Middleware request
-            if settings.logger.enable_tracing_log:
-                tracing_log_middleware(
-                    Log_operation.Request,
-                    request,
-                    None,
-                    None,
-                    settings.logger.loggable_request_headers,
-                )
-
-            response = await call_next(request)
-
-            # Logging from Middleware response
-            if settings.logger.enable_tracing_log:
-                tracing_log_middleware(
-                    Log_operation.Response,
-                    request,
-                    (
-                        request.state.username
-                        if hasattr(request.state, "username")
-                        else None
-                    ),
-                    response.status_code,
-                    settings.logger.loggable_request_headers,
-                )
-            return response
-        except Exception as e:
-            logger.error(
-                {
-                    "endpoint": request.url.path,
-                    "error": str(e),
-                }
-            )
-            raise e
-
-    @app.middleware("http")
-    async def lower_case_path(request: Request, call_next):
-
-        path = request.scope["path"].lower()
-        request.scope["path"] = path
-
-        response = await call_next(request)
-        return response
+    # Context IDs, path lowercasing, tracing log, request vars and meta headers
+    app.add_middleware(
+        RequestMiddleware,
+        plugins=(plugins.RequestIdPlugin(), plugins.CorrelationIdPlugin()),
+        enable_tracing_log=settings.logger.enable_tracing_log,
+        loggable_request_headers=settings.logger.loggable_request_headers,
+    )
 
 
 def register_routes(app: FastAPI, settings: config.Settings):
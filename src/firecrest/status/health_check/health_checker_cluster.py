@@ -45,6 +45,9 @@ class ClusterHealthChecker:
                 username_claim=settings.auth.authentication.username_claim,
                 jwk_algorithm=settings.auth.authentication.jwk_algorithm,
                 min_token_ttl=settings.auth.authentication.min_token_ttl,
+                token_cache_max_entries=settings.auth.authentication.token_cache_max_entries,
+                jwks_refresh_interval=settings.auth.authentication.jwks_refresh_interval,
+                jwks_min_refresh_interval=settings.auth.authentication.jwks_min_refresh_interval,
             )
         else:
             self.token_decoder = token_decoder
@@ -61,7 +64,7 @@ class ClusterHealthChecker:
                 url=settings.auth.authentication.token_url,
                 grant_type="client_credentials",
             )
-            auth = self.token_decoder.auth_from_token(token["access_token"])
+            auth = await self.token_decoder.authenticate(token["access_token"])
 
             checks = []
             if self.cluster.probing.services is not None:
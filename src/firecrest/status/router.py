@@ -3,9 +3,11 @@
 # Please, refer to the LICENSE file in the root directory.
 # SPDX-License-Identifier: BSD-3-Clause
 
+import asyncio
+import logging
 from datetime import datetime, timezone
 from fastapi import Depends, HTTPException, Path, Query, status
-from typing import Annotated, Any
+from typing import Annotated, Any, Set
 
 # configs
 from firecrest.config import HPCCluster, BackendServiceType
@@ -15,6 +17,7 @@ from firecrest.plugins import settings
 # helpers
 from lib.helpers.api_auth_helper import ApiAuthHelper
 from lib.helpers.router_helper import create_router
+from lib.auth.authZ.authorization_service import AuthorizationService
 
 # dependencies
 from firecrest.dependencies import (
@@ -54,6 +57,38 @@ router_liveness = create_router(
 )
 
 
+# Authorization warm-ups in progress, referenced until they are done
+authorization_warmups: Set[asyncio.Task] = set()
+
+
+def _warm_up_authorizations(
+    authZ: AuthorizationService, username: str, access_token: str
+) -> None:
+    # The user is authorized on all the systems at once in the background, so
+    # that the decisions are cached for the requests that follow on each
+    # system without delaying (or failing) the listing
+    task = asyncio.create_task(
+        authZ.authorize_many(
+            username, [cluster.name for cluster in settings.clusters], access_token
+        )
+    )
+    authorization_warmups.add(task)
+    task.add_done_callback(_log_warm_up_error)
+
+
+def _log_warm_up_error(task: asyncio.Task) -> None:
+    authorization_warmups.discard(task)
+    if task.cancelled() or task.exception() is None:
+        return
+    logging.getLogger("uvicorn.error").warning(
+        {
+            "message": "Systems authorization warm-up failed",
+            "error.type": task.exception().__class__.__name__,
+            "error.message": str(task.exception()),
+        }
+    )
+
+
 @router.get(
     "/systems",
     description="Get the list of systems and health status",
@@ -62,6 +97,12 @@ router_liveness = create_router(
     response_description="System list returned successfully",
 )
 async def get_systems() -> Any:
+    authZ = APIAuthDependency.globalAuthZ
+    # Listing systems doesn't require authorization
+    if authZ is not None:
+        _warm_up_authorizations(
+            authZ, ApiAuthHelper.get_auth().username, ApiAuthHelper.get_access_token()
+        )
     return {"systems": settings.clusters}
 
 
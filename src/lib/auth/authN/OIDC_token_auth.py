@@ -5,15 +5,14 @@
 
 from time import time
 from typing import List
-from jose import jwt, ExpiredSignatureError, JWTError, jwk
+from jose import jwt, ExpiredSignatureError, JWTError
 from fastapi import HTTPException, status
-import requests
-from requests.adapters import HTTPAdapter, Retry
-from requests_file import FileAdapter
 
 
 # models
 from lib.auth.authN.authentication_service import AuthenticationService
+from lib.auth.authN.jwks_store import get_jwks_store
+from lib.auth.authN.token_cache import VerifiedTokenCache
 from lib.models import ApiAuthModel
 
 
@@ -21,60 +20,44 @@ class OIDCTokenAuth(AuthenticationService):
 
     public_keys = {}
 
-    def __init__(self, public_certs: List[str] = None, username_claim: str = None, jwk_algorithm: str = None, min_token_ttl: int = 30):
+    def __init__(self, public_certs: List[str] = None, username_claim: str = None, jwk_algorithm: str = None, min_token_ttl: int = 30, token_cache_max_entries: int = 10000, jwks_refresh_interval: int = 3600, jwks_min_refresh_interval: int = 60):
 
         self.username_claim = username_claim
         self.jwk_algorithm = jwk_algorithm
         self.min_token_ttl = min_token_ttl
-
-        keys = []
-        s = requests.Session()
-        retries = Retry(total=6, backoff_factor=0.22)
-        s.mount("http://", HTTPAdapter(max_retries=retries))
-        s.mount("https://", HTTPAdapter(max_retries=retries))
-        s.mount("file://", FileAdapter())
-
-        for url in public_certs:
-            try:
-                cert = s.get(url, timeout=2)
-                keys += cert.json()["keys"]
-            except Exception as e:
-                print(f"Unable to fetch public keys from {url}: {e}")
-
-        for key in keys:
-            identifier = key.get("kid", None) or key.get("x5t", None)
-            algorithm = key.get("alg", None)
-            algo_map = {
-                "RSA":"RS256",
-                "oct":"HS256",
-                "EC": {"None":"ES256", "P-256":"ES256", "P-384":"ES384", "P-521":"ES512", "secp256k1":"ES256K"},
-                "OKP":{"Ed25519":"EdDSA"}
-            }
-
-            if not algorithm:
-                if self.jwk_algorithm:
-                    algorithm = self.jwk_algorithm
-                else:
-                    kty = key.get("kty", "None")
-                    crv = key.get("crv", "None")
-
-                    try:
-                        if isinstance(algo_map[kty], str):
-                            algorithm = algo_map[kty]
-                        else:
-                            algorithm = algo_map[kty][crv]
-                    except KeyError as e:
-                        raise ValueError(
-                            "Unsupported kty or crv values. Configure jwk_algorithm to skip auto-detection."
-                        ) from e
-
-            if identifier:
-                self.public_keys[identifier] = jwk.construct(key, algorithm=algorithm)
+        self.token_cache = VerifiedTokenCache(max_entries=token_cache_max_entries)
+
+        # Keys are fetched in the background by the store shared by all the
+        # decoders of the process (see `JWKSStore`), not at construction time
+        self.jwks_store = get_jwks_store(
+            public_certs or [],
+            jwk_algorithm,
+            refresh_interval=jwks_refresh_interval,
+            min_refresh_interval=jwks_min_refresh_interval,
+        )
+        self.jwks_store.add_listener(self.update_public_keys)
+
+    def update_public_keys(self, public_keys: dict):
+        # Tokens verified with a key that was removed or replaced are revoked
+        rotated = [
+            identifier
+            for identifier, key in self.public_keys.items()
+            if public_keys.get(identifier) is not key
+        ]
+        self.public_keys = public_keys
+        self.token_cache.revoke(rotated)
 
     def auth_from_token(self, access_token: str):
+        # Tokens already verified skip the signature verification
+        auth = self.token_cache.get(access_token)
+        if auth is not None:
+            return auth
+
         token_header = jwt.get_unverified_header(access_token)
         identifier = token_header.get("kid", None) or token_header.get("x5t", None)
         # Note: if kid not found throws KeyError catched by authenticate method
+        if identifier not in self.public_keys:
+            raise KeyError(identifier)
         public_key = self.public_keys[identifier]
 
         options = {"verify_signature": True, "verify_aud": False, "verify_exp": True}
@@ -88,13 +71,22 @@ class OIDCTokenAuth(AuthenticationService):
                 headers={"auth-token": access_token},
             )
 
-        return ApiAuthModel.build_from_oidc_decoded_token(
+        auth = ApiAuthModel.build_from_oidc_decoded_token(
             decoded_token=decoded_token, username_claim=self.username_claim
         )
+        if exp is not None:
+            self.token_cache.put(access_token, auth, identifier, exp - self.min_token_ttl)
+        return auth
 
     async def authenticate(self, access_token: str):
         try:
-            auth = self.auth_from_token(access_token)
+            try:
+                auth = self.auth_from_token(access_token)
+            except KeyError as exc:
+                # The key may have been rotated since the last refresh
+                if not await self.jwks_store.refresh_unknown_key(exc.args[0]):
+                    raise
+                auth = self.auth_from_token(access_token)
             if not auth.is_active():
                 raise HTTPException(
                     status_code=status.HTTP_401_UNAUTHORIZED,
@@ -0,0 +1,293 @@
+# Copyright (c) 2025, ETH Zurich. All rights reserved.
+#
+# Please, refer to the LICENSE file in the root directory.
+# SPDX-License-Identifier: BSD-3-Clause
+
+import asyncio
+import json
+import logging
+import re
+from email.utils import parsedate_to_datetime
+from time import time
+from typing import Callable, Dict, List, Optional, Tuple
+from urllib.parse import urlparse
+from urllib.request import url2pathname
+
+import aiohttp
+from jose import jwk
+from jose.backends.base import Key
+
+
+MAX_AGE_PATTERN = re.compile(r"max-age=(\d+)")
+
+ALGORITHMS = {
+    "RSA": "RS256",
+    "oct": "HS256",
+    "EC": {
+        "None": "ES256",
+        "P-256": "ES256",
+        "P-384": "ES384",
+        "P-521": "ES512",
+        "secp256k1": "ES256K",
+    },
+    "OKP": {"Ed25519": "EdDSA"},
+}
+
+
+def _key_algorithm(key: dict, jwk_algorithm: Optional[str]) -> str:
+    algorithm = key.get("alg", None)
+    if algorithm:
+        return algorithm
+    if jwk_algorithm:
+        return jwk_algorithm
+
+    kty = key.get("kty", "None")
+    crv = key.get("crv", "None")
+    try:
+        if isinstance(ALGORITHMS[kty], str):
+            return ALGORITHMS[kty]
+        return ALGORITHMS[kty][crv]
+    except KeyError as e:
+        raise ValueError(
+            "Unsupported kty or crv values. Configure jwk_algorithm to skip auto-detection."
+        ) from e
+
+
+def _max_age(headers) -> Optional[int]:
+    # Lifetime of a JWKS response according to its cache headers
+    cache_control = headers.get("Cache-Control", "")
+    if "no-cache" in cache_control or "no-store" in cache_control:
+        return 0
+    match = MAX_AGE_PATTERN.search(cache_control)
+    if match:
+        return int(match.group(1))
+    if "Expires" in headers:
+        try:
+            expires = parsedate_to_datetime(headers["Expires"]).timestamp()
+        except (TypeError, ValueError):
+            return 0
+        return max(0, int(expires - time()))
+    return None
+
+
+class JWKSStore:
+    """Public keys of the JWKS endpoints of the accepted identity providers.
+
+    The keys are fetched asynchronously, in the background once `start` was
+    called, and refreshed every `refresh_interval` seconds or when the cache
+    headers of the responses say so, but at most every
+    `min_refresh_interval` seconds. A token signed with an unknown key
+    triggers a refresh (see `refresh_unknown_key`), rate-limited the same
+    way, so that rotated keys are picked up without waiting. The `jwk` key
+    objects are constructed once and shared by all the listeners, which are
+    called with the new keys whenever they change. When an endpoint can't be
+    reached its previous keys are kept.
+    """
+
+    aiohttp_client: Optional[aiohttp.ClientSession] = None
+
+    @classmethod
+    async def get_aiohttp_client(cls) -> aiohttp.ClientSession:
+        if cls.aiohttp_client is None:
+            cls.aiohttp_client = aiohttp.ClientSession()
+        return cls.aiohttp_client
+
+    @classmethod
+    async def close_aiohttp_client(cls) -> None:
+        if cls.aiohttp_client:
+            await cls.aiohttp_client.close()
+            cls.aiohttp_client = None
+
+    def __init__(
+        self,
+        public_certs: List[str],
+        jwk_algorithm: Optional[str] = None,
+        refresh_interval: int = 3600,
+        min_refresh_interval: int = 60,
+        timeout: int = 2,
+        retries: int = 3,
+    ):
+        self.public_certs = public_certs
+        self.jwk_algorithm = jwk_algorithm
+        self.refresh_interval = refresh_interval
+        self.min_refresh_interval = min_refresh_interval
+        self.timeout = timeout
+        self.retries = retries
+        self.keys: Dict[str, Key] = {}
+        # JWKS endpoint -> key identifier -> (JWK, key)
+        self.endpoint_keys: Dict[str, Dict[str, Tuple[dict, Key]]] = {}
+        self.listeners: List[Callable[[Dict[str, Key]], None]] = []
+        self.last_refresh = 0.0
+        self.next_refresh_delay = 0
+        self.refreshing: asyncio.Task = None
+        self.task: asyncio.Task = None
+        self.refreshes = 0
+        self.unknown_key_refreshes = 0
+        self.failures = 0
+
+    def add_listener(self, listener: Callable[[Dict[str, Key]], None]) -> None:
+        self.listeners.append(listener)
+        listener(self.keys)
+
+    async def _fetch(self, url: str) -> Tuple[List[dict], Optional[int]]:
+        if url.startswith("file:"):
+            path = url2pathname(urlparse(url).path)
+            content = await asyncio.to_thread(_read_file, path)
+            return json.loads(content)["keys"], None
+
+        client = await self.get_aiohttp_client()
+        for attempt in range(self.retries):
+            try:
+                async with client.get(
+                    url, timeout=aiohttp.ClientTimeout(total=self.timeout)
+                ) as response:
+                    response.raise_for_status()
+                    content = await response.json(content_type=None)
+                    return content["keys"], _max_age(response.headers)
+            except (aiohttp.ClientError, TimeoutError):
+                if attempt == self.retries - 1:
+                    raise
+                await asyncio.sleep(0.25 * 2**attempt)
+
+    def _construct_keys(
+        self, previous: Dict[str, Tuple[dict, Key]], keys: List[dict]
+    ) -> Dict[str, Tuple[dict, Key]]:
+        constructed = {}
+        for key in keys:
+            identifier = key.get("kid", None) or key.get("x5t", None)
+            if not identifier:
+                continue
+            if identifier in previous and previous[identifier][0] == key:
+                # Unchanged keys are kept, so that the same objects are shared
+                constructed[identifier] = previous[identifier]
+            else:
+                algorithm = _key_algorithm(key, self.jwk_algorithm)
+                constructed[identifier] = (key, jwk.construct(key, algorithm=algorithm))
+        return constructed
+
+    async def _refresh(self) -> None:
+        results = await asyncio.gather(
+            *(self._fetch(url) for url in self.public_certs), return_exceptions=True
+        )
+        max_ages = []
+        for url, result in zip(self.public_certs, results, strict=True):
+            if isinstance(result, Exception):
+                self.failures += 1
+                logging.getLogger("uvicorn.error").warning(
+                    f"Unable to fetch public keys from {url}: {result!r}"
+                )
+                max_ages.append(self.min_refresh_interval)
+                continue
+            keys, max_age = result
+            self.endpoint_keys[url] = self._construct_keys(
+                self.endpoint_keys.get(url, {}), keys
+            )
+            if max_age is not None:
+                max_ages.append(max_age)
+
+        self.last_refresh = time()
+        self.refreshes += 1
+        self.next_refresh_delay = max(
+            self.min_refresh_interval, min([self.refresh_interval, *max_ages])
+        )
+
+        keys = {
+            identifier: key
+            for endpoint_keys in self.endpoint_keys.values()
+            for identifier, (_, key) in endpoint_keys.items()
+        }
+        if keys.keys() != self.keys.keys() or any(
+            key is not self.keys[identifier] for identifier, key in keys.items()
+        ):
+            self.keys = keys
+            for listener in self.listeners:
+                listener(keys)
+
+    async def refresh(self) -> None:
+        # Concurrent refreshes share the one in progress
+        if self.refreshing is None or self.refreshing.done():
+            self.refreshing = asyncio.create_task(self._refresh())
+        await asyncio.shield(self.refreshing)
+
+    async def refresh_unknown_key(self, identifier: str) -> bool:
+        """Refresh the keys for a token signed with an unknown key.
+
+        Returns whether the key is known after the refresh, which is skipped
+        when the keys were refreshed less than `min_refresh_interval` seconds
+        ago.
+        """
+        if identifier in self.keys:
+            return True
+        if self.refreshing is not None and not self.refreshing.done():
+            await asyncio.shield(self.refreshing)
+        elif time() - self.last_refresh >= self.min_refresh_interval:
+            self.unknown_key_refreshes += 1
+            await self.refresh()
+        return identifier in self.keys
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self.refresh()
+            except Exception as e:
+                self.failures += 1
+                self.next_refresh_delay = self.min_refresh_interval
+                logging.getLogger("uvicorn.error").warning(
+                    f"Unable to refresh public keys: {e!r}"
+                )
+            await asyncio.sleep(self.next_refresh_delay)
+
+    def start(self) -> None:
+        if self.task is None:
+            self.task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self.task is not None:
+            self.task.cancel()
+            await asyncio.gather(self.task, return_exceptions=True)
+            self.task = None
+
+    def get_stats(self) -> dict:
+        return {
+            "keys": len(self.keys),
+            "refreshes": self.refreshes,
+            "unknown_key_refreshes": self.unknown_key_refreshes,
+            "failures": self.failures,
+            "last_refresh": self.last_refresh,
+        }
+
+
+def _read_file(path: str) -> str:
+    with open(path) as file:
+        return file.read()
+
+
+# Stores per JWKS endpoints, shared by all the token decoders of the process
+jwks_stores: Dict[Tuple[Tuple[str, ...], Optional[str]], JWKSStore] = {}
+
+
+def get_jwks_store(
+    public_certs: List[str], jwk_algorithm: Optional[str] = None, **kwargs
+) -> JWKSStore:
+    key = (tuple(public_certs), jwk_algorithm)
+    if key not in jwks_stores:
+        jwks_stores[key] = JWKSStore(public_certs, jwk_algorithm, **kwargs)
+    return jwks_stores[key]
+
+
+def start_jwks_stores() -> None:
+    for store in jwks_stores.values():
+        store.start()
+
+
+async def stop_jwks_stores() -> None:
+    for store in jwks_stores.values():
+        await store.stop()
+    await JWKSStore.close_aiohttp_client()
+
+
+def get_jwks_stores_stats() -> dict:
+    return {
+        ",".join(public_certs): store.get_stats()
+        for (public_certs, _), store in jwks_stores.items()
+    }
@@ -0,0 +1,98 @@
+# Copyright (c) 2025, ETH Zurich. All rights reserved.
+#
+# Please, refer to the LICENSE file in the root directory.
+# SPDX-License-Identifier: BSD-3-Clause
+
+import hashlib
+from collections import OrderedDict
+from time import time
+from typing import Iterable, Optional
+
+# models
+from lib.models import ApiAuthModel
+
+
+class VerifiedTokenCache:
+    """Caches the authentication of verified access tokens.
+
+    Entries are keyed by the SHA-256 digest of the token, so that tokens are
+    not kept in memory, and expire at `expires` (e.g. the token `exp` minus
+    the minimum token TTL), after which the token must be verified again.
+    Entries verified with a public key are revoked when the key is rotated.
+    At most `max_entries` tokens are cached, the least recently used are
+    evicted first.
+    """
+
+    class CacheEntry:
+        def __init__(self, auth: ApiAuthModel, key_id: str, expires: float):
+            self.auth = auth
+            self.key_id = key_id
+            self.expires = expires
+
+    def __init__(self, max_entries: int = 10000):
+        self.max_entries = max_entries
+        self.entries: OrderedDict[bytes, VerifiedTokenCache.CacheEntry] = (
+            OrderedDict()
+        )
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.revocations = 0
+
+    @staticmethod
+    def _digest(access_token: str) -> bytes:
+        return hashlib.sha256(access_token.encode()).digest()
+
+    def get(self, access_token: str) -> Optional[ApiAuthModel]:
+        digest = self._digest(access_token)
+        entry = self.entries.get(digest)
+        if entry is not None and entry.expires <= time():
+            del self.entries[digest]
+            entry = None
+        if entry is None:
+            self.misses += 1
+            return None
+
+        self.entries.move_to_end(digest)
+        self.hits += 1
+        return entry.auth
+
+    def put(
+        self, access_token: str, auth: ApiAuthModel, key_id: str, expires: float
+    ) -> None:
+        if self.max_entries <= 0 or expires <= time():
+            return
+        digest = self._digest(access_token)
+        self.entries[digest] = VerifiedTokenCache.CacheEntry(auth, key_id, expires)
+        self.entries.move_to_end(digest)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+            self.evictions += 1
+
+    def revoke(self, key_ids: Iterable[str]) -> None:
+        # Drops the tokens verified with the given (rotated) public keys
+        key_ids = set(key_ids)
+        if not key_ids:
+            return
+        revoked = [
+            digest
+            for digest, entry in self.entries.items()
+            if entry.key_id in key_ids
+        ]
+        for digest in revoked:
+            del self.entries[digest]
+        self.revocations += len(revoked)
+
+    def get_stats(self) -> dict:
+        return {
+            "entries": len(self.entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": (
+                self.hits / (self.hits + self.misses)
+                if self.hits + self.misses
+                else 0.0
+            ),
+            "evictions": self.evictions,
+            "revocations": self.revocations,
+        }
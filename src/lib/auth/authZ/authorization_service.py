@@ -4,6 +4,9 @@
 # SPDX-License-Identifier: BSD-3-Clause
 
 from abc import ABC, abstractmethod
+from typing import Dict, List
+
+from fastapi import HTTPException, status
 
 
 class AuthorizationService(ABC):
@@ -11,3 +14,21 @@ class AuthorizationService(ABC):
     @abstractmethod
     async def authorize(self, resource_name: str, access_token: str):
         pass
+
+    async def authorize_many(
+        self, username: str, resource_names: List[str], access_token: str
+    ) -> Dict[str, bool]:
+        """Whether the user is authorized on each of the given resources.
+
+        Resources whose authorization couldn't be verified are omitted.
+        Services able to check several resources at once override it.
+        """
+        decisions = {}
+        for resource_name in resource_names:
+            try:
+                await self.authorize(username, resource_name, access_token)
+                decisions[resource_name] = True
+            except HTTPException as exc:
+                if exc.status_code == status.HTTP_403_FORBIDDEN:
+                    decisions[resource_name] = False
+        return decisions
@@ -0,0 +1,140 @@
+# Copyright (c) 2025, ETH Zurich. All rights reserved.
+#
+# Please, refer to the LICENSE file in the root directory.
+# SPDX-License-Identifier: BSD-3-Clause
+
+import asyncio
+from collections import OrderedDict
+from time import time
+from typing import Awaitable, Callable, Dict, Hashable, List, Optional, Tuple
+
+
+class DecisionCache:
+    """Caches the authorization decisions of an authorization service.
+
+    Decisions are keyed by e.g. `(username, resource_name)`. Allowed and
+    denied decisions expire after `allow_ttl` and `deny_ttl` seconds
+    respectively (`0` disables caching them). Concurrent checks of the same
+    key share a single request to the service, failed checks are not cached.
+    Several keys can be checked at once (see `get_or_check_many`), the keys
+    of a batch in progress are shared with the concurrent checks as well.
+    At most `max_entries` decisions are cached, the least recently used are
+    evicted first.
+    """
+
+    def __init__(
+        self, allow_ttl: int = 60, deny_ttl: int = 10, max_entries: int = 10000
+    ):
+        self.allow_ttl = allow_ttl
+        self.deny_ttl = deny_ttl
+        self.max_entries = max_entries
+        self.entries: OrderedDict[Hashable, Tuple[bool, float]] = OrderedDict()
+        self.in_flight: Dict[Hashable, asyncio.Task] = {}
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.evictions = 0
+
+    def get(self, key: Hashable) -> Optional[bool]:
+        entry = self.entries.get(key)
+        if entry is not None and entry[1] <= time():
+            del self.entries[key]
+            entry = None
+        if entry is None:
+            return None
+
+        self.entries.move_to_end(key)
+        return entry[0]
+
+    def put(self, key: Hashable, allowed: bool) -> None:
+        ttl = self.allow_ttl if allowed else self.deny_ttl
+        if self.max_entries <= 0 or ttl <= 0:
+            return
+        self.entries[key] = (allowed, time() + ttl)
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+            self.evictions += 1
+
+    def _checked(self, key: Hashable, task: asyncio.Task) -> None:
+        del self.in_flight[key]
+        if not task.cancelled() and task.exception() is None:
+            self.put(key, task.result())
+
+    async def get_or_check(
+        self, key: Hashable, check: Callable[[], Awaitable[bool]]
+    ) -> bool:
+        allowed = self.get(key)
+        if allowed is not None:
+            self.hits += 1
+            return allowed
+
+        task = self.in_flight.get(key)
+        if task is not None:
+            self.coalesced += 1
+        else:
+            self.misses += 1
+            # The check outlives cancelled callers, it's shared with the others
+            task = asyncio.ensure_future(check())
+            self.in_flight[key] = task
+            task.add_done_callback(lambda done: self._checked(key, done))
+        return await asyncio.shield(task)
+
+    @staticmethod
+    async def _batch_decision(batch: asyncio.Future, key: Hashable) -> bool:
+        return (await asyncio.shield(batch))[key]
+
+    async def get_or_check_many(
+        self,
+        keys: List[Hashable],
+        check_many: Callable[[List[Hashable]], Awaitable[Dict[Hashable, bool]]],
+    ) -> Dict[Hashable, bool]:
+        """Decisions of several keys, the missing ones checked in one batch.
+
+        Keys without a decision (e.g. whose check failed) are omitted.
+        """
+        decisions = {}
+        pending: Dict[Hashable, asyncio.Task] = {}
+        missing = []
+        for key in dict.fromkeys(keys):
+            allowed = self.get(key)
+            if allowed is not None:
+                self.hits += 1
+                decisions[key] = allowed
+            elif key in self.in_flight:
+                self.coalesced += 1
+                pending[key] = self.in_flight[key]
+            else:
+                self.misses += 1
+                missing.append(key)
+
+        if missing:
+            batch = asyncio.ensure_future(check_many(missing))
+            for key in missing:
+                task = asyncio.ensure_future(self._batch_decision(batch, key))
+                self.in_flight[key] = task
+                task.add_done_callback(lambda done, key=key: self._checked(key, done))
+                pending[key] = task
+
+        results = await asyncio.gather(
+            *(asyncio.shield(task) for task in pending.values()),
+            return_exceptions=True,
+        )
+        for key, result in zip(pending, results, strict=True):
+            if isinstance(result, bool):
+                decisions[key] = result
+        return decisions
+
+    def get_stats(self) -> dict:
+        return {
+            "entries": len(self.entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "hit_rate": (
+                self.hits / (self.hits + self.misses)
+                if self.hits + self.misses
+                else 0.0
+            ),
+            "evictions": self.evictions,
+        }
@@ -3,11 +3,14 @@
 # Please, refer to the LICENSE file in the root directory.
 # SPDX-License-Identifier: BSD-3-Clause
 
+import asyncio
 from socket import AF_INET
+from typing import Dict, List, Optional, Tuple
 import aiohttp
 from fastapi import HTTPException, status
 
 from lib.auth.authZ.authorization_service import AuthorizationService
+from lib.auth.authZ.decision_cache import DecisionCache
 
 
 class OpenFGAClient(AuthorizationService):
@@ -20,44 +23,138 @@ class OpenFGAClient(AuthorizationService):
             return f"Bearer {self.token}"
 
     def __init__(
-        self, url: str = None, timeout: int = None, max_connections: int = 0
+        self,
+        url: str = None,
+        timeout: int = None,
+        max_connections: int = 0,
+        allow_cache_ttl: int = 60,
+        deny_cache_ttl: int = 10,
+        cache_max_entries: int = 10000,
+        batch_check_url: str = None,
     ) -> None:
         self.url = url
+        self.batch_check_url = batch_check_url
         self.timeout = timeout
         self.max_connections = max_connections
+        self.aiohttp_client: Optional[aiohttp.ClientSession] = None
+        self.decision_cache = DecisionCache(
+            allow_ttl=allow_cache_ttl,
+            deny_ttl=deny_cache_ttl,
+            max_entries=cache_max_entries,
+        )
+
+    async def get_aiohttp_client(self) -> aiohttp.ClientSession:
+        # Long-lived session, connections to OpenFGA are kept alive
+        if self.aiohttp_client is None:
+            timeout = aiohttp.ClientTimeout(total=self.timeout)
+            connector = aiohttp.TCPConnector(
+                family=AF_INET, limit_per_host=self.max_connections
+            )
+            self.aiohttp_client = aiohttp.ClientSession(
+                timeout=timeout, connector=connector
+            )
+        return self.aiohttp_client
+
+    async def close_aiohttp_client(self) -> None:
+        if self.aiohttp_client:
+            await self.aiohttp_client.close()
+            self.aiohttp_client = None
+
+    @staticmethod
+    def _tuple_key(username: str, resource_name: str) -> dict:
+        return {
+            "user": f"user:{username}",
+            "relation": "member",
+            "object": f"vcluster:{resource_name}",
+        }
+
+    async def _check(
+        self, username: str, resource_name: str, access_token: str
+    ) -> bool:
+        client = await self.get_aiohttp_client()
+        async with client.post(
+            url=self.url,
+            auth=OpenFGAClient.BearerAuth(access_token),
+            json=self._tuple_key(username, resource_name),
+        ) as response:
+            # Only an explicit `allowed` result is a decision, any other
+            # response (e.g. errors of OpenFGA or of a proxy) is raised so
+            # that it's not cached
+            response.raise_for_status()
+            result = await response.json(content_type=None)
+        allowed = result.get("allowed") if isinstance(result, dict) else None
+        if not isinstance(allowed, bool):
+            raise ValueError(f"Unexpected OpenFGA check response: {result}")
+        return allowed
 
     async def authorize(self, username: str, resource_name: str, access_token: str):
 
         if self.url is None:
             return
 
-        auth_token = OpenFGAClient.BearerAuth(access_token)
-
         try:
-            timeout = aiohttp.ClientTimeout(total=self.timeout)
-            connector = aiohttp.TCPConnector(
-                family=AF_INET, limit_per_host=self.max_connections
+            allowed = await self.decision_cache.get_or_check(
+                (username, resource_name),
+                lambda: self._check(username, resource_name, access_token),
             )
-
-            async with aiohttp.ClientSession(
-                timeout=timeout, connector=connector
-            ) as session:
-                async with session.post(
-                    url=self.url,
-                    auth=auth_token,
-                    json={
-                        "user": f"user:{username}",
-                        "relation": "member",
-                        "object": f"vcluster:{resource_name}",
-                    },
-                ) as response:
-                    if response.status != 200:
-                        raise HTTPException(
-                            status_code=status.HTTP_403_FORBIDDEN,
-                            detail="Not authorized to access system",
-                        )
         except Exception as exc:
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="Unable to verify system access authorization",
             ) from exc
+
+        if not allowed:
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="Not authorized to access system",
+            )
+
+    async def _check_many(
+        self, keys: List[Tuple[str, str]], access_token: str
+    ) -> Dict[Tuple[str, str], bool]:
+        if self.batch_check_url is None:
+            results = await asyncio.gather(
+                *(self._check(*key, access_token) for key in keys),
+                return_exceptions=True,
+            )
+            return {
+                key: result
+                for key, result in zip(keys, results, strict=True)
+                if isinstance(result, bool)
+            }
+
+        # Checks are matched with their results by correlation ID, checks
+        # with an error have no `allowed` result
+        client = await self.get_aiohttp_client()
+        async with client.post(
+            url=self.batch_check_url,
+            auth=OpenFGAClient.BearerAuth(access_token),
+            json={
+                "checks": [
+                    {"tuple_key": self._tuple_key(*key), "correlation_id": str(i)}
+                    for i, key in enumerate(keys)
+                ]
+            },
+        ) as response:
+            response.raise_for_status()
+            results = (await response.json())["result"]
+        return {
+            key: results[str(i)]["allowed"]
+            for i, key in enumerate(keys)
+            if "allowed" in results.get(str(i), {})
+        }
+
+    async def authorize_many(
+        self, username: str, resource_names: List[str], access_token: str
+    ) -> Dict[str, bool]:
+
+        if self.url is None:
+            return {resource_name: True for resource_name in resource_names}
+
+        decisions = await self.decision_cache.get_or_check_many(
+            [(username, resource_name) for resource_name in resource_names],
+            lambda keys: self._check_many(keys, access_token),
+        )
+        return {
+            resource_name: allowed for (_, resource_name), allowed in decisions.items()
+        }
@@ -39,11 +39,8 @@ def _response_headers_meta(request: Request = None, exc: Exception = None) -> di
     return headers_meta
 
 
-async def meta_headers_handler(request: Request, call_next):
-    headers = _response_headers_meta(request=request)
-    response = await call_next(request)
-    response.headers.update(headers)
-    return response
+def meta_headers(request: Request) -> dict:
+    return _response_headers_meta(request=request)
 
 
 def response_error_handler(exc: Exception, request: Request = None) -> JSONResponse:
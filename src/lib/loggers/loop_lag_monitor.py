@@ -0,0 +1,61 @@
+# Copyright (c) 2025, ETH Zurich. All rights reserved.
+#
+# Please, refer to the LICENSE file in the root directory.
+# SPDX-License-Identifier: BSD-3-Clause
+
+import asyncio
+
+
+class LoopLagMonitor:
+    """Measures the event loop lag.
+
+    A callback is scheduled every `interval` seconds and the lag is the delay
+    between its due time and the time it actually runs, i.e. how long
+    callbacks wait behind blocking work on the loop. `get_stats` returns the
+    lag measured since its previous call.
+    """
+
+    def __init__(self, interval: float = 0.5):
+        self.interval = interval
+        self.loop: asyncio.AbstractEventLoop = None
+        self.handle: asyncio.TimerHandle = None
+        self.due_time = 0.0
+        self._reset()
+
+    def _reset(self) -> None:
+        self.samples = 0
+        self.lag_total = 0.0
+        self.lag_max = 0.0
+
+    def start(self) -> None:
+        if self.handle is None:
+            self.loop = asyncio.get_running_loop()
+            self._schedule()
+
+    def stop(self) -> None:
+        if self.handle is not None:
+            self.handle.cancel()
+            self.handle = None
+
+    def _schedule(self) -> None:
+        self.due_time = self.loop.time() + self.interval
+        self.handle = self.loop.call_at(self.due_time, self._measure)
+
+    def _measure(self) -> None:
+        lag = max(0.0, self.loop.time() - self.due_time)
+        self.samples += 1
+        self.lag_total += lag
+        self.lag_max = max(self.lag_max, lag)
+        self._schedule()
+
+    def get_stats(self) -> dict:
+        stats = {
+            "samples": self.samples,
+            "lag_avg": self.lag_total / self.samples if self.samples else 0.0,
+            "lag_max": self.lag_max,
+        }
+        self._reset()
+        return stats
+
+
+loop_lag_monitor = LoopLagMonitor()
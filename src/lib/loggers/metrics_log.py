@@ -0,0 +1,36 @@
+# Copyright (c) 2025, ETH Zurich. All rights reserved.
+#
+# Please, refer to the LICENSE file in the root directory.
+# SPDX-License-Identifier: BSD-3-Clause
+
+import logging
+from typing import Callable, Dict
+
+# The actual metrics logger
+metrics_logger = logging.getLogger("f7t_v2_metrics_log")
+
+# Registered metrics sources: name -> callable returning a dict of metrics
+metrics_sources: Dict[str, Callable[[], dict]] = {}
+
+
+def register_metrics_source(name: str, source: Callable[[], dict]) -> None:
+    metrics_sources[name] = source
+
+
+def collect_metrics() -> dict:
+    metrics = {}
+    for name, source in metrics_sources.items():
+        try:
+            metrics[name] = source()
+        except Exception as e:
+            metrics[name] = {"error": f"{e.__class__.__name__}: {e}"}
+    return metrics
+
+
+def log_metrics() -> None:
+    for name, metrics in collect_metrics().items():
+        log_data = {}
+        log_data["message"] = f"Metrics: {name}"
+        log_data["metrics_source"] = name
+        log_data["metrics"] = metrics
+        metrics_logger.info(log_data)
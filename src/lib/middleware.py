@@ -0,0 +1,118 @@
+# Copyright (c) 2025, ETH Zurich. All rights reserved.
+#
+# Please, refer to the LICENSE file in the root directory.
+# SPDX-License-Identifier: BSD-3-Clause
+
+import logging
+import types
+from typing import List, Optional, Sequence
+
+from starlette.datastructures import MutableHeaders
+from starlette.requests import Request
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from starlette_context import request_cycle_context
+from starlette_context.errors import MiddleWareValidationError
+from starlette_context.middleware import RawContextMiddleware
+from starlette_context.plugins import Plugin
+
+# request vars
+from lib import request_vars
+
+# helpers
+from lib.handlers.api_response_handler import meta_headers
+
+# FirecREST tracing JSON logger
+from lib.loggers.tracing_log import Log_operation, tracing_log_middleware
+
+
+logger = logging.getLogger(__name__)
+
+
+class RequestMiddleware(RawContextMiddleware):
+    """Sets up each HTTP request, as a single pure ASGI middleware.
+
+    In order, it:
+    - sets the `context` data of the `plugins` (e.g. request and correlation
+      IDs), answering `400` to invalid values, and adds them to the response
+      headers (as `RawContextMiddleware` does)
+    - lowercases the request path
+    - logs the request and the response status (if `enable_tracing_log`)
+    - binds a fresh namespace for the request variables (see `request_vars`)
+    - adds the F7T meta headers to the response
+
+    Response messages are forwarded as they are sent, streaming responses
+    are not buffered.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        plugins: Optional[Sequence[Plugin]] = None,
+        enable_tracing_log: bool = False,
+        loggable_request_headers: Optional[List[dict]] = None,
+    ) -> None:
+        super().__init__(app, plugins=plugins)
+        self.enable_tracing_log = enable_tracing_log
+        self.loggable_request_headers = loggable_request_headers or []
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        try:
+            context = await self.set_context(
+                self.get_request_object(scope, receive, send)
+            )
+        except MiddleWareValidationError as e:
+            error_response = e.error_response or self.error_response
+            return await self.send_response(error_response, send)
+
+        scope["path"] = scope["path"].lower()
+        request = Request(scope)
+
+        with request_cycle_context(context):
+            # A fresh namespace per request, bound in this async context, so
+            # per-request state (e.g. auth in api_auth_helper.py) never leaks
+            # across concurrent requests sharing the contextvar's default.
+            token = request_vars.request_global.set(types.SimpleNamespace())
+            headers = meta_headers(request)
+
+            async def send_wrapper(message: Message) -> None:
+                if message["type"] == "http.response.start":
+                    MutableHeaders(scope=message).update(headers)
+                for plugin in self.plugins:
+                    await plugin.enrich_response(message)
+                await send(message)
+                if message["type"] == "http.response.start":
+                    self._log(
+                        Log_operation.Response,
+                        request,
+                        getattr(request.state, "username", None),
+                        message["status"],
+                    )
+
+            try:
+                self._log(Log_operation.Request, request, None, None)
+                await self.app(scope, receive, send_wrapper)
+            except Exception as e:
+                logger.error({"endpoint": request.url.path, "error": str(e)})
+                raise e
+            finally:
+                request_vars.request_global.reset(token)
+
+    def _log(
+        self,
+        operation: Log_operation,
+        request: Request,
+        username: Optional[str],
+        status_code: Optional[int],
+    ) -> None:
+        if self.enable_tracing_log:
+            tracing_log_middleware(
+                operation,
+                request,
+                username,
+                status_code,
+                self.loggable_request_headers,
+            )
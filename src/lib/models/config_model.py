@@ -66,6 +66,37 @@ class Oidc(CamelModel):
         nullable=False,
         ge=0,
     )
+    token_cache_max_entries: int = Field(
+        10000,
+        description=(
+            "Maximum number of verified access tokens cached, so that tokens "
+            "reused across requests are only verified once. Cached tokens "
+            "expire `min_token_ttl` seconds before the token and when their "
+            "public key is rotated. `0` disables caching."
+        ),
+        nullable=False,
+        ge=0,
+    )
+    jwks_refresh_interval: int = Field(
+        3600,
+        description=(
+            "Interval (in seconds) at which the public keys are refreshed in "
+            "the background, unless the cache headers of the `public_certs` "
+            "responses require an earlier refresh."
+        ),
+        nullable=False,
+        gt=0,
+    )
+    jwks_min_refresh_interval: int = Field(
+        60,
+        description=(
+            "Minimum interval (in seconds) between two refreshes of the public "
+            "keys. Tokens signed with an unknown key trigger a refresh, at most "
+            "once per interval, so that rotated keys are accepted right away."
+        ),
+        nullable=False,
+        gt=0,
+    )
 
 
 class LoadFileSecretStr(SecretStr):
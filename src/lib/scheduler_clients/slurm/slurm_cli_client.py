@@ -3,7 +3,6 @@
 # Please, refer to the LICENSE file in the root directory.
 # SPDX-License-Identifier: BSD-3-Clause
 
-import asyncio
 from typing import List
 from packaging.version import Version
 from lib.exceptions import SlurmError
@@ -64,6 +63,15 @@ class SlurmCliClient(SlurmBaseClient):
         async with self.ssh_client.get_client(username, jwt_token) as client:
             return await client.execute(command, stdin)
 
+    async def __executed_ssh_cmds(self, username, jwt_token, commands):
+        # Runs all commands in a single SSH round trip. As with
+        # asyncio.gather(return_exceptions=True), errors are returned in place
+        try:
+            async with self.ssh_client.get_client(username, jwt_token) as client:
+                return await client.execute_many(commands, return_exceptions=True)
+        except Exception as e:
+            return [e] * len(commands)
+
     def __init__(
         self,
         ssh_client: SSHClientPool,
@@ -103,12 +111,8 @@ class SlurmCliClient(SlurmBaseClient):
         sacct = SacctCommand(username, [job_id], allusers)
         squeue = SqueueCommand(username, [job_id], allusers)
 
-        commands = [
-            # sacct has precedence over squeue, as it contains more complete job info, including finished jobs
-            self.__executed_ssh_cmd(username, jwt_token, sacct),
-            self.__executed_ssh_cmd(username, jwt_token, squeue),
-        ]
-        results = await asyncio.gather(*commands, return_exceptions=True)
+        # sacct has precedence over squeue, as it contains more complete job info, including finished jobs
+        results = await self.__executed_ssh_cmds(username, jwt_token, [sacct, squeue])
         jobs = {}
         for result in results:
             if result is None:
@@ -133,22 +137,16 @@ class SlurmCliClient(SlurmBaseClient):
 
         scontrol = ScontrolJobCommand(job_id if job_id else None)
         scontrol_script = ScontrolBatchScriptCommand(job_id if job_id else None)
-        commands = [
-            self.__executed_ssh_cmd(username, jwt_token, scontrol),
-            self.__executed_ssh_cmd(username, jwt_token, scontrol_script),
-        ]
+        commands = [scontrol, scontrol_script]
 
         if Version(self.slurm_version) >= Version("24.05.0"):
             sacct = SacctJobMetadataCommand(username, [job_id] if job_id else None)
             sacct_script = SacctBatchScriptCommand(
                 username, [job_id] if job_id else None
             )
-            commands += [
-                self.__executed_ssh_cmd(username, jwt_token, sacct),
-                self.__executed_ssh_cmd(username, jwt_token, sacct_script),
-            ]
+            commands += [sacct, sacct_script]
 
-        results = await asyncio.gather(*commands, return_exceptions=True)
+        results = await self.__executed_ssh_cmds(username, jwt_token, commands)
 
         cmd_result_i: int = 0
 
@@ -187,12 +185,8 @@ class SlurmCliClient(SlurmBaseClient):
         sacct = SacctCommand(username, None, allusers, account, name, time_window)
         squeue = SqueueCommand(username, None, allusers, account, name)
 
-        commands = [
-            # sacct has precedence over squeue, as it contains more complete job info, including finished jobs
-            self.__executed_ssh_cmd(username, jwt_token, sacct),
-            self.__executed_ssh_cmd(username, jwt_token, squeue),
-        ]
-        results = await asyncio.gather(*commands, return_exceptions=True)
+        # sacct has precedence over squeue, as it contains more complete job info, including finished jobs
+        results = await self.__executed_ssh_cmds(username, jwt_token, [sacct, squeue])
         jobs = {}
         for result in results:
             if isinstance(result, Exception):
@@ -244,12 +238,8 @@ class SlurmCliClient(SlurmBaseClient):
         sacctmgr = SacctmgrAccountsCommand(username)
         sacctmgr_default = SacctmgrDefaultAccountCommand(username)
 
-        commands = [
-            self.__executed_ssh_cmd(username, jwt_token, sacctmgr),
-            self.__executed_ssh_cmd(username, jwt_token, sacctmgr_default),
-        ]
-        accounts_result, default_account_result = await asyncio.gather(
-            *commands, return_exceptions=True
+        accounts_result, default_account_result = await self.__executed_ssh_cmds(
+            username, jwt_token, [sacctmgr, sacctmgr_default]
         )
 
         if isinstance(accounts_result, Exception):
@@ -0,0 +1,167 @@
+# Copyright (c) 2025, ETH Zurich. All rights reserved.
+#
+# Please, refer to the LICENSE file in the root directory.
+# SPDX-License-Identifier: BSD-3-Clause
+
+import asyncio
+import logging
+from collections import OrderedDict
+from time import time
+from typing import Dict, Optional, Tuple
+
+import asyncssh
+from jose import jwt, JWTError
+
+from lib.ssh_clients.ssh_credentials_provider import SSHCredentialsProvider
+
+
+class SSHCachedCredentialsProvider(SSHCredentialsProvider):
+    """Caches the credentials of another provider until their certificate expires.
+
+    Entries are keyed by username and token subject and live until the
+    certificate `valid_before`. When an entry is requested less than
+    `refresh_margin` seconds before its expiry, it is still returned and a
+    single background refresh is started with the caller's (fresh) token.
+    Concurrent requests for the same key share one in-flight request to the
+    underlying provider.
+    """
+
+    class CacheEntry:
+        def __init__(
+            self, credentials: SSHCredentialsProvider.SSHCredentials, valid_before: float
+        ):
+            self.credentials = credentials
+            self.valid_before = valid_before
+
+    def __init__(
+        self,
+        provider: SSHCredentialsProvider,
+        refresh_margin: int = 15,
+        min_validity: int = 5,
+        max_entries: int = 10000,
+    ):
+        self.provider = provider
+        self.refresh_margin = refresh_margin
+        self.min_validity = min_validity
+        self.max_entries = max_entries
+        self.entries: OrderedDict[Tuple[str, str], SSHCachedCredentialsProvider.CacheEntry] = OrderedDict()
+        self.in_flight: Dict[Tuple[str, str], asyncio.Task] = {}
+        self.hits = 0
+        self.misses = 0
+        self.refreshes = 0
+
+    @staticmethod
+    def _token_subject(jwt_token: str) -> Optional[str]:
+        # The token has already been verified by the authentication layer
+        try:
+            return jwt.get_unverified_claims(jwt_token).get("sub")
+        except JWTError:
+            return None
+
+    @staticmethod
+    def _valid_before(
+        credentials: SSHCredentialsProvider.SSHCredentials,
+    ) -> Optional[float]:
+        if not credentials.public_certificate:
+            return None
+        try:
+            certificate = asyncssh.import_certificate(credentials.public_certificate)
+        except (asyncssh.KeyImportError, ValueError):
+            return None
+        return getattr(certificate, "_valid_before", None)
+
+    def _store(
+        self,
+        key: Tuple[str, str],
+        credentials: SSHCredentialsProvider.SSHCredentials,
+    ) -> None:
+        valid_before = self._valid_before(credentials)
+        if valid_before is None or valid_before - time() <= self.min_validity:
+            return
+        self.entries[key] = SSHCachedCredentialsProvider.CacheEntry(
+            credentials, valid_before
+        )
+        self.entries.move_to_end(key)
+        if len(self.entries) > self.max_entries:
+            self.prune()
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    async def _fetch(self, key: Tuple[str, str], username: str, jwt_token: str):
+        try:
+            credentials = await self.provider.get_credentials(username, jwt_token)
+            self._store(key, credentials)
+            return credentials
+        finally:
+            self.in_flight.pop(key, None)
+
+    def _get_in_flight(
+        self, key: Tuple[str, str], username: str, jwt_token: str
+    ) -> asyncio.Task:
+        task = self.in_flight.get(key)
+        if task is None:
+            task = asyncio.create_task(self._fetch(key, username, jwt_token))
+            self.in_flight[key] = task
+        return task
+
+    def _refresh_in_background(
+        self, key: Tuple[str, str], username: str, jwt_token: str
+    ) -> None:
+        if key in self.in_flight:
+            return
+        self.refreshes += 1
+        task = self._get_in_flight(key, username, jwt_token)
+        task.add_done_callback(self._log_refresh_error)
+
+    @staticmethod
+    def _log_refresh_error(task: asyncio.Task) -> None:
+        if task.cancelled() or task.exception() is None:
+            return
+        logging.getLogger("uvicorn.error").warning(
+            {
+                "message": "SSH credentials background refresh failed",
+                "error.type": task.exception().__class__.__name__,
+                "error.message": str(task.exception()),
+            }
+        )
+
+    def prune(self) -> None:
+        now = time()
+        for key in [
+            key
+            for key, entry in self.entries.items()
+            if entry.valid_before - now <= self.min_validity
+        ]:
+            del self.entries[key]
+
+    async def get_credentials(
+        self, username: str, jwt_token: str
+    ) -> SSHCredentialsProvider.SSHCredentials:
+        subject = self._token_subject(jwt_token)
+        if subject is None:
+            return await self.provider.get_credentials(username, jwt_token)
+
+        key = (username, subject)
+        entry = self.entries.get(key)
+        if entry is not None:
+            remaining = entry.valid_before - time()
+            if remaining > self.min_validity:
+                self.hits += 1
+                self.entries.move_to_end(key)
+                if remaining < self.refresh_margin:
+                    self._refresh_in_background(key, username, jwt_token)
+                return entry.credentials
+            del self.entries[key]
+
+        self.misses += 1
+        # shield: a cancelled caller must not cancel the request shared with others
+        return await asyncio.shield(self._get_in_flight(key, username, jwt_token))
+
+    def get_stats(self) -> dict:
+        return {
+            "entries": len(self.entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "refreshes": self.refreshes,
+            "in_flight": len(self.in_flight),
+        }
@@ -0,0 +1,89 @@
+# Copyright (c) 2025, ETH Zurich. All rights reserved.
+#
+# Please, refer to the LICENSE file in the root directory.
+# SPDX-License-Identifier: BSD-3-Clause
+
+import asyncio
+from collections import deque
+from contextlib import suppress
+from time import monotonic
+from typing import Deque
+
+
+class SSHChannelLimiter:
+    """FIFO admission control for the channels opened on one SSH connection.
+
+    sshd refuses new sessions once `MaxSessions` is reached, so instead of
+    letting `create_process` fail with `ChannelOpenError` callers queue here
+    and are admitted in arrival order as soon as a channel is released.
+    """
+
+    def __init__(self, max_channels: int = 10):
+        if max_channels < 1:
+            raise ValueError("max_channels must be greater than 0")
+        self.max_channels = max_channels
+        self.active = 0
+        self.waiters: Deque[asyncio.Future] = deque()
+        # Wait time statistics (seconds)
+        self.acquired = 0
+        self.queued = 0
+        self.wait_time_total = 0.0
+        self.wait_time_max = 0.0
+
+    @property
+    def waiting(self) -> int:
+        return len(self.waiters)
+
+    async def acquire(self) -> None:
+        if self.active < self.max_channels and not self.waiters:
+            self.active += 1
+            self.acquired += 1
+            return
+
+        start = monotonic()
+        waiter = asyncio.get_running_loop().create_future()
+        self.waiters.append(waiter)
+        self.queued += 1
+        try:
+            await waiter
+        except BaseException:
+            if waiter.done() and not waiter.cancelled():
+                # The channel was handed over right before the cancellation:
+                # pass it on to the next waiter instead of leaking it.
+                self.release()
+            else:
+                with suppress(ValueError):
+                    self.waiters.remove(waiter)
+            raise
+
+        wait_time = monotonic() - start
+        self.acquired += 1
+        self.wait_time_total += wait_time
+        self.wait_time_max = max(self.wait_time_max, wait_time)
+
+    def release(self) -> None:
+        # Hand the channel over directly to the oldest waiter so that newly
+        # arriving callers cannot overtake the queue.
+        while self.waiters:
+            waiter = self.waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        self.active -= 1
+
+    async def __aenter__(self):
+        await self.acquire()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        self.release()
+
+    def get_stats(self) -> dict:
+        return {
+            "channels_active": self.active,
+            "channels_waiting": self.waiting,
+            "channels_acquired": self.acquired,
+            "channels_queued": self.queued,
+            "channel_wait_time_total": self.wait_time_total,
+            "channel_wait_time_max": self.wait_time_max,
+        }
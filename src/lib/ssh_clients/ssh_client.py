@@ -4,10 +4,16 @@
 # SPDX-License-Identifier: BSD-3-Clause
 
 import asyncio
+import heapq
+import itertools
+import re
+import shlex
+from collections import deque
 from time import time
+from uuid import uuid4
 from datetime import datetime
 
-from typing import Any, Dict, Optional
+from typing import Any, AsyncIterable, AsyncIterator, Dict, List, Optional, Tuple
 import asyncssh
 from asyncssh import (
     ChannelOpenError,
@@ -15,12 +21,25 @@ from asyncssh import (
     SSHClientConnection,
     PermissionDenied,
     ProtocolError,
+    SFTPAttrs,
+    SFTPClient,
+    SFTPConnectionLost,
+    SFTPNoSuchFile,
 )
-from contextlib import asynccontextmanager
+from contextlib import asynccontextmanager, suppress
 from abc import ABC, abstractmethod
 
 # clients
+from lib.ssh_clients.ssh_channel_limiter import SSHChannelLimiter
 from lib.ssh_clients.ssh_credentials_provider import SSHCredentialsProvider
+from lib.ssh_clients.ssh_endpoint_balancer import SSHEndpoint, SSHEndpointBalancer
+from lib.ssh_clients.ssh_sftp_session import SSHSftpSession
+from lib.ssh_clients.ssh_tunnel_pool import SSHTunnelPool
+from lib.ssh_clients.ssh_shell_worker import (
+    ShellWorkerError,
+    ShellWorkerOutputLimitExceeded,
+    SSHShellWorker,
+)
 
 from lib.loggers.tracing_log import log_backend_command
 import logging
@@ -36,6 +55,167 @@ class BaseCommand(ABC):
     def parse_output(self, stdout: str, stderr: str, exit_status: int):
         pass
 
+    def parse_stream(self, chunk: bytes) -> List[Any]:
+        # Incremental parser used by SSHClient.execute_stream, returns the
+        # records parsed from a chunk of stdout. Default: the raw chunk.
+        return [chunk]
+
+    def parse_stream_end(self, stderr: str, exit_status: int) -> List[Any]:
+        # Called once stdout is exhausted, returns the remaining records.
+        # Errors are reported through parse_output as for execute.
+        if exit_status != 0:
+            self.parse_output("", stderr, exit_status)
+        return []
+
+
+class LineStreamCommand(BaseCommand):
+    """Base class for commands whose output can be parsed line by line."""
+
+    # Separator of the lines, e.g. b"\0" for NUL-delimited outputs
+    stream_delimiter = b"\n"
+
+    def __init__(self) -> None:
+        super().__init__()
+        self._stream_buffer = b""
+
+    @abstractmethod
+    def parse_stream_line(self, line: str) -> Any:
+        # Returns the record parsed from a single line, or None to skip it
+        pass
+
+    def parse_stream(self, chunk: bytes) -> List[Any]:
+        lines = (self._stream_buffer + chunk).split(self.stream_delimiter)
+        self._stream_buffer = lines.pop()
+        records = (
+            self.parse_stream_line(line.decode("utf-8", errors="replace"))
+            for line in lines
+        )
+        return [record for record in records if record is not None]
+
+    def parse_stream_end(self, stderr: str, exit_status: int) -> List[Any]:
+        super().parse_stream_end(stderr, exit_status)
+        records = (
+            self.parse_stream(self.stream_delimiter) if self._stream_buffer else []
+        )
+        self._stream_buffer = b""
+        return records
+
+
+class CompositeCommand(BaseCommand):
+    """Runs several commands in a single remote process.
+
+    The command lines are executed one after the other by a POSIX `sh`
+    (whatever the login shell of the user), each in its own `sh` with stdin
+    from /dev/null and followed by a marker carrying a random token, the
+    command index and its exit status, on both stdout and stderr.
+    parse_output splits the combined output back and returns the result of
+    each command's own parse_output, in order.
+
+    Each command has its own budget: it's stopped after `timeout` seconds
+    and its stdout is cut at `buffer_limit` bytes, failing with
+    TimeoutLimitExceeded or OutputLimitExceeded without affecting the
+    others. Commands without a marker in the output (e.g. when the whole
+    process was stopped) fail with SSHClientError.
+    """
+
+    # Runs the command line given as argument and reports its exit status on
+    # fd 3. Nothing is reported when it's stopped, e.g. by `timeout`, so that
+    # commands exiting with 124 themselves aren't taken for timeouts
+    RUN_COMMAND = 'sh -c "$1" </dev/null; echo $? >&3'
+
+    def __init__(
+        self,
+        commands: List[BaseCommand],
+        return_exceptions: bool = False,
+        timeout: Optional[int] = None,
+        buffer_limit: Optional[int] = None,
+    ):
+        super().__init__()
+        self.commands = commands
+        self.return_exceptions = return_exceptions
+        self.timeout = timeout
+        self.buffer_limit = buffer_limit
+        self.token = uuid4().hex
+
+    def _command_line(self, i: int, command: BaseCommand) -> str:
+        run = (
+            f"sh -c {shlex.quote(self.RUN_COMMAND)} sh "
+            f"{shlex.quote(command.get_command())}"
+        )
+        if self.timeout is not None:
+            run = f"timeout {self.timeout} {run}"
+        limit = f"head -c {self.buffer_limit}" if self.buffer_limit else "cat"
+        # The exit status goes through fd 3 while stdout, piped through the
+        # limit, goes to the process stdout (fd 4)
+        return (
+            f"__f7t_status=$( {{ {run} | {limit} >&4; }} 3>&1 ); "
+            f"printf '\\n%s:%d:%s\\n' {self.token} {i} \"$__f7t_status\"; "
+            f"printf '\\n%s:%d\\n' {self.token} {i} >&2"
+        )
+
+    def get_command(self) -> str:
+        command_lines = [
+            self._command_line(i, command) for i, command in enumerate(self.commands)
+        ]
+        # The script needs a POSIX shell, login shells may not be (e.g. csh)
+        return "sh -c " + shlex.quote("exec 4>&1; " + "; ".join(command_lines))
+
+    def _parse_command_output(
+        self,
+        command: BaseCommand,
+        stdout: str,
+        stderr: str,
+        exit_status: Optional[int],
+    ):
+        if self.buffer_limit and (
+            len(stdout) >= self.buffer_limit or len(stderr) >= self.buffer_limit
+        ):
+            raise OutputLimitExceeded("Command output exceeded buffer limit.")
+        if exit_status is None:
+            if self.timeout is not None:
+                raise TimeoutLimitExceeded("Command execution timeout limit exceeded.")
+            raise SSHClientError("Command was stopped before completion.")
+        return command.parse_output(stdout, stderr, exit_status)
+
+    def parse_output(self, stdout: str, stderr: str, exit_status: int):
+        stdout_frames = re.split(rf"\n{self.token}:\d+:(\d*)\n", stdout)
+        stderr_frames = re.split(rf"\n{self.token}:\d+\n", stderr)
+        # Each split leaves the output after the last marker
+        framed = min((len(stdout_frames) - 1) // 2, len(stderr_frames) - 1)
+
+        results = []
+        for i, command in enumerate(self.commands):
+            try:
+                if i >= framed:
+                    raise SSHClientError(
+                        "Unexpected output of composite command, "
+                        f"exit status:{exit_status}"
+                    )
+                status = stdout_frames[2 * i + 1]
+                results.append(
+                    self._parse_command_output(
+                        command,
+                        stdout_frames[2 * i],
+                        stderr_frames[i],
+                        int(status) if status else None,
+                    )
+                )
+            except Exception as e:
+                if not self.return_exceptions:
+                    raise
+                results.append(e)
+        return results
+
+
+def decode_and_parse_output(
+    command: BaseCommand, stdout_data: bytes, stderr_data: bytes, exit_status: int
+):
+    return command.parse_output(
+        stdout_data.decode("utf-8", errors="replace"),
+        stderr_data.decode("utf-8", errors="replace"),
+        exit_status,
+    )
+
 
 class SSHClientError(Exception):
     pass
@@ -62,12 +242,42 @@ class SSHClient:
         execute_timeout: int = 5,
         keep_alive: int = 5,
         buffer_limit: int = 5 * 1024 * 1024,
+        max_channels: int = 10,
+        persistent_shell: bool = False,
+        endpoint: SSHEndpoint = None,
+        parse_offload_threshold: int = 1024 * 1024,
     ):
         self.idle_timeout = idle_timeout
+        self.endpoint = endpoint
+        self.last_used = time()
+        # Whether the client has an entry in its pool's idle deadlines heap
+        self.idle_scheduled = False
         self.conn = conn
         self.conn.set_keepalive(interval=keep_alive, count_max=3)
         self.execute_timeout = execute_timeout
         self.buffer_limit = buffer_limit
+        self.channels = SSHChannelLimiter(max_channels)
+        # Number of callers currently holding this client (see SSHClientPool.get_client)
+        self.leases = 0
+        self.shell_worker = (
+            SSHShellWorker(conn, self.channels, buffer_limit)
+            if persistent_shell
+            else None
+        )
+        self.sftp_session = SSHSftpSession(conn, self.channels)
+        # Outputs of at least this size are parsed in the default executor,
+        # keeping the event loop responsive
+        self.parse_offload_threshold = parse_offload_threshold
+        self.parse_offloads = 0
+
+    @property
+    def available_channels(self) -> int:
+        # Channels left for commands: the shell worker and the SFTP session
+        # hold one channel each for as long as they are open
+        reserved = int(self.sftp_session.is_open())
+        if self.shell_worker is not None and self.shell_worker.process is not None:
+            reserved += 1
+        return self.channels.max_channels - reserved
 
     async def _read_limit(self, reader, limit):
         # Note: according to asyncssh author, the following is the
@@ -78,10 +288,107 @@ class SSHClient:
         except asyncio.IncompleteReadError as exc:
             return exc.partial
 
+    async def _parse_output(
+        self,
+        command: BaseCommand,
+        stdout_data: bytes,
+        stderr_data: bytes,
+        exit_status: int,
+    ):
+        if len(stdout_data) + len(stderr_data) < self.parse_offload_threshold:
+            return decode_and_parse_output(
+                command, stdout_data, stderr_data, exit_status
+            )
+        self.parse_offloads += 1
+        return await asyncio.get_running_loop().run_in_executor(
+            None, decode_and_parse_output, command, stdout_data, stderr_data, exit_status
+        )
+
+    async def _acquire_channel(self) -> None:
+        try:
+            async with asyncio.timeout(self.execute_timeout):
+                await self.channels.acquire()
+        except TimeoutError as e:
+            raise TimeoutLimitExceeded(
+                "Timeout limit exceeded while waiting for a free SSH channel."
+            ) from e
+
     async def execute(self, command: BaseCommand, stdin: str = None):
-        process = None
+        # Commands without stdin run in the persistent shell worker, if enabled
+        # and idle, saving the setup of a new exec channel
+        if self.shell_worker is not None and not stdin and not self.shell_worker.busy:
+            return await self._execute_in_shell_worker(command)
+
+        await self._acquire_channel()
+        try:
+            return await self._execute(command, stdin)
+        finally:
+            self.channels.release()
+
+    async def execute_many(
+        self, commands: List[BaseCommand], return_exceptions: bool = False
+    ) -> List[Any]:
+        """Execute several commands in a single SSH round trip.
+
+        Returns the parsed output of each command, in order. With
+        `return_exceptions` the errors raised by a command's parse_output are
+        returned in its place, as with asyncio.gather.
+        """
+        # Each command has the execution timeout and buffer limit of a single
+        # command, the whole process the sum of them. It always runs in its
+        # own channel, the shell worker has a single budget.
+        composite = CompositeCommand(
+            commands,
+            return_exceptions,
+            timeout=self.execute_timeout,
+            buffer_limit=self.buffer_limit,
+        )
+        await self._acquire_channel()
+        try:
+            return await self._execute(
+                composite,
+                timeout=self.execute_timeout * (len(commands) + 1),
+                buffer_limit=self.buffer_limit * (len(commands) + 1),
+            )
+        finally:
+            self.channels.release()
+
+    async def _execute_in_shell_worker(self, command: BaseCommand):
         try:
             async with asyncio.timeout(self.execute_timeout):
+                command_line = command.get_command()
+                stdout_data, stdout_error, exit_status = (
+                    await self.shell_worker.execute(command_line)
+                )
+        except TimeoutError as e:
+            raise TimeoutLimitExceeded(
+                "Command execution timeout limit exceeded."
+            ) from e
+        except ShellWorkerOutputLimitExceeded as e:
+            raise OutputLimitExceeded("Command output exceeded buffer limit.") from e
+        except ShellWorkerError as e:
+            raise SSHConnectionError("Remote shell worker terminated.") from e
+        except ConnectionLost as e:
+            raise SSHConnectionError("Unable to establish SSH connection.") from e
+        except ChannelOpenError as e:
+            raise SSHConnectionError("Unable to open a new SSH channel.") from e
+
+        # Log command
+        log_backend_command(command_line, exit_status)
+        return await self._parse_output(command, stdout_data, stdout_error, exit_status)
+
+    async def _execute(
+        self,
+        command: BaseCommand,
+        stdin: str = None,
+        timeout: Optional[int] = None,
+        buffer_limit: Optional[int] = None,
+    ):
+        timeout = timeout or self.execute_timeout
+        buffer_limit = buffer_limit or self.buffer_limit
+        process = None
+        try:
+            async with asyncio.timeout(timeout):
                 command_line = command.get_command()
                 process = await self.conn.create_process(command_line, encoding=None)
 
@@ -90,13 +397,13 @@ class SSHClient:
                     process.stdin.write_eof()
 
                 stdout_data, stdout_error = await asyncio.gather(
-                    self._read_limit(process.stdout, self.buffer_limit),
-                    self._read_limit(process.stderr, self.buffer_limit),
+                    self._read_limit(process.stdout, buffer_limit),
+                    self._read_limit(process.stderr, buffer_limit),
                 )
 
                 if (
-                    len(stdout_data) >= self.buffer_limit
-                    or len(stdout_error) >= self.buffer_limit
+                    len(stdout_data) >= buffer_limit
+                    or len(stdout_error) >= buffer_limit
                 ):
                     raise OutputLimitExceeded("Command output exceeded buffer limit.")
 
@@ -104,11 +411,6 @@ class SSHClient:
                 await process.wait_closed()
                 # Log command
                 log_backend_command(command_line, process.exit_status)
-                return command.parse_output(
-                    stdout_data.decode("utf-8", errors="replace"),
-                    stdout_error.decode("utf-8", errors="replace"),
-                    process.exit_status,
-                )
 
         except TimeoutError as e:
             if process:
@@ -123,16 +425,280 @@ class SSHClient:
         except ChannelOpenError as e:
             raise SSHConnectionError("Unable to open a new SSH channel.") from e
 
+        # Parsing is not part of the command execution timeout
+        return await self._parse_output(
+            command, stdout_data, stdout_error, process.exit_status
+        )
+
+    async def execute_stream(
+        self,
+        command: BaseCommand,
+        stdin: str = None,
+        chunk_size: int = 64 * 1024,
+        parse: bool = True,
+        timeout_reads: bool = True,
+    ) -> AsyncIterator[Any]:
+        """Execute a command yielding its output while it is produced.
+
+        stdout is read in chunks of at most `chunk_size` bytes, the next chunk
+        is only read once the previous records have been consumed, so a slow
+        consumer throttles the remote process through SSH flow control.
+        With `parse` the records produced by `command.parse_stream` are
+        yielded, otherwise the raw chunks. `execute_timeout` applies to each
+        read instead of the whole execution, without `timeout_reads` reads
+        wait indefinitely (e.g. for commands following a file).
+        Close the generator (e.g. with `contextlib.aclosing`) when it is not
+        fully consumed, to release the SSH channel.
+        """
+        await self._acquire_channel()
+        process = None
+        stderr_reader = None
+        try:
+            command_line = command.get_command()
+            async with asyncio.timeout(self.execute_timeout):
+                process = await self.conn.create_process(command_line, encoding=None)
+
+            if stdin:
+                process.stdin.write(stdin.encode())
+                process.stdin.write_eof()
+
+            stderr_reader = asyncio.create_task(
+                self._read_limit(process.stderr, self.buffer_limit)
+            )
+            while True:
+                async with asyncio.timeout(
+                    self.execute_timeout if timeout_reads else None
+                ):
+                    chunk = await process.stdout.read(chunk_size)
+                if not chunk:
+                    break
+                for record in command.parse_stream(chunk) if parse else [chunk]:
+                    yield record
+
+            async with asyncio.timeout(self.execute_timeout):
+                stdout_error = await stderr_reader
+                if len(stdout_error) >= self.buffer_limit:
+                    raise OutputLimitExceeded("Command output exceeded buffer limit.")
+                process.close()
+                await process.wait_closed()
+
+            # Log command
+            log_backend_command(command_line, process.exit_status)
+            stderr = stdout_error.decode("utf-8", errors="replace")
+            if parse:
+                for record in command.parse_stream_end(stderr, process.exit_status):
+                    yield record
+            elif process.exit_status != 0:
+                command.parse_output("", stderr, process.exit_status)
+
+        except TimeoutError as e:
+            if process:
+                process.terminate()
+                process.stdin.write("\x03".encode())
+                process.stdin.write_eof()
+            raise TimeoutLimitExceeded(
+                "Command execution timeout limit exceeded."
+            ) from e
+        except ConnectionLost as e:
+            raise SSHConnectionError("Unable to establish SSH connection.") from e
+        except ChannelOpenError as e:
+            raise SSHConnectionError("Unable to open a new SSH channel.") from e
+        finally:
+            if stderr_reader and not stderr_reader.done():
+                stderr_reader.cancel()
+            if process and not process.is_closing():
+                process.close()
+            self.channels.release()
+
+    async def execute_stdin_stream(
+        self, command: BaseCommand, chunks: AsyncIterable[bytes]
+    ) -> Any:
+        """Execute a command writing the chunks to its standard input.
+
+        The next chunk is only read once the previous one has been accepted
+        by the channel, so the remote process throttles the writes through
+        SSH flow control. `execute_timeout` applies to each write instead of
+        the whole execution. When reading the chunks fails, EOF is sent and
+        the error is propagated once the command exited: the command must
+        check that it received its whole input (see `WriteFileCommand`).
+        """
+        await self._acquire_channel()
+        process = None
+        output_readers = None
+        try:
+            command_line = command.get_command()
+            async with asyncio.timeout(self.execute_timeout):
+                process = await self.conn.create_process(command_line, encoding=None)
+
+            # Output is read concurrently, so that the remote process never
+            # blocks on a full output pipe while receiving its input
+            output_readers = asyncio.gather(
+                self._read_limit(process.stdout, self.buffer_limit),
+                self._read_limit(process.stderr, self.buffer_limit),
+            )
+            try:
+                async for chunk in chunks:
+                    process.stdin.write(chunk)
+                    async with asyncio.timeout(self.execute_timeout):
+                        await process.stdin.drain()
+            except BaseException:
+                # The command receives a truncated input, it is given the
+                # chance to clean up before the channel is closed
+                with suppress(Exception):
+                    process.stdin.write_eof()
+                    async with asyncio.timeout(self.execute_timeout):
+                        await process.wait_closed()
+                raise
+            process.stdin.write_eof()
+
+            async with asyncio.timeout(self.execute_timeout):
+                stdout_data, stdout_error = await output_readers
+                if (
+                    len(stdout_data) >= self.buffer_limit
+                    or len(stdout_error) >= self.buffer_limit
+                ):
+                    raise OutputLimitExceeded("Command output exceeded buffer limit.")
+                process.close()
+                await process.wait_closed()
+            # Log command
+            log_backend_command(command_line, process.exit_status)
+
+        except TimeoutError as e:
+            if process:
+                process.terminate()
+            raise TimeoutLimitExceeded(
+                "Command execution timeout limit exceeded."
+            ) from e
+        except ConnectionLost as e:
+            raise SSHConnectionError("Unable to establish SSH connection.") from e
+        except ChannelOpenError as e:
+            raise SSHConnectionError("Unable to open a new SSH channel.") from e
+        finally:
+            if output_readers and not output_readers.done():
+                output_readers.cancel()
+            if process and not process.is_closing():
+                process.close()
+            self.channels.release()
+
+        return await self._parse_output(
+            command, stdout_data, stdout_error, process.exit_status
+        )
+
+    @asynccontextmanager
+    async def _sftp_client(self) -> AsyncIterator[SFTPClient]:
+        # SFTP errors on the remote files (e.g. SFTPNoSuchFile) are propagated
+        try:
+            async with asyncio.timeout(self.execute_timeout):
+                sftp = await self.sftp_session.start()
+            yield sftp
+        except TimeoutError as e:
+            raise TimeoutLimitExceeded(
+                "SFTP operation timeout limit exceeded."
+            ) from e
+        except (SFTPConnectionLost, ConnectionLost) as e:
+            self.sftp_session.close()
+            raise SSHConnectionError("SFTP session lost.") from e
+        except ChannelOpenError as e:
+            raise SSHConnectionError("Unable to open a new SSH channel.") from e
+
+    async def sftp_stat(self, path: str) -> SFTPAttrs:
+        async with self._sftp_client() as sftp:
+            async with asyncio.timeout(self.execute_timeout):
+                return await sftp.stat(path)
+
+    async def sftp_read(self, path: str, size: int, offset: int = 0) -> bytes:
+        """Read up to `size` bytes of a remote file, starting at `offset`."""
+        async with self._sftp_client() as sftp:
+            async with asyncio.timeout(self.execute_timeout):
+                async with sftp.open(path, "rb") as file:
+                    data = await file.read(size, offset)
+        log_backend_command(f"sftp read '{path}'", 0)
+        return data
+
+    async def sftp_read_stream(
+        self,
+        path: str,
+        size: Optional[int] = None,
+        offset: int = 0,
+        chunk_size: int = 64 * 1024,
+    ) -> AsyncIterator[bytes]:
+        """Read a remote file yielding chunks of at most `chunk_size` bytes.
+
+        Reads stop at the end of the file or after `size` bytes. Each chunk
+        is only requested once the previous one has been consumed and
+        `execute_timeout` applies to each read.
+        """
+        async with self._sftp_client() as sftp:
+            async with asyncio.timeout(self.execute_timeout):
+                file = await sftp.open(path, "rb")
+            try:
+                while size is None or size > 0:
+                    read_size = chunk_size if size is None else min(chunk_size, size)
+                    async with asyncio.timeout(self.execute_timeout):
+                        chunk = await file.read(read_size, offset)
+                    if not chunk:
+                        break
+                    offset += len(chunk)
+                    if size is not None:
+                        size -= len(chunk)
+                    yield chunk
+            finally:
+                await file.close()
+        log_backend_command(f"sftp read '{path}'", 0)
+
+    async def sftp_write(self, path: str, chunks: AsyncIterable[bytes]) -> int:
+        """Write the chunks to a remote file, replacing it atomically.
+
+        The chunks are written to a temporary file next to `path`, which is
+        renamed over `path` once complete (keeping the permissions of the
+        replaced file) and removed if writing fails. Returns the number of
+        bytes written, `execute_timeout` applies to each write.
+        """
+        directory, _, name = path.rpartition("/")
+        temp_path = f"{directory}/.{name}.{uuid4().hex[:8]}.f7t-upload"
+        written = 0
+        async with self._sftp_client() as sftp:
+            async with asyncio.timeout(self.execute_timeout):
+                file = await sftp.open(temp_path, "wb")
+            try:
+                try:
+                    async for chunk in chunks:
+                        async with asyncio.timeout(self.execute_timeout):
+                            await file.write(chunk, written)
+                        written += len(chunk)
+                finally:
+                    await file.close()
+
+                async with asyncio.timeout(self.execute_timeout):
+                    try:
+                        attributes = await sftp.stat(path)
+                        await sftp.chmod(temp_path, attributes.permissions & 0o7777)
+                    except SFTPNoSuchFile:
+                        pass
+                    await sftp.posix_rename(temp_path, path)
+            except BaseException:
+                # Best effort, the original error is propagated
+                with suppress(Exception):
+                    async with asyncio.timeout(self.execute_timeout):
+                        await sftp.remove(temp_path)
+                raise
+        log_backend_command(f"sftp write '{path}'", 0)
+        return written
+
     def reset_idle(
         self,
     ) -> None:
-        self.conn.set_extra_info(**{"last_used": time()})
+        self.last_used = time()
 
     def is_idle(self) -> Any:
-        last_used = self.conn.get_extra_info("last_used")
-        return (time() - last_used) > self.idle_timeout
+        if self.leases > 0:
+            return False
+        return (time() - self.last_used) > self.idle_timeout
 
     def close(self) -> None:
+        if self.shell_worker is not None:
+            self.shell_worker.close()
+        self.sftp_session.close()
         self.conn.close()
 
     def is_closed(self):
@@ -155,17 +721,33 @@ class SSHClientPool:
         max_clients: int = 100,
         idle_timeout: int = 60,
         keep_alive: int = 5,
+        max_channels_per_connection: int = 10,
+        max_connections_per_user: int = 4,
+        persistent_shell: bool = False,
+        max_connections_per_tunnel: int = 10,
+        endpoints: List[Tuple[str, int]] = None,
+        endpoint_ejection_threshold: int = 3,
+        endpoint_ejection_time: int = 30,
+        max_capacity_waiters: int = 100,
+        parse_offload_threshold: int = 1024 * 1024,
     ):
-        self.clients: Dict[str, SSHClient] = {}
-        # Intentionally unbounded / never pruned: one entry per distinct
-        # authenticated username seen (~100 bytes each), and this API is
-        # not expected to see enough distinct users over its uptime for
-        # that to matter. Safe pruning would need to be race-free against
-        # get_client() below (a lock fetched here but not yet acquired
-        # must not be pruned and replaced with a different lock instance
-        # for the same user, which would allow two tasks into the
-        # critical section at once and leak an entry in self.clients).
+        # Each user owns a small sub-pool of connections, new connections are
+        # only opened when all the existing ones have no free channel left.
+        self.clients: Dict[str, List[SSHClient]] = {}
+        self.open_connections = 0
+        # Min-heap of (idle deadline, sequence, username, client) of the
+        # clients without leases, so that pruning only visits expired entries.
+        # A client has at most one entry, rescheduled when it has been used
+        # again before its deadline.
+        self.idle_deadlines: List[Tuple[float, int, str, SSHClient]] = []
+        self.idle_sequence = itertools.count()
+        self.pruned_connections = 0
+        self.prune_runs = 0
+        # Per-user locks with the number of tasks holding or waiting for them.
+        # A lock is only dropped once no task references it, so two tasks can
+        # never hold different lock instances for the same user.
         self.user_locks: Dict[str, asyncio.Lock] = {}
+        self.user_lock_refs: Dict[str, int] = {}
         self.host = host
         self.port = port
         self.proxy_host = proxy_host
@@ -177,22 +759,149 @@ class SSHClientPool:
         self.key_provider = key_provider
         self.conn = None
         self.max_clients = max_clients
+        # New users waiting for a connection slot when the pool is full and
+        # no connection can be evicted (FIFO, at most max_capacity_waiters)
+        self.max_capacity_waiters = max_capacity_waiters
+        self.capacity_waiters: deque[asyncio.Future] = deque()
+        self.evictions = 0
+        self.rejections = 0
+        self.capacity_waits = 0
+        self.capacity_wait_time_total = 0.0
+        self.capacity_wait_time_max = 0.0
         self.idle_timeout = idle_timeout
         self.keep_alive = keep_alive
+        self.max_channels_per_connection = max_channels_per_connection
+        self.max_connections_per_user = max_connections_per_user
+        self.persistent_shell = persistent_shell
+        self.parse_offload_threshold = parse_offload_threshold
+        # New connections are balanced among host:port and the additional
+        # login nodes in `endpoints`
+        self.balancer = SSHEndpointBalancer(
+            [(host, port)] + list(endpoints or []),
+            ejection_threshold=endpoint_ejection_threshold,
+            ejection_time=endpoint_ejection_time,
+        )
+        # Connections to the proxy host are shared by the connections of a user
+        self.tunnels = (
+            SSHTunnelPool(
+                proxy_host,
+                proxy_port,
+                max_connections_per_tunnel=max_connections_per_tunnel,
+                idle_timeout=idle_timeout,
+            )
+            if proxy_host
+            else None
+        )
 
         if idle_timeout <= execute_timeout:
             raise ValueError("idle_timeout must be greater than execute_timeout")
+        if max_connections_per_user < 1:
+            raise ValueError("max_connections_per_user must be greater than 0")
+
+    def _add_client(self, username: str, client: SSHClient) -> None:
+        self.clients.setdefault(username, []).append(client)
+        self.open_connections += 1
+
+    def _remove_client(self, username: str, client: SSHClient) -> None:
+        user_clients = self.clients.get(username, [])
+        if client in user_clients:
+            user_clients.remove(client)
+            self.open_connections -= 1
+            if not user_clients:
+                del self.clients[username]
+
+    def _schedule_idle(self, username: str, client: SSHClient) -> None:
+        if not client.idle_scheduled:
+            client.idle_scheduled = True
+            heapq.heappush(
+                self.idle_deadlines,
+                (
+                    client.last_used + client.idle_timeout,
+                    next(self.idle_sequence),
+                    username,
+                    client,
+                ),
+            )
 
     def prune_connection_pool(self):
-        # Note: does not prune self.user_locks, see comment on that field.
-        for client in self.clients.values():
-            if client.is_idle():
+        self.prune_runs += 1
+        now = time()
+        pruned = 0
+        while self.idle_deadlines and self.idle_deadlines[0][0] <= now:
+            _, _, username, client = heapq.heappop(self.idle_deadlines)
+            client.idle_scheduled = False
+            if client not in self.clients.get(username, []):
+                # Already evicted or dropped
+                continue
+            if client.is_closed():
+                self._remove_client(username, client)
+                pruned += 1
+            elif client.leases > 0:
+                # Scheduled again when its last lease is released
+                continue
+            elif client.is_idle():
                 client.close()
+                self._remove_client(username, client)
+                pruned += 1
+            else:
+                # Used again after it was scheduled
+                self._schedule_idle(username, client)
+
+        if pruned > 0:
+            self.pruned_connections += pruned
+            self._notify_capacity_waiter()
+
+        # Tunnels are closed once the connections they forward are pruned
+        if self.tunnels is not None:
+            self.tunnels.prune()
 
-        # remove closed connections
-        self.clients = {
-            k: conn for k, conn in self.clients.items() if not conn.is_closed()
+    def connections_count(self) -> int:
+        return self.open_connections
+
+    def get_stats(self) -> dict:
+        stats = {
+            "users": len(self.clients),
+            "user_locks": len(self.user_locks),
+            "idle_deadlines": len(self.idle_deadlines),
+            "prune_runs": self.prune_runs,
+            "pruned_connections": self.pruned_connections,
+            "connections": self.connections_count(),
+            "channels_active": 0,
+            "channels_waiting": 0,
+            "channels_acquired": 0,
+            "channels_queued": 0,
+            "channel_wait_time_total": 0.0,
+            "channel_wait_time_max": 0.0,
+            "shell_worker_commands": 0,
+            "sftp_sessions": 0,
+            "sftp_operations": 0,
+            "parse_offloads": 0,
+            "evictions": self.evictions,
+            "rejections": self.rejections,
+            "capacity_waiting": len(self.capacity_waiters),
+            "capacity_waits": self.capacity_waits,
+            "capacity_wait_time_total": self.capacity_wait_time_total,
+            "capacity_wait_time_max": self.capacity_wait_time_max,
         }
+        if self.tunnels is not None:
+            stats.update(self.tunnels.get_stats())
+        stats["endpoints"] = self.balancer.get_stats(self._endpoint_outstanding)
+        for user_clients in self.clients.values():
+            for client in user_clients:
+                if client.shell_worker is not None:
+                    stats["shell_worker_commands"] += (
+                        client.shell_worker.commands_executed
+                    )
+                if client.sftp_session.is_open():
+                    stats["sftp_sessions"] += 1
+                stats["sftp_operations"] += client.sftp_session.operations
+                stats["parse_offloads"] += client.parse_offloads
+                for key, value in client.channels.get_stats().items():
+                    if key == "channel_wait_time_max":
+                        stats[key] = max(stats[key], value)
+                    else:
+                        stats[key] += value
+        return stats
 
     async def get_conn_options(self, username: str, jwt_token: str):
         try:
@@ -266,49 +975,199 @@ class SSHClientPool:
 
         logger.error(log_data)
 
-    def _get_user_lock(self, username: str) -> asyncio.Lock:
-        return self.user_locks.setdefault(username, asyncio.Lock())
+    @asynccontextmanager
+    async def _user_lock(self, username: str):
+        # The lock is fetched and referenced without awaiting in between
+        lock = self.user_locks.setdefault(username, asyncio.Lock())
+        self.user_lock_refs[username] = self.user_lock_refs.get(username, 0) + 1
+        try:
+            async with lock:
+                yield
+        finally:
+            self.user_lock_refs[username] -= 1
+            if self.user_lock_refs[username] == 0:
+                del self.user_lock_refs[username]
+                del self.user_locks[username]
+
+    def _select_client(self, username: str) -> Optional[SSHClient]:
+        # Returns the least loaded open connection of the user, or None when a
+        # new connection should be opened for the user.
+        for client in [
+            client for client in self.clients.get(username, []) if client.is_closed()
+        ]:
+            self._remove_client(username, client)
+        user_clients = self.clients.get(username)
+        if not user_clients:
+            return None
+
+        client = min(user_clients, key=lambda client: client.leases)
+        if (
+            client.leases >= client.available_channels
+            and len(user_clients) < self.max_connections_per_user
+            and self.connections_count() < self.max_clients
+        ):
+            return None
+        return client
+
+    def _evict_idle_client(self) -> bool:
+        # Closes the least recently used connection without leases, if any.
+        # Leases are only taken synchronously after a client is selected, so a
+        # client without leases can be closed without holding its user's lock
+        idle_clients = [
+            (username, client)
+            for username, user_clients in self.clients.items()
+            for client in user_clients
+            if client.leases == 0 and not client.is_closed()
+        ]
+        if not idle_clients:
+            return False
+
+        username, client = min(
+            idle_clients,
+            key=lambda item: item[1].last_used,
+        )
+        client.close()
+        self._remove_client(username, client)
+        self.evictions += 1
+        return True
+
+    def _notify_capacity_waiter(self) -> None:
+        while self.capacity_waiters:
+            waiter = self.capacity_waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+
+    async def _wait_for_capacity(self) -> None:
+        # Makes room for a new connection when the pool is full: evicts an
+        # idle connection or waits, for up to connect_timeout, for a lease to
+        # be released
+        start_time = time()
+        waited = False
+        try:
+            while self.connections_count() >= self.max_clients:
+                if self._evict_idle_client():
+                    return
+                if len(self.capacity_waiters) >= self.max_capacity_waiters:
+                    self.rejections += 1
+                    raise SSHConnectionError("SSH connection pool capacity exceeded")
+
+                waiter = asyncio.get_running_loop().create_future()
+                self.capacity_waiters.append(waiter)
+                waited = True
+                try:
+                    async with asyncio.timeout(
+                        start_time + self.connect_timeout - time()
+                    ):
+                        await waiter
+                except TimeoutError:
+                    self.rejections += 1
+                    raise SSHConnectionError(
+                        "SSH connection pool capacity exceeded"
+                    ) from None
+                finally:
+                    if waiter in self.capacity_waiters:
+                        self.capacity_waiters.remove(waiter)
+        finally:
+            if waited:
+                wait_time = time() - start_time
+                self.capacity_waits += 1
+                self.capacity_wait_time_total += wait_time
+                self.capacity_wait_time_max = max(
+                    self.capacity_wait_time_max, wait_time
+                )
+
+    def _endpoint_outstanding(self, endpoint: SSHEndpoint) -> int:
+        return sum(
+            client.channels.active + client.channels.waiting
+            for user_clients in self.clients.values()
+            for client in user_clients
+            if client.endpoint is endpoint
+        )
+
+    async def _connect_endpoint(
+        self,
+        username: str,
+        options: asyncssh.SSHClientConnectionOptions,
+    ) -> Tuple[SSHClientConnection, SSHEndpoint]:
+        # Fails over to the other endpoints when a login node is unreachable.
+        # Failures of the proxy hop are raised as they are, they are not
+        # charged to the endpoints.
+        tried = set()
+        while True:
+            endpoint = self.balancer.select(self._endpoint_outstanding, exclude=tried)
+            tried.add(endpoint)
+            tunnel = None
+            if self.tunnels is not None:
+                tunnel = await self.tunnels.get_tunnel(username, options)
+            start_time = time()
+            try:
+                if tunnel is not None:
+                    conn = await self.tunnels.connect_through(
+                        tunnel, endpoint.host, endpoint.port, options
+                    )
+                else:
+                    conn = await asyncssh.connect(
+                        host=endpoint.host, port=endpoint.port, options=options
+                    )
+            except (OSError, TimeoutError, ConnectionLost) as e:
+                if tunnel is not None and tunnel.is_closed():
+                    raise
+                self.balancer.record_failure(endpoint)
+                if len(tried) == len(self.balancer.endpoints):
+                    raise
+                logging.getLogger("uvicorn.error").warning(
+                    {
+                        "message": f"SSH endpoint {endpoint.name} unreachable, trying next endpoint",
+                        "error.type": e.__class__.__name__,
+                        "error.message": str(e),
+                    }
+                )
+                continue
+            self.balancer.record_success(endpoint, time() - start_time)
+            return conn, endpoint
+
+    async def _connect(self, username: str, jwt_token: str) -> SSHClient:
+        options = None
+        try:
+            options = await self.get_conn_options(username, jwt_token)
+            conn, endpoint = await self._connect_endpoint(username, options)
+        except PermissionDenied as e:
+            await self.get_ssh_debug_info(options, e, username)
+            raise
+        except ProtocolError as e:
+            await self.get_ssh_debug_info(options, e, username)
+            raise
+
+        return SSHClient(
+            conn,
+            idle_timeout=self.idle_timeout,
+            execute_timeout=self.execute_timeout,
+            buffer_limit=self.buffer_limit,
+            keep_alive=self.keep_alive,
+            max_channels=self.max_channels_per_connection,
+            persistent_shell=self.persistent_shell,
+            endpoint=endpoint,
+            parse_offload_threshold=self.parse_offload_threshold,
+        )
 
     @asynccontextmanager
     async def get_client(self, username: str, jwt_token: str):
         client: SSHClient = None
-        user_lock = self._get_user_lock(username)
-        async with user_lock:
-            options = None
+        async with self._user_lock(username):
             try:
-
-                if username in self.clients:
-                    client = self.clients[username]
-                    if client.is_closed():
-                        del self.clients[username]
-                        client = None
+                client = self._select_client(username)
 
                 if client is None:
                     # Note: max_clients is not a hard limit.
                     # Concurrent requests for different users can exceed this limit.
-                    if len(self.clients) >= self.max_clients:
-                        raise SSHConnectionError(
-                            "SSH connection pool capacity exceeded"
-                        )
-                    options = await self.get_conn_options(username, jwt_token)
-                    proxy = ()
-                    if self.proxy_host:
-                        proxy = await asyncssh.connect(
-                            host=self.proxy_host, port=self.proxy_port, options=options
-                        )
-
-                    conn = await asyncssh.connect(
-                        host=self.host, port=self.port, options=options, tunnel=proxy
-                    )
-
-                    client = SSHClient(
-                        conn,
-                        idle_timeout=self.idle_timeout,
-                        execute_timeout=self.execute_timeout,
-                        buffer_limit=self.buffer_limit,
-                        keep_alive=self.keep_alive,
-                    )
-                    self.clients[username] = client
+                    if self.connections_count() >= self.max_clients:
+                        await self._wait_for_capacity()
+                    client = await self._connect(username, jwt_token)
+                    self._add_client(username, client)
+                # Reserve the client while the user lock is held, so that
+                # concurrent requests see its load when selecting a connection
+                client.leases += 1
             except TimeoutError as e:
                 raise TimeoutLimitExceeded(
                     "SSH connection timeout limit exceeded."
@@ -316,10 +1175,8 @@ class SSHClientPool:
             except (ConnectionLost, ConnectionResetError) as e:
                 raise SSHConnectionError("Unable to establish SSH connection.") from e
             except PermissionDenied as e:
-                await self.get_ssh_debug_info(options, e, username)
                 raise SSHConnectionError("Unable to establish SSH connection.") from e
             except ProtocolError as e:
-                await self.get_ssh_debug_info(options, e, username)
                 raise SSHConnectionError("SSH Protocol Error.") from e
         try:
             client.reset_idle()
@@ -328,3 +1185,10 @@ class SSHClientPool:
             raise SSHConnectionError("SSH connection Reset.") from e
         except ProtocolError as e:
             raise SSHConnectionError("SSH Protocol Error.") from e
+        finally:
+            client.leases -= 1
+            client.reset_idle()
+            if client.leases == 0:
+                self._schedule_idle(username, client)
+                if self.capacity_waiters:
+                    self._notify_capacity_waiter()
@@ -0,0 +1,112 @@
+# Copyright (c) 2025, ETH Zurich. All rights reserved.
+#
+# Please, refer to the LICENSE file in the root directory.
+# SPDX-License-Identifier: BSD-3-Clause
+
+from time import time
+from typing import Callable, Dict, List, Optional, Set, Tuple
+
+
+class SSHEndpoint:
+
+    def __init__(self, host: str, port: int):
+        self.host = host
+        self.port = port
+        # Exponentially weighted moving average of the connection setup time
+        self.latency_ewma: float = None
+        self.consecutive_failures = 0
+        self.ejected_until = 0.0
+        self.connections_opened = 0
+        self.failures = 0
+        self.ejections = 0
+
+    @property
+    def name(self) -> str:
+        return f"{self.host}:{self.port}"
+
+    def is_ejected(self, now: float) -> bool:
+        return self.ejected_until > now
+
+
+class SSHEndpointBalancer:
+    """Selects the login node of a system on which to open a new connection.
+
+    The cost of an endpoint is its connection latency EWMA weighted by its
+    outstanding channels (active and queued) plus one, endpoints without a
+    latency sample yet are tried first. After `ejection_threshold`
+    consecutive connection failures an endpoint is ejected for
+    `ejection_time` seconds. When all the endpoints are ejected, the one
+    whose ejection ends first is used.
+    """
+
+    def __init__(
+        self,
+        endpoints: List[Tuple[str, int]],
+        ejection_threshold: int = 3,
+        ejection_time: int = 30,
+        latency_decay: float = 0.3,
+    ):
+        if not endpoints:
+            raise ValueError("At least one SSH endpoint is required")
+        self.endpoints = [SSHEndpoint(host, port) for host, port in endpoints]
+        self.ejection_threshold = ejection_threshold
+        self.ejection_time = ejection_time
+        self.latency_decay = latency_decay
+
+    def select(
+        self,
+        outstanding: Callable[[SSHEndpoint], int],
+        exclude: Optional[Set[SSHEndpoint]] = None,
+    ) -> Optional[SSHEndpoint]:
+        candidates = [
+            endpoint for endpoint in self.endpoints if endpoint not in (exclude or ())
+        ]
+        if not candidates:
+            return None
+
+        now = time()
+        available = [
+            endpoint for endpoint in candidates if not endpoint.is_ejected(now)
+        ]
+        if not available:
+            return min(candidates, key=lambda endpoint: endpoint.ejected_until)
+
+        def cost(endpoint: SSHEndpoint) -> float:
+            if endpoint.latency_ewma is None:
+                return 0.0
+            return endpoint.latency_ewma * (outstanding(endpoint) + 1)
+
+        return min(available, key=cost)
+
+    def record_success(self, endpoint: SSHEndpoint, latency: float) -> None:
+        endpoint.connections_opened += 1
+        endpoint.consecutive_failures = 0
+        endpoint.ejected_until = 0.0
+        if endpoint.latency_ewma is None:
+            endpoint.latency_ewma = latency
+        else:
+            endpoint.latency_ewma += self.latency_decay * (
+                latency - endpoint.latency_ewma
+            )
+
+    def record_failure(self, endpoint: SSHEndpoint) -> None:
+        endpoint.failures += 1
+        endpoint.consecutive_failures += 1
+        if endpoint.consecutive_failures >= self.ejection_threshold:
+            endpoint.consecutive_failures = 0
+            endpoint.ejected_until = time() + self.ejection_time
+            endpoint.ejections += 1
+
+    def get_stats(self, outstanding: Callable[[SSHEndpoint], int]) -> Dict[str, dict]:
+        now = time()
+        return {
+            endpoint.name: {
+                "outstanding_channels": outstanding(endpoint),
+                "latency_ewma": endpoint.latency_ewma,
+                "connections_opened": endpoint.connections_opened,
+                "failures": endpoint.failures,
+                "ejections": endpoint.ejections,
+                "ejected": endpoint.is_ejected(now),
+            }
+            for endpoint in self.endpoints
+        }
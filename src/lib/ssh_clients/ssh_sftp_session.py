@@ -0,0 +1,47 @@
+# Copyright (c) 2025, ETH Zurich. All rights reserved.
+#
+# Please, refer to the LICENSE file in the root directory.
+# SPDX-License-Identifier: BSD-3-Clause
+
+import asyncio
+
+from asyncssh import SFTPClient, SSHClientConnection
+
+from lib.ssh_clients.ssh_channel_limiter import SSHChannelLimiter
+
+
+class SSHSftpSession:
+    """SFTP client session kept open on a pooled SSH connection.
+
+    The session is started on first use and holds one of the connection's
+    channels until it is closed. SFTP requests are multiplexed over that
+    channel, so any number of reads and writes can run on it concurrently.
+    """
+
+    def __init__(self, conn: SSHClientConnection, channels: SSHChannelLimiter):
+        self.conn = conn
+        self.channels = channels
+        self.sftp: SFTPClient = None
+        self.lock = asyncio.Lock()
+        self.operations = 0
+
+    def is_open(self) -> bool:
+        return self.sftp is not None
+
+    async def start(self) -> SFTPClient:
+        async with self.lock:
+            if self.sftp is None:
+                await self.channels.acquire()
+                try:
+                    self.sftp = await self.conn.start_sftp_client()
+                except BaseException:
+                    self.channels.release()
+                    raise
+            self.operations += 1
+            return self.sftp
+
+    def close(self) -> None:
+        if self.sftp is not None:
+            self.sftp.exit()
+            self.sftp = None
+            self.channels.release()
@@ -0,0 +1,141 @@
+# Copyright (c) 2025, ETH Zurich. All rights reserved.
+#
+# Please, refer to the LICENSE file in the root directory.
+# SPDX-License-Identifier: BSD-3-Clause
+
+import asyncio
+from typing import Tuple
+from uuid import uuid4
+
+from asyncssh import SSHClientConnection, SSHClientProcess, SSHReader
+
+from lib.ssh_clients.ssh_channel_limiter import SSHChannelLimiter
+
+
+# `exec` keeps the environment set up by the user's login shell for the exec
+# channel while replacing it with a plain bash reading commands from stdin
+SHELL_WORKER_COMMAND = "exec bash --noprofile --norc"
+
+READ_CHUNK_SIZE = 64 * 1024
+
+
+class ShellWorkerError(Exception):
+    pass
+
+
+class ShellWorkerOutputLimitExceeded(ShellWorkerError):
+    pass
+
+
+class SSHShellWorker:
+    """Long-lived remote bash process executing framed commands over one channel.
+
+    Each command runs in a subshell with stdin from /dev/null and is followed
+    by a random end-of-frame token, printed with the exit status on stdout and
+    alone on stderr. Commands are executed one at a time. After any error
+    (timeout, cancellation, output limit) the remote state is unknown, the
+    worker is closed and restarted on the next command.
+    """
+
+    def __init__(
+        self,
+        conn: SSHClientConnection,
+        channels: SSHChannelLimiter,
+        buffer_limit: int = 5 * 1024 * 1024,
+    ):
+        self.conn = conn
+        self.channels = channels
+        self.buffer_limit = buffer_limit
+        self.process: SSHClientProcess = None
+        self.lock = asyncio.Lock()
+        self.commands_executed = 0
+
+    @property
+    def busy(self) -> bool:
+        return self.lock.locked()
+
+    def is_alive(self) -> bool:
+        return self.process is not None and not self.process.is_closing()
+
+    async def _start(self) -> None:
+        # The worker permanently holds one of the connection's channels
+        await self.channels.acquire()
+        try:
+            self.process = await self.conn.create_process(
+                SHELL_WORKER_COMMAND, encoding=None
+            )
+        except BaseException:
+            self.channels.release()
+            raise
+
+    def close(self) -> None:
+        if self.process is not None:
+            self.process.close()
+            self.process = None
+            self.channels.release()
+
+    async def _read_frame(
+        self, reader: SSHReader, end_marker: bytes, with_status: bool
+    ) -> Tuple[bytes, int]:
+        data = bytearray()
+        search_from = 0
+        while True:
+            index = data.find(end_marker, search_from)
+            if index >= 0:
+                if not with_status:
+                    return bytes(data[:index]), None
+                status_end = data.find(b"\n", index + len(end_marker))
+                if status_end >= 0:
+                    status = int(data[index + len(end_marker) : status_end])
+                    return bytes(data[:index]), status
+            else:
+                search_from = max(0, len(data) - len(end_marker))
+
+            if len(data) > self.buffer_limit + len(end_marker) + 16:
+                raise ShellWorkerOutputLimitExceeded(
+                    "Command output exceeded buffer limit."
+                )
+            chunk = await reader.read(READ_CHUNK_SIZE)
+            if not chunk:
+                raise ShellWorkerError("Remote shell worker terminated unexpectedly.")
+            data += chunk
+
+    async def execute(self, command_line: str) -> Tuple[bytes, bytes, int]:
+        async with self.lock:
+            try:
+                if not self.is_alive():
+                    self.close()
+                    await self._start()
+
+                token = uuid4().hex
+                self.process.stdin.write(
+                    (
+                        f"( {command_line}\n) </dev/null; __f7t_status=$?; "
+                        f"printf '\\n%s:%d\\n' {token} $__f7t_status; "
+                        f"printf '\\n%s\\n' {token} >&2\n"
+                    ).encode()
+                )
+                readers = [
+                    asyncio.ensure_future(
+                        self._read_frame(
+                            self.process.stdout, f"\n{token}:".encode(), True
+                        )
+                    ),
+                    asyncio.ensure_future(
+                        self._read_frame(
+                            self.process.stderr, f"\n{token}\n".encode(), False
+                        )
+                    ),
+                ]
+                try:
+                    (stdout, exit_status), (stderr, _) = await asyncio.gather(
+                        *readers
+                    )
+                finally:
+                    for reader in readers:
+                        reader.cancel()
+                self.commands_executed += 1
+                return stdout, stderr, exit_status
+            except BaseException:
+                self.close()
+                raise
@@ -0,0 +1,140 @@
+# Copyright (c) 2025, ETH Zurich. All rights reserved.
+#
+# Please, refer to the LICENSE file in the root directory.
+# SPDX-License-Identifier: BSD-3-Clause
+
+from time import time
+from typing import Dict, List, Optional
+
+import asyncssh
+from asyncssh import SSHClientConnection, SSHClientConnectionOptions
+
+
+class SSHTunnel:
+
+    def __init__(self, conn: SSHClientConnection):
+        self.conn = conn
+        # SSH connections forwarded through this tunnel, one channel each
+        self.connections: List[SSHClientConnection] = []
+        self.last_used = time()
+
+    def active_connections(self) -> int:
+        self.connections = [conn for conn in self.connections if not conn.is_closed()]
+        return len(self.connections)
+
+    def is_closed(self) -> bool:
+        return self.conn.is_closed()
+
+    def close(self) -> None:
+        self.conn.close()
+
+
+class SSHTunnelPool:
+    """Connections to a jump host shared by the SSH connections of each user.
+
+    Tunnels are authenticated with the credentials of the user, so they are
+    only shared among the connections of that user. A tunnel forwards up to
+    `max_connections_per_tunnel` connections before a new one is opened, and
+    is closed by `prune` once it forwards no connection and has been unused
+    for `idle_timeout` seconds.
+    Callers must serialize `connect` calls of the same user.
+    """
+
+    def __init__(
+        self,
+        host: str,
+        port: int,
+        max_connections_per_tunnel: int = 10,
+        idle_timeout: int = 60,
+    ):
+        self.host = host
+        self.port = port
+        self.max_connections_per_tunnel = max_connections_per_tunnel
+        self.idle_timeout = idle_timeout
+        self.tunnels: Dict[str, List[SSHTunnel]] = {}
+        self.tunnels_opened = 0
+        self.tunnels_reused = 0
+
+    def _select_tunnel(self, username: str) -> Optional[SSHTunnel]:
+        user_tunnels = [
+            tunnel for tunnel in self.tunnels.get(username, []) if not tunnel.is_closed()
+        ]
+        self.tunnels[username] = user_tunnels
+        available = [
+            tunnel
+            for tunnel in user_tunnels
+            if tunnel.active_connections() < self.max_connections_per_tunnel
+        ]
+        if not available:
+            return None
+        return min(available, key=lambda tunnel: len(tunnel.connections))
+
+    async def get_tunnel(
+        self, username: str, options: SSHClientConnectionOptions
+    ) -> SSHTunnel:
+        tunnel = self._select_tunnel(username)
+        if tunnel is None:
+            tunnel_conn = await asyncssh.connect(
+                host=self.host, port=self.port, options=options
+            )
+            tunnel = SSHTunnel(tunnel_conn)
+            self.tunnels[username].append(tunnel)
+            self.tunnels_opened += 1
+        else:
+            self.tunnels_reused += 1
+        return tunnel
+
+    async def connect_through(
+        self,
+        tunnel: SSHTunnel,
+        host: str,
+        port: int,
+        options: SSHClientConnectionOptions,
+    ) -> SSHClientConnection:
+        tunnel.last_used = time()
+        conn = await asyncssh.connect(
+            host=host, port=port, options=options, tunnel=tunnel.conn
+        )
+        tunnel.connections.append(conn)
+        return conn
+
+    async def connect(
+        self,
+        username: str,
+        host: str,
+        port: int,
+        options: SSHClientConnectionOptions,
+    ) -> SSHClientConnection:
+        tunnel = await self.get_tunnel(username, options)
+        return await self.connect_through(tunnel, host, port, options)
+
+    def prune(self) -> None:
+        now = time()
+        tunnels = {}
+        for username, user_tunnels in self.tunnels.items():
+            kept_tunnels = []
+            for tunnel in user_tunnels:
+                if tunnel.is_closed():
+                    continue
+                if tunnel.active_connections() > 0:
+                    tunnel.last_used = now
+                elif now - tunnel.last_used > self.idle_timeout:
+                    tunnel.close()
+                    continue
+                kept_tunnels.append(tunnel)
+            if kept_tunnels:
+                tunnels[username] = kept_tunnels
+        self.tunnels = tunnels
+
+    def get_stats(self) -> dict:
+        user_tunnels = [
+            tunnel for tunnels in self.tunnels.values() for tunnel in tunnels
+        ]
+        return {
+            "tunnels": len(user_tunnels),
+            "tunnel_connections": sum(
+                len(tunnel.connections) for tunnel in user_tunnels
+            ),
+            "tunnels_opened": self.tunnels_opened,
+            "tunnels_reused": self.tunnels_reused,
+        }
@@ -0,0 +1,25 @@
+# Copyright (c) 2025, ETH Zurich. All rights reserved.
+#
+# Please, refer to the LICENSE file in the root directory.
+# SPDX-License-Identifier: BSD-3-Clause
+
+
+def synthetic_ls_listing(entries: int, entries_per_folder: int = 1000) -> str:
+    """Output of `ls -l -R --quoting-style=c` with `entries` files in total."""
+    lines = []
+    for folder in range(max(1, entries // entries_per_folder)):
+        lines.append(f'"/home/user/data/folder-{folder}":')
+        lines.append(f"total {entries_per_folder * 4}")
+        for i in range(entries_per_folder):
+            if i % 50 == 0:
+                lines.append(
+                    f"lrwxrwxrwx 1 user group 12 2024-06-14T09:01:25 "
+                    f'"link \\"{i}\\"" -> "target-{i}"'
+                )
+            else:
+                lines.append(
+                    f"-rw-r--r-- 1 user group {i * 37} 2024-06-14T09:01:25 "
+                    f'"file {i}\\twith tab.txt"'
+                )
+        lines.append("")
+    return "\n".join(lines)
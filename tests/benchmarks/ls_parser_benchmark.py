@@ -0,0 +1,94 @@
+# Copyright (c) 2025, ETH Zurich. All rights reserved.
+#
+# Please, refer to the LICENSE file in the root directory.
+# SPDX-License-Identifier: BSD-3-Clause
+
+# Compares the `ls` output parser with the previous per-line parser
+# (re.finditer + shlex.split + a `File` model per entry) on synthetic
+# listings. The new parser returns plain dicts, the `File` models are built
+# when the response is serialized, so that step is measured as well.
+#
+# Usage: PYTHONPATH=src python -m tests.benchmarks.ls_parser_benchmark [entries ...]
+
+import re
+import shlex
+import sys
+from time import perf_counter
+
+from pydantic import TypeAdapter
+
+from firecrest.filesystem.ops.commands.ls_command import LsCommand
+from firecrest.filesystem.ops.models import File
+from tests.benchmarks.ls_listing import synthetic_ls_listing
+
+
+def legacy_parse_folder(folder_content: str, path: str = ""):
+    file_pattern = (
+        r"^(?P<type>\S)(?P<permissions>\S+)\s+\d+\s+(?P<user>\S+)\s+"
+        r"(?P<group>\S+)\s+(?P<size>\d+)\s+(?P<last_modified>(\d|-|T|:)+)\s+(?P<filename>.+)$"
+    )
+    file_list = []
+    for entry in folder_content.splitlines():
+        for m in re.finditer(file_pattern, entry):
+            tokens = shlex.split(m.group("filename"))
+            if len(tokens) == 1:
+                name, link_target = tokens[0], None
+            elif len(tokens) == 3:
+                name, link_target = tokens[0], tokens[2]
+            else:
+                continue
+            file_list.append(
+                File(
+                    name=path + name,
+                    type=m.group("type"),
+                    link_target=link_target,
+                    user=m.group("user"),
+                    group=m.group("group"),
+                    permissions=m.group("permissions"),
+                    last_modified=m.group("last_modified"),
+                    size=m.group("size"),
+                )
+            )
+    return file_list
+
+
+def legacy_parse(stdout: str):
+    file_list = []
+    folders = re.split(r"\"(.+)\":\n", stdout)
+    root_folder = ""
+    for i in range(1, len(folders), 2):
+        folder = folders[i].rstrip("/")
+        if i == 1:
+            root_folder = folder + "/"
+        folder_name = (folder + "/")[
+            (folder + "/").startswith(root_folder) and len(root_folder) :
+        ]
+        file_list += legacy_parse_folder(folders[i + 1], folder_name)
+    return file_list
+
+
+def timed(function, *args):
+    start = perf_counter()
+    result = function(*args)
+    return result, perf_counter() - start
+
+
+def main(sizes):
+    files_adapter = TypeAdapter(list[File])
+    command = LsCommand("/home/user/data", recursive=True)
+    for entries in sizes:
+        stdout = synthetic_ls_listing(entries)
+        legacy, legacy_time = timed(legacy_parse, stdout)
+        records, parse_time = timed(command.parse_output, stdout, "", 0)
+        _, models_time = timed(files_adapter.validate_python, records)
+        assert len(records) == len(legacy) == entries
+
+        print(f"{entries} entries ({len(stdout) / 1024 / 1024:.1f} MiB)")
+        print(f"  previous parser:           {legacy_time:7.2f}s")
+        print(f"  single-pass parser:        {parse_time:7.2f}s")
+        print(f"  + File models at response: {parse_time + models_time:7.2f}s")
+        print(f"  speedup: x{legacy_time / (parse_time + models_time):.1f}")
+
+
+if __name__ == "__main__":
+    main([int(size) for size in sys.argv[1:]] or [100_000, 1_000_000])
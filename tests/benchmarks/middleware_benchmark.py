@@ -0,0 +1,126 @@
+# Copyright (c) 2025, ETH Zurich. All rights reserved.
+#
+# Please, refer to the LICENSE file in the root directory.
+# SPDX-License-Identifier: BSD-3-Clause
+
+# Per-request latency and throughput of the request middlewares, as the
+# previous stack of `@app.middleware("http")` layers and RawContextMiddleware
+# and as the single RequestMiddleware, under concurrent requests.
+#
+# Usage: PYTHONPATH=src python -m tests.benchmarks.middleware_benchmark [requests]
+
+import asyncio
+import statistics
+import sys
+import types
+from time import perf_counter
+
+import httpx
+from fastapi import FastAPI, Request
+from fastapi.responses import StreamingResponse
+from starlette_context import plugins
+from starlette_context.middleware import RawContextMiddleware
+
+from lib import request_vars
+from lib.handlers.api_response_handler import meta_headers
+from lib.middleware import RequestMiddleware
+
+
+CONCURRENCY = 50
+
+CONTEXT_PLUGINS = (plugins.RequestIdPlugin(), plugins.CorrelationIdPlugin())
+
+
+def add_routes(app: FastAPI) -> FastAPI:
+    @app.get("/status/systems")
+    async def get_systems():
+        return {"systems": [{"name": f"cluster-{i}"} for i in range(10)]}
+
+    @app.get("/filesystem/cluster/ops/download")
+    async def download():
+        async def chunks():
+            for _ in range(16):
+                yield b"x" * 4096
+
+        return StreamingResponse(chunks())
+
+    return app
+
+
+def layered_app() -> FastAPI:
+    app = FastAPI(version="2.x.x")
+
+    # The layers as registered by `register_middlewares` before RequestMiddleware,
+    # with the tracing log disabled
+    @app.middleware("http")
+    async def init_request_vars(request: Request, call_next):
+        request_vars.request_global.set(types.SimpleNamespace())
+        return await call_next(request)
+
+    @app.middleware("http")
+    async def init_response_headers(request: Request, call_next):
+        headers = meta_headers(request)
+        response = await call_next(request)
+        response.headers.update(headers)
+        return response
+
+    @app.middleware("http")
+    async def log_middleware(request: Request, call_next):
+        return await call_next(request)
+
+    @app.middleware("http")
+    async def lower_case_path(request: Request, call_next):
+        request.scope["path"] = request.scope["path"].lower()
+        return await call_next(request)
+
+    app.add_middleware(RawContextMiddleware, plugins=CONTEXT_PLUGINS)
+    return add_routes(app)
+
+
+def asgi_app() -> FastAPI:
+    app = FastAPI(version="2.x.x")
+    app.add_middleware(RequestMiddleware, plugins=CONTEXT_PLUGINS)
+    return add_routes(app)
+
+
+async def measure(name: str, app: FastAPI, path: str, requests: int) -> None:
+    semaphore = asyncio.Semaphore(CONCURRENCY)
+    latencies = []
+
+    async with httpx.AsyncClient(
+        transport=httpx.ASGITransport(app=app), base_url="http://firecrest"
+    ) as client:
+
+        async def request() -> None:
+            async with semaphore:
+                start = perf_counter()
+                response = await client.get(path)
+                latencies.append(perf_counter() - start)
+                assert response.status_code == 200
+
+        # Warm up
+        await asyncio.gather(*(request() for _ in range(CONCURRENCY)))
+        latencies.clear()
+
+        start = perf_counter()
+        await asyncio.gather(*(request() for _ in range(requests)))
+        elapsed = perf_counter() - start
+
+    latencies.sort()
+    print(
+        f"{name:>8} {path:<34} {requests / elapsed:8.0f} req/s, latency "
+        f"mean {statistics.mean(latencies) * 1000:6.2f}ms "
+        f"p50 {latencies[len(latencies) // 2] * 1000:6.2f}ms "
+        f"p99 {latencies[int(len(latencies) * 0.99)] * 1000:6.2f}ms"
+    )
+
+
+async def main(requests: int) -> None:
+    print(f"{requests} requests, {CONCURRENCY} concurrent")
+    for path in ["/status/systems", "/filesystem/cluster/ops/download"]:
+        await measure("layered", layered_app(), path, requests)
+        await measure("asgi", asgi_app(), path, requests)
+
+
+if __name__ == "__main__":
+    asyncio.run(main(int(sys.argv[1]) if len(sys.argv) > 1 else 5000))
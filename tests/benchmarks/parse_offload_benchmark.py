@@ -0,0 +1,50 @@
+# Copyright (c) 2025, ETH Zurich. All rights reserved.
+#
+# Please, refer to the LICENSE file in the root directory.
+# SPDX-License-Identifier: BSD-3-Clause
+
+# Event loop lag while a large `ls -R` output is parsed, inline or in a
+# worker thread as done by SSHClient for outputs above parse_offload_threshold.
+#
+# Usage: PYTHONPATH=src python -m tests.benchmarks.parse_offload_benchmark [entries]
+
+import asyncio
+import sys
+from time import perf_counter
+
+from firecrest.filesystem.ops.commands.ls_command import LsCommand
+from lib.loggers.loop_lag_monitor import LoopLagMonitor
+from lib.ssh_clients.ssh_client import decode_and_parse_output
+from tests.benchmarks.ls_listing import synthetic_ls_listing
+
+
+async def measure(stdout: bytes, offload: bool) -> None:
+    command = LsCommand("/home/user/data", recursive=True)
+    monitor = LoopLagMonitor(interval=0.01)
+    monitor.start()
+    start = perf_counter()
+    if offload:
+        files = await asyncio.get_running_loop().run_in_executor(
+            None, decode_and_parse_output, command, stdout, b"", 0
+        )
+    else:
+        files = decode_and_parse_output(command, stdout, b"", 0)
+    elapsed = perf_counter() - start
+    await asyncio.sleep(0.02)
+    monitor.stop()
+    stats = monitor.get_stats()
+    print(
+        f"{'offloaded' if offload else 'inline':>9}: {len(files)} entries parsed in "
+        f"{elapsed:.2f}s, loop lag max {stats['lag_max'] * 1000:.1f}ms"
+    )
+
+
+async def main(entries: int) -> None:
+    stdout = synthetic_ls_listing(entries).encode()
+    print(f"ls -R output of {len(stdout) / 1024 / 1024:.1f} MiB")
+    await measure(stdout, offload=False)
+    await measure(stdout, offload=True)
+
+
+if __name__ == "__main__":
+    asyncio.run(main(int(sys.argv[1]) if len(sys.argv) > 1 else 200_000))
@@ -3,11 +3,18 @@
 # Please, refer to the LICENSE file in the root directory.
 # SPDX-License-Identifier: BSD-3-Clause
 
-from firecrest.filesystem.ops.models import File
+import asyncio
+import json
+from contextlib import asynccontextmanager
+
+from firecrest.filesystem.ops import ls_cache as ls_cache_module
+from firecrest.filesystem.ops.models import File, MAX_BATCH_OPERATIONS
+from firecrest.filesystem.ops.router import _entries_stream, _prefetch_stream
 import pytest
 
 from tests.helpers import load_ssh_output, helper_test_ls_command
 
+from lib.ssh_clients.ssh_client import SSHConnectionError
 from tests.mock_ssh_client import MockedCommand
 
 
@@ -170,6 +177,222 @@ async def test_ls_dereference_command(client, ssh_client, mocked_ssh_ls_folllow_
         assert response.json()["output"][7]["name"] == "b/tt_link/file"
 
 
+async def test_ls_command_unquotes_c_quoted_names(client, ssh_client):
+    stdout = (
+        '"/home/test1":\n'
+        "total 8\n"
+        '-rw-r--r-- 1 test1 test1 5 2024-06-14T09:01:25 "tab\\there \\"quoted\\""\n'
+        'lrwxrwxrwx 1 test1 test1 9 2024-06-14T09:01:25 "link" -> "caf\\303\\251"\n'
+        'drwxr-xr-x 2 test1 test1 4096 2024-06-14T09:01:25 "sub dir"\n'
+        "\n"
+        '"/home/test1/sub dir":\n'
+        "total 0\n"
+        '-rw-r--r-- 1 test1 test1 0 2024-06-14T09:01:25 "back\\\\slash"'
+    )
+    async with ssh_client.mocked_output(
+        [MockedCommand(command="ls", stdout=stdout, stderr="")]
+    ):
+        response = client.get(
+            "/filesystem/cluster-slurm-ssh/ops/ls?path=/home/test1&recursive=true"
+        )
+
+    assert response.status_code == 200
+    output = response.json()["output"]
+    assert [file["name"] for file in output] == [
+        'tab\there "quoted"',
+        "link",
+        "sub dir",
+        "sub dir/back\\slash",
+    ]
+    assert output[1]["linkTarget"] == "café"
+    assert output[0]["size"] == "5"
+
+
+LS_PAGINATION_OUTPUT = (
+    "total 12\n"
+    '-rw-r--r-- 1 test1 test1 0 2024-06-14T09:01:25 "c"\n'
+    '-rw-r--r-- 1 test1 test1 0 2024-06-14T09:01:25 "a"\n'
+    '-rw-r--r-- 1 test1 test1 0 2024-06-14T09:01:25 "d"\n'
+    '-rw-r--r-- 1 test1 test1 0 2024-06-14T09:01:25 "b"\n'
+    '-rw-r--r-- 1 test1 test1 0 2024-06-14T09:01:25 "e"\n'
+)
+
+
+async def test_ls_command_pagination(client, ssh_client):
+    pages = []
+    cursor = None
+    while True:
+        params = {"path": "/home/test1", "limit": 2}
+        if cursor is not None:
+            params["cursor"] = cursor
+        async with ssh_client.mocked_output(
+            [MockedCommand(command="ls", stdout=LS_PAGINATION_OUTPUT, stderr="")]
+        ):
+            response = client.get(
+                "/filesystem/cluster-slurm-ssh/ops/ls", params=params
+            )
+        assert response.status_code == 200
+        pages.append([file["name"] for file in response.json()["output"]])
+        cursor = response.json()["nextCursor"]
+        if cursor is None:
+            break
+
+    assert pages == [["a", "b"], ["c", "d"], ["e"]]
+
+
+async def test_ls_command_ndjson_stream(client, ssh_client):
+    async with ssh_client.mocked_output(
+        [MockedCommand(command="ls", stdout=LS_PAGINATION_OUTPUT, stderr="")]
+    ):
+        response = client.get(
+            "/filesystem/cluster-slurm-ssh/ops/ls?path=/home/test1&limit=3",
+            headers={"Accept": "application/x-ndjson"},
+        )
+
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/x-ndjson"
+    entries = [File(**json.loads(line)) for line in response.text.splitlines()]
+    # Entries are streamed in listing order
+    assert [entry.name for entry in entries] == ["c", "a", "d"]
+
+
+async def test_ls_command_ndjson_stream_error(client, ssh_client):
+    async with ssh_client.mocked_output(
+        [
+            MockedCommand(
+                command="ls",
+                stdout="",
+                stderr="ls: cannot access '/home/missing': No such file or directory",
+                exit_code=2,
+            )
+        ]
+    ):
+        response = client.get(
+            "/filesystem/cluster-slurm-ssh/ops/ls?path=/home/missing",
+            headers={"Accept": "application/x-ndjson"},
+        )
+
+    assert response.status_code == 404
+
+
+async def test_ls_command_ndjson_stream_late_error(client, ssh_client):
+    async with ssh_client.mocked_output(
+        [
+            MockedCommand(
+                command="ls",
+                stdout=LS_PAGINATION_OUTPUT,
+                stderr="ls: cannot open directory '/home/test1/d': Permission denied",
+                exit_code=2,
+            )
+        ]
+    ):
+        response = client.get(
+            "/filesystem/cluster-slurm-ssh/ops/ls?path=/home/test1",
+            headers={"Accept": "application/x-ndjson"},
+        )
+
+    # The error comes once entries were sent, it ends the stream
+    assert response.status_code == 200
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert [line["name"] for line in lines[:-1]] == ["c", "a", "d", "b", "e"]
+    assert lines[-1]["error"]["statusCode"] == 403
+
+
+FIND_OUTPUT = (
+    "-rw-r--r-- test1 users 8 2024-01-01T10:00:00.1234567890\0job.out\0\0"
+    "lrwxrwxrwx test1 users 7 2024-01-02T10:00:00.0000000000\0last.out\0job.out\0"
+    "-rw-r--r-- test1 users 5 2024-01-03T10:00:00.0000000000\0run 2/job.out\0\0"
+)
+
+
+async def test_find_command(client, ssh_client):
+    params = {"path": "/home/test1", "name": "*.out", "maxDepth": 2, "minSize": 1}
+    async with ssh_client.mocked_output(
+        [MockedCommand(command="find -P '/home/test1'", stdout=FIND_OUTPUT)]
+    ):
+        response = client.get("/filesystem/cluster-slurm-ssh/ops/find", params=params)
+        assert response.status_code == 200
+        assert response.json()["truncated"] is False
+        entries = [File(**entry) for entry in response.json()["output"]]
+        assert [entry.name for entry in entries] == [
+            "job.out",
+            "last.out",
+            "run 2/job.out",
+        ]
+        assert entries[1].type == "l"
+        assert entries[1].link_target == "job.out"
+        assert entries[0].last_modified == "2024-01-01T10:00:00"
+
+        response = client.get(
+            "/filesystem/cluster-slurm-ssh/ops/find", params={**params, "limit": 2}
+        )
+        assert response.json()["truncated"] is True
+        assert len(response.json()["output"]) == 2
+
+        response = client.get(
+            "/filesystem/cluster-slurm-ssh/ops/find",
+            params={**params, "limit": 1},
+            headers={"Accept": "application/x-ndjson"},
+        )
+        assert response.headers["content-type"] == "application/x-ndjson"
+        assert [json.loads(line)["name"] for line in response.text.splitlines()] == [
+            "job.out"
+        ]
+
+
+async def test_du_command(
+    client, ssh_client, slurm_cluster_with_ssh_config, monkeypatch
+):
+    # Results are only cached on the file systems with a `du_cache_ttl`
+    monkeypatch.setattr(ls_cache_module, "du_caches", {})
+    for file_system in slurm_cluster_with_ssh_config.file_systems:
+        monkeypatch.setattr(file_system, "du_cache_ttl", 60)
+
+    du_output = (
+        "4096\t/home/test1/usage/a\0"
+        "12288\t/home/test1/usage/b\0"
+        "20480\t/home/test1/usage\0"
+    )
+    async with ssh_client.mocked_output(
+        [MockedCommand(command="du --block-size=1", stdout=du_output)]
+    ):
+        response = client.get(
+            "/filesystem/cluster-slurm-ssh/ops/du?path=/home/test1/usage"
+        )
+    assert response.status_code == 200
+    assert response.json()["output"] == {
+        "path": "/home/test1/usage",
+        "size": 20480,
+        "entries": [{"name": "b", "size": 12288}, {"name": "a", "size": 4096}],
+    }
+
+    # Results are cached until the directory is modified
+    failure = MockedCommand(
+        command="du --block-size=1",
+        stdout="",
+        stderr="du: cannot access '/home/test1/usage': No such file or directory",
+        exit_code=1,
+    )
+    async with ssh_client.mocked_output(
+        [failure, MockedCommand(command="mkdir", stdout="")]
+    ):
+        response = client.get(
+            "/filesystem/cluster-slurm-ssh/ops/du?path=/home/test1/usage"
+        )
+        assert response.status_code == 200
+        assert response.json()["output"]["size"] == 20480
+
+        response = client.post(
+            "/filesystem/cluster-slurm-ssh/ops/mkdir",
+            json={"path": "/home/test1/usage/c"},
+        )
+        assert response.status_code == 201
+        response = client.get(
+            "/filesystem/cluster-slurm-ssh/ops/du?path=/home/test1/usage"
+        )
+        assert response.status_code == 404
+
+
 async def test_mkdir_command(client, ssh_client, mocked_ssh_mkdir_output):
 
     async with ssh_client.mocked_output([MockedCommand(**mocked_ssh_mkdir_output)]):
@@ -384,6 +607,28 @@ async def test_tail_command(client, ssh_client, mocked_ssh_tail_output):
         )
 
 
+async def test_tail_follow_streams_events(
+    client, ssh_client, mocked_ssh_stat_output
+):
+    async with ssh_client.mocked_output(
+        [
+            MockedCommand(
+                command="tail --bytes=0 --follow=name", stdout="first\nsecond\n"
+            ),
+            MockedCommand(
+                command="stat --dereference", stdout=mocked_ssh_stat_output["stdout"]
+            ),
+        ]
+    ):
+        response = client.get(
+            "/filesystem/cluster-slurm-ssh/ops/tail/follow?path=/home/test1/job.out"
+        )
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/event-stream")
+    assert response.text == "data: first\ndata: second\ndata: \n\n"
+
+
 async def test_chmod_command(client, ssh_client, mocked_ssh_chmod_output):
 
     async with ssh_client.mocked_output([MockedCommand(**mocked_ssh_chmod_output)]):
@@ -503,3 +748,268 @@ async def test_tar_extract_command(client, ssh_client, mocked_ssh_tar_output):
             },
         )
         assert response.status_code == 204
+
+
+@pytest.fixture
+def sftp_home(monkeypatch, ssh_client, slurm_cluster_with_ssh_config, tmp_path):
+    monkeypatch.setattr(slurm_cluster_with_ssh_config.ssh, "sftp", True)
+    monkeypatch.setattr(ssh_client, "sftp_root", str(tmp_path))
+    (tmp_path / "home").mkdir()
+    return tmp_path / "home"
+
+
+async def test_sftp_upload_download_and_view(client, sftp_home):
+    content = bytes(range(256)) * 1024
+
+    response = client.post(
+        "/filesystem/cluster-slurm-ssh/ops/upload?path=/home",
+        files={"file": ("data.bin", content)},
+    )
+    assert response.status_code == 204
+    assert (sftp_home / "data.bin").read_bytes() == content
+
+    response = client.get(
+        "/filesystem/cluster-slurm-ssh/ops/download?path=/home/data.bin"
+    )
+    assert response.status_code == 200
+    assert response.content == content
+
+    (sftp_home / "text.txt").write_text("0123456789")
+    response = client.get(
+        "/filesystem/cluster-slurm-ssh/ops/view?path=/home/text.txt&offset=3&size=4"
+    )
+    assert response.status_code == 200
+    assert response.json()["output"] == "3456"
+
+
+async def test_sftp_download_errors(client, sftp_home):
+    response = client.get(
+        "/filesystem/cluster-slurm-ssh/ops/download?path=/home/missing"
+    )
+    assert response.status_code == 404
+
+    response = client.get("/filesystem/cluster-slurm-ssh/ops/download?path=/home")
+    assert response.status_code == 400
+
+
+async def test_upload_size_is_checked_before_transfer(
+    client, monkeypatch, slurm_cluster_with_ssh_config
+):
+    monkeypatch.setattr(
+        slurm_cluster_with_ssh_config.data_operation, "max_ops_file_size", 1024
+    )
+
+    # No command is mocked, the upload is rejected before connecting
+    response = client.post(
+        "/filesystem/cluster-slurm-ssh/ops/upload?path=/home",
+        files={"file": ("data.bin", b"x" * 1025)},
+    )
+    assert response.status_code == 413
+
+
+async def test_sftp_download_ranges(client, sftp_home):
+    content = bytes(range(256)) * 4
+    (sftp_home / "data.bin").write_bytes(content)
+    url = "/filesystem/cluster-slurm-ssh/ops/download?path=/home/data.bin"
+
+    response = client.get(url)
+    assert response.status_code == 200
+    assert response.headers["accept-ranges"] == "bytes"
+    assert response.headers["content-length"] == str(len(content))
+    etag = response.headers["etag"]
+
+    response = client.get(url, headers={"Range": "bytes=100-199", "If-Range": etag})
+    assert response.status_code == 206
+    assert response.headers["content-range"] == f"bytes 100-199/{len(content)}"
+    assert response.content == content[100:200]
+
+    response = client.get(url, headers={"Range": "bytes=-24"})
+    assert response.status_code == 206
+    assert response.content == content[-24:]
+
+    # The file changed since the If-Range validator, the whole file is sent
+    response = client.get(url, headers={"Range": "bytes=0-9", "If-Range": '"0-0"'})
+    assert response.status_code == 200
+    assert response.content == content
+
+    response = client.get(url, headers={"Range": "bytes=2000-"})
+    assert response.status_code == 416
+    assert response.headers["content-range"] == f"bytes */{len(content)}"
+
+
+async def test_download_streams_remote_range(
+    client, ssh_client, mocked_ssh_stat_output
+):
+    async with ssh_client.mocked_output(
+        [
+            MockedCommand(command="dd if='/home/test1/data.big'", stdout="cdef"),
+            MockedCommand(
+                command="stat --dereference", stdout=mocked_ssh_stat_output["stdout"]
+            ),
+        ]
+    ):
+        response = client.get(
+            "/filesystem/cluster-slurm-ssh/ops/download?path=/home/test1/data.big",
+            headers={"Range": "bytes=2-5"},
+        )
+
+    assert response.status_code == 206
+    assert response.headers["content-range"] == "bytes 2-5/8"
+    assert response.headers["content-length"] == "4"
+    assert response.content == b"cdef"
+
+
+async def test_prefetched_stream_is_closed_without_being_consumed():
+    closed = []
+
+    async def chunks():
+        try:
+            yield b"first"
+            yield b"second"
+        finally:
+            closed.append(True)
+
+    content = await _prefetch_stream(chunks())
+    # e.g. the client disconnected before the response started
+    await content.aclose()
+    assert closed == [True]
+
+
+async def test_entries_stream_is_bounded_by_its_timeout():
+    class StalledClient:
+        async def execute_stream(self, command, timeout_reads):
+            yield {
+                "name": "a",
+                "type": "-",
+                "user": "test1",
+                "group": "test1",
+                "permissions": "rw-r--r--",
+                "last_modified": "2024-01-01T10:00:00",
+                "size": "1",
+            }
+            await asyncio.Event().wait()
+
+    class StalledPool:
+        @asynccontextmanager
+        async def get_client(self, username, jwt_token):
+            yield StalledClient()
+
+    lines = [
+        json.loads(line)
+        async for line in _entries_stream(
+            StalledPool(), "test1", "token", None, None, timeout=0.1
+        )
+    ]
+    assert lines[0]["name"] == "a"
+    assert lines[1]["error"]["statusCode"] == 408
+
+
+async def test_download_checks_size_before_transfer(client, ssh_client):
+    async with ssh_client.mocked_output(
+        [
+            MockedCommand(
+                command="stat --dereference",
+                stdout="81a4 64317775 50 1 26191 1000 999999999 1689669477 1685517840 1685517840",
+            ),
+        ]
+    ):
+        response = client.get(
+            "/filesystem/cluster-slurm-ssh/ops/download?path=/home/test1/data.big"
+        )
+
+    assert response.status_code == 413
+
+
+async def test_batch_command(
+    client,
+    ssh_client,
+    mocked_ssh_stat_output,
+    mocked_ssh_checksum_output,
+    mocked_ssh_file_output,
+):
+    async with ssh_client.mocked_output(
+        [
+            MockedCommand(**mocked_ssh_stat_output),
+            MockedCommand(**{**mocked_ssh_checksum_output, "exit_code": 0}),
+            MockedCommand(**mocked_ssh_file_output),
+            MockedCommand(
+                command="ls",
+                stdout="",
+                stderr="ls: cannot access '/home/missing': No such file or directory",
+                exit_code=2,
+            ),
+        ]
+    ):
+        response = client.post(
+            "/filesystem/cluster-slurm-ssh/ops/batch",
+            json={
+                "operations": [
+                    {
+                        "operation": "stat",
+                        "path": "/home/test1/data.big",
+                        "dereference": True,
+                    },
+                    {"operation": "checksum", "path": "/home/README.md"},
+                    {"operation": "file", "path": "/home/README.md"},
+                    {"operation": "ls", "path": "/home/missing"},
+                    {"operation": "stat", "path": "/etc/passwd"},
+                ]
+            },
+        )
+
+    assert response.status_code == 200
+    output = response.json()["output"]
+    assert output[0]["output"]["size"] == 8
+    assert output[1]["output"]["checksum"].startswith("6d4c4f9a")
+    assert output[2]["output"].startswith("Unicode text")
+    assert output[3]["output"] is None
+    assert output[3]["error"]["statusCode"] == 404
+    # Paths outside of the configured file systems are rejected per operation
+    assert output[4]["error"]["statusCode"] == 400
+
+
+async def test_batch_chunks_fail_independently(
+    client,
+    ssh_client,
+    mocked_ssh_file_output,
+    slurm_cluster_with_ssh_config,
+    monkeypatch,
+):
+    monkeypatch.setattr(
+        slurm_cluster_with_ssh_config.data_operation, "batch_chunk_size", 2
+    )
+    get_client = ssh_client.get_client
+    calls = []
+
+    def failing_get_client(username, jwt_token):
+        calls.append(username)
+        if len(calls) == 2:
+            raise SSHConnectionError("Unable to establish SSH connection.")
+        return get_client(username, jwt_token)
+
+    monkeypatch.setattr(ssh_client, "get_client", failing_get_client)
+
+    async with ssh_client.mocked_output([MockedCommand(**mocked_ssh_file_output)]):
+        response = client.post(
+            "/filesystem/cluster-slurm-ssh/ops/batch",
+            json={
+                "operations": [{"operation": "file", "path": "/home/README.md"}] * 3
+            },
+        )
+
+    assert response.status_code == 200
+    output = response.json()["output"]
+    assert len(calls) == 2
+    assert all(result["output"].startswith("Unicode text") for result in output[:2])
+    assert output[2]["error"]["statusCode"] == 424
+
+
+async def test_batch_command_limits(client):
+    response = client.post(
+        "/filesystem/cluster-slurm-ssh/ops/batch",
+        json={
+            "operations": [{"operation": "file", "path": "/home/file"}]
+            * (MAX_BATCH_OPERATIONS + 1)
+        },
+    )
+    assert response.status_code == 400
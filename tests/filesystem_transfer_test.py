@@ -13,6 +13,7 @@ from firecrest.filesystem.transfer.models import (
     MoveResponse,
     UploadFileResponse,
     CompressResponse,
+    DuResponse,
     ExtractResponse,
 )
 
@@ -329,6 +330,31 @@ async def test_rm(
         assert delete.transfer_job.system == slurm_cluster_with_api_config.name
 
 
+@pytest.mark.asyncio
+async def test_du(
+    client,
+    slurm_cluster_with_api_config,
+    mocked_job_submit_response,
+):
+
+    with aioresponses() as mocked:
+        mocked.post(
+            f"{slurm_cluster_with_api_config.scheduler.api_url}/slurm/v{slurm_cluster_with_api_config.scheduler.api_version}/job/submit",
+            status=200,
+            body=json.dumps(mocked_job_submit_response),
+        )
+
+        response = client.post(
+            f"/filesystem/{slurm_cluster_with_api_config.name}/transfer/du",
+            json={"sourcePath": "/home/user/dir", "account": "fireuser", "maxDepth": 2},
+        )
+        assert response.status_code == 201
+        du = DuResponse(**response.json())
+
+        assert du.transfer_job.job_id == mocked_job_submit_response["job_id"]
+        assert du.transfer_job.system == slurm_cluster_with_api_config.name
+
+
 @pytest.mark.asyncio
 async def test_compress(
     client,
@@ -0,0 +1,27 @@
+# Copyright (c) 2025, ETH Zurich. All rights reserved.
+#
+# Please, refer to the LICENSE file in the root directory.
+# SPDX-License-Identifier: BSD-3-Clause
+
+import asyncio
+import time
+
+from lib.loggers.loop_lag_monitor import LoopLagMonitor
+
+
+async def test_loop_lag_monitor_measures_blocking_work():
+    monitor = LoopLagMonitor(interval=0.01)
+    monitor.start()
+    try:
+        await asyncio.sleep(0.005)
+        # Blocks the event loop past the next measurement
+        time.sleep(0.1)
+        await asyncio.sleep(0.02)
+        stats = monitor.get_stats()
+    finally:
+        monitor.stop()
+
+    assert stats["samples"] >= 1
+    assert stats["lag_max"] >= 0.05
+    # Stats are reset after being reported
+    assert monitor.get_stats()["samples"] == 0
@@ -0,0 +1,132 @@
+# Copyright (c) 2025, ETH Zurich. All rights reserved.
+#
+# Please, refer to the LICENSE file in the root directory.
+# SPDX-License-Identifier: BSD-3-Clause
+
+import pytest
+
+from firecrest.filesystem.ops import ls_cache as ls_cache_module
+from firecrest.filesystem.ops.ls_cache import ENTRY_SIZE, LsCache
+from tests.mock_ssh_client import MockedCommand
+
+FLAGS = (False, False, False, False)
+
+
+def _listing(*names):
+    return [{"name": name, "link_target": None} for name in names]
+
+
+def test_ls_cache_ttl_per_file_system(monkeypatch):
+    now = 1000.0
+    monkeypatch.setattr(ls_cache_module, "time", lambda: now)
+    cache = LsCache({"/home": 10, "/home/scratch": 0})
+
+    cache.put("user", "/home/user", FLAGS, _listing("a"))
+    cache.put("user", "/home/scratch/user", FLAGS, _listing("b"))
+    cache.put("user", "/other", FLAGS, _listing("c"))
+
+    assert cache.get("user", "/home/user/", FLAGS) == _listing("a")
+    assert cache.get("other", "/home/user", FLAGS) is None
+    assert cache.get("user", "/home/user", (True, False, False, False)) is None
+    assert cache.get("user", "/home/scratch/user", FLAGS) is None
+    assert cache.get("user", "/other", FLAGS) is None
+
+    now += 10
+    assert cache.get("user", "/home/user", FLAGS) is None
+    assert len(cache.entries) == 0
+
+    stats = cache.get_stats()["file_systems"]
+    assert stats["/home"]["hits"] == 1
+    assert stats["/home"]["misses"] == 3
+    assert stats["/home"]["hit_rate"] == 0.25
+    assert stats["/home/scratch"]["misses"] == 0
+
+
+def test_ls_cache_invalidates_parents_and_children():
+    cache = LsCache({"/home": 60})
+    for path in ["/home", "/home/user", "/home/user/dir/sub", "/home/user2"]:
+        cache.put("user", path, FLAGS, _listing("x"))
+
+    cache.invalidate("/home/user/dir")
+
+    assert [key[1] for key in cache.entries] == ["/home/user2"]
+    assert cache.invalidations == 3
+
+
+def test_ls_cache_evicts_least_recently_used():
+    cache = LsCache({"/home": 60}, max_entries=2, max_size=2 * ENTRY_SIZE + 10)
+    cache.put("user", "/home/a", FLAGS, _listing("1"))
+    cache.put("user", "/home/b", FLAGS, _listing("1"))
+    cache.get("user", "/home/a", FLAGS)
+
+    # Over the maximum number of entries
+    cache.put("user", "/home/c", FLAGS, _listing("1"))
+    assert [key[1] for key in cache.entries] == ["/home/a", "/home/c"]
+
+    # Over the maximum size
+    cache.put("user", "/home/d", FLAGS, _listing("1", "2"))
+    assert [key[1] for key in cache.entries] == ["/home/d"]
+    assert cache.size == 2 * ENTRY_SIZE + 2
+    assert cache.evictions == 3
+
+    # Listings larger than the cache are not cached
+    cache.put("user", "/home/e", FLAGS, _listing("1", "2", "3", "4"))
+    assert cache.get("user", "/home/e", FLAGS) is None
+
+
+@pytest.fixture
+def home_ls_cache(monkeypatch, slurm_cluster_with_ssh_config):
+    monkeypatch.setattr(ls_cache_module, "ls_caches", {})
+    for file_system in slurm_cluster_with_ssh_config.file_systems:
+        monkeypatch.setattr(file_system, "ls_cache_ttl", 60)
+    return ls_cache_module.get_ls_cache(slurm_cluster_with_ssh_config)
+
+
+async def test_ls_route_uses_the_cache(client, ssh_client, home_ls_cache):
+    stdout = '-rw-r--r-- 1 test1 test1 5 2024-06-14T09:01:25 "file"\n'
+
+    for _ in range(2):
+        async with ssh_client.mocked_output(
+            [MockedCommand(command="ls", stdout=stdout, stderr="")]
+        ):
+            response = client.get(
+                "/filesystem/cluster-slurm-ssh/ops/ls?path=/home/test1"
+            )
+        assert response.status_code == 200
+        assert response.json()["output"][0]["name"] == "file"
+
+    async with ssh_client.mocked_output(
+        [MockedCommand(command="mkdir", stdout="", stderr="")]
+    ):
+        response = client.post(
+            "/filesystem/cluster-slurm-ssh/ops/mkdir",
+            json={"path": "/home/test1/new", "parent": False},
+        )
+    assert response.status_code == 201
+    assert len(home_ls_cache.entries) == 0
+
+    stats = home_ls_cache.get_stats()["file_systems"]["/home"]
+    assert stats["hits"] == 1
+    assert stats["misses"] == 1
+
+
+async def test_failed_mutations_invalidate_the_cache(client, ssh_client, home_ls_cache):
+    home_ls_cache.put("test1", "/home/test1", (), [])
+    assert len(home_ls_cache.entries) == 1
+
+    async with ssh_client.mocked_output(
+        [
+            MockedCommand(
+                command="rm",
+                stdout="",
+                stderr="rm: cannot remove '/home/test1/dir/file': Permission denied",
+                exit_code=1,
+            )
+        ]
+    ):
+        response = client.delete(
+            "/filesystem/cluster-slurm-ssh/ops/rm?path=/home/test1/dir"
+        )
+    assert response.status_code != 204
+    # The directory may have been partially removed
+    assert len(home_ls_cache.entries) == 0
@@ -3,6 +3,8 @@
 # Please, refer to the LICENSE file in the root directory.
 # SPDX-License-Identifier: BSD-3-Clause
 
+import re
+import shlex
 from contextlib import asynccontextmanager
 from socket import AF_INET
 from typing import List
@@ -13,6 +15,11 @@ from lib.models.base_model import CamelModel
 from lib.ssh_clients.ssh_client import SSHClient, SSHClientPool
 
 
+# Token and commands of the script of a CompositeCommand (run by `sh -c`)
+COMPOSITE_TOKEN = re.compile(r"printf '\\n%s:%d:%s\\n' (\w+) ")
+COMPOSITE_COMMANDS = re.compile(r">&3' sh ((?:'[^']*'|\"'\")+) \|")
+
+
 class NoAuthSSHServer(asyncssh.SSHServer):
 
     def begin_auth(self, username):
@@ -20,7 +27,7 @@ class NoAuthSSHServer(asyncssh.SSHServer):
 
 
 @asynccontextmanager
-async def simple_ssh_server(handler, port=0):
+async def simple_ssh_server(handler, port=0, sftp_factory=None):
 
     private_key = asyncssh.generate_private_key("ssh-rsa")
     server = await asyncssh.create_server(
@@ -29,6 +36,7 @@ async def simple_ssh_server(handler, port=0):
         0,
         server_host_keys=[private_key],
         process_factory=handler,
+        sftp_factory=sftp_factory,
     )
     port = next(
         socket.getsockname()[1] for socket in server.sockets if socket.family == AF_INET
@@ -54,6 +62,8 @@ class MockedSSHClient(SSHClient):
 class MockSSHClientPool(SSHClientPool):
 
     commands: List[MockedCommand] = []
+    # Local directory served as root of the SFTP subsystem, if set
+    sftp_root: str = None
 
     def __init__(
         self,
@@ -69,16 +79,41 @@ class MockSSHClientPool(SSHClientPool):
                 await process.stdin.readline()
                 break
 
+        script = process.command
+        if script.startswith("sh -c "):
+            script = shlex.split(script)[2]
+        token = COMPOSITE_TOKEN.search(script)
+        if token is not None:
+            # Answers each command of a composite command with a framed output
+            for i, quoted in enumerate(COMPOSITE_COMMANDS.findall(script)):
+                command = self._mocked_command(shlex.split(quoted)[0])
+                process.stdout.write(
+                    f"{command.stdout}\n{token[1]}:{i}:{command.exit_code}\n"
+                )
+                process.stderr.write(f"{command.stderr or ''}\n{token[1]}:{i}\n")
+            process.exit(0)
+            return
+
+        command = self._mocked_command(process.command)
+        process.stdout.write(command.stdout)
+        process.stderr.write(command.stderr)
+        process.exit(command.exit_code)
+
+    def _mocked_command(self, command_line: str) -> MockedCommand:
         for command in self.commands:
-            if process.command.find(command.command) >= 0:
-                process.stdout.write(command.stdout)
-                process.stderr.write(command.stderr)
-                process.exit(command.exit_code)
-                return
+            if command_line.find(command.command) >= 0:
+                return command
 
         # command not found throw
         raise ProcessLookupError("Command not found")
 
+    def sftp_factory(self, chan: asyncssh.SSHServerChannel):
+        if self.sftp_root is None:
+            raise asyncssh.ChannelOpenError(
+                asyncssh.OPEN_ADMINISTRATIVELY_PROHIBITED, "SFTP not enabled"
+            )
+        return asyncssh.SFTPServer(chan, chroot=self.sftp_root.encode())
+
     @asynccontextmanager
     async def mocked_output(self, commands: List[MockedCommand]):
         self.commands = commands
@@ -87,7 +122,9 @@ class MockSSHClientPool(SSHClientPool):
 
     @asynccontextmanager
     async def get_client(self, username, jwt_token):
-        async with simple_ssh_server(self.handler) as port:
+        async with simple_ssh_server(
+            self.handler, sftp_factory=self.sftp_factory
+        ) as port:
             async with asyncssh.connect(
                 host="localhost", port=port, known_hosts=None
             ) as conn:
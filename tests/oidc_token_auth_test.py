@@ -0,0 +1,132 @@
+# Copyright (c) 2025, ETH Zurich. All rights reserved.
+#
+# Please, refer to the LICENSE file in the root directory.
+# SPDX-License-Identifier: BSD-3-Clause
+
+import base64
+import json
+from time import time
+
+import pytest
+from fastapi import HTTPException
+from jose import JWTError, jwk, jwt
+
+from lib.auth.authN import jwks_store as jwks_store_module
+from lib.auth.authN import token_cache as token_cache_module
+from lib.auth.authN.OIDC_token_auth import OIDCTokenAuth
+
+
+SECRET = "firecrest-test-secret-key-0123456789"
+
+
+def _jwk(kid: str, secret: str = SECRET) -> dict:
+    encoded = base64.urlsafe_b64encode(secret.encode()).rstrip(b"=").decode()
+    return {"kty": "oct", "kid": kid, "k": encoded}
+
+
+def _token(kid: str = "key1", secret: str = SECRET, ttl: int = 300, **claims) -> str:
+    claims = {"preferred_username": "test-user", "exp": int(time()) + ttl, **claims}
+    return jwt.encode(claims, secret, algorithm="HS256", headers={"kid": kid})
+
+
+@pytest.fixture
+def jwks_file(tmp_path):
+    jwks = tmp_path / "jwks.json"
+    jwks.write_text(json.dumps({"keys": [_jwk("key1")]}))
+    return jwks
+
+
+@pytest.fixture
+async def token_auth(jwks_file):
+    token_auth = OIDCTokenAuth(
+        public_certs=[jwks_file.as_uri()],
+        username_claim="preferred_username",
+        min_token_ttl=30,
+    )
+    await token_auth.jwks_store.refresh()
+    return token_auth
+
+
+def test_verified_tokens_are_cached(token_auth, monkeypatch):
+    token = _token()
+
+    auth = token_auth.auth_from_token(token)
+    assert auth.username == "test-user"
+    assert token_auth.auth_from_token(token) is auth
+    assert token_auth.token_cache.get_stats()["hits"] == 1
+    assert token_auth.token_cache.get_stats()["misses"] == 1
+
+    # Cached tokens expire `min_token_ttl` seconds before the token
+    now = time() + 275
+    monkeypatch.setattr(token_cache_module, "time", lambda: now)
+    assert token_auth.token_cache.get(token) is None
+
+
+def test_tokens_are_not_cached_unless_valid(token_auth):
+    with pytest.raises(HTTPException):
+        token_auth.auth_from_token(_token(ttl=10))
+    with pytest.raises(JWTError):
+        token_auth.auth_from_token(_token(secret="another-secret-key-0123456789"))
+    assert len(token_auth.token_cache.entries) == 0
+
+
+def test_cached_tokens_are_revoked_on_key_rotation(token_auth):
+    token = _token()
+    token_auth.auth_from_token(token)
+
+    # An unchanged key keeps the cached tokens
+    token_auth.update_public_keys(dict(token_auth.public_keys))
+    assert token_auth.token_cache.get(token) is not None
+
+    token_auth.update_public_keys(
+        {"key2": jwk.construct(_jwk("key2"), algorithm="HS256")}
+    )
+    assert token_auth.token_cache.get(token) is None
+    assert token_auth.token_cache.get_stats()["revocations"] == 1
+    with pytest.raises(KeyError):
+        token_auth.auth_from_token(token)
+
+
+async def test_keys_are_fetched_in_the_background(jwks_file):
+    token_auth = OIDCTokenAuth(
+        public_certs=[jwks_file.as_uri()], username_claim="preferred_username"
+    )
+    other_auth = OIDCTokenAuth(
+        public_certs=[jwks_file.as_uri()], username_claim="preferred_username"
+    )
+    # Nothing is fetched at construction time, the store is shared
+    assert token_auth.public_keys == {}
+    assert token_auth.jwks_store is other_auth.jwks_store
+
+    # A token signed by a key not fetched yet triggers a refresh
+    auth = await token_auth.authenticate(_token())
+    assert auth.username == "test-user"
+    assert token_auth.public_keys["key1"] is other_auth.public_keys["key1"]
+
+
+async def test_unknown_keys_trigger_rate_limited_refreshes(
+    token_auth, jwks_file, monkeypatch
+):
+    store = token_auth.jwks_store
+    key1 = token_auth.public_keys["key1"]
+    secret = "rotated-secret-key-0123456789"
+    jwks_file.write_text(json.dumps({"keys": [_jwk("key1"), _jwk("key2", secret)]}))
+
+    # Refreshed less than `min_refresh_interval` seconds ago
+    with pytest.raises(HTTPException) as exc:
+        await token_auth.authenticate(_token(kid="key2", secret=secret))
+    assert exc.value.detail == "Token's public key not found."
+
+    monkeypatch.setattr(store, "last_refresh", store.last_refresh - 60)
+    auth = await token_auth.authenticate(_token(kid="key2", secret=secret))
+    assert auth.username == "test-user"
+    # Unchanged keys are not constructed again
+    assert token_auth.public_keys["key1"] is key1
+    assert store.get_stats()["unknown_key_refreshes"] == 1
+
+
+def test_jwks_cache_headers():
+    assert jwks_store_module._max_age({"Cache-Control": "public, max-age=300"}) == 300
+    assert jwks_store_module._max_age({"Cache-Control": "no-cache"}) == 0
+    assert jwks_store_module._max_age({"Expires": "Thu, 01 Jan 1970 00:00:00 GMT"}) == 0
+    assert jwks_store_module._max_age({}) is None
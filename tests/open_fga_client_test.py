@@ -0,0 +1,168 @@
+# Copyright (c) 2025, ETH Zurich. All rights reserved.
+#
+# Please, refer to the LICENSE file in the root directory.
+# SPDX-License-Identifier: BSD-3-Clause
+
+import asyncio
+
+import aiohttp
+import pytest
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+from fastapi import HTTPException
+
+from lib.auth.authZ import decision_cache as decision_cache_module
+from lib.auth.authZ.open_fga_client import OpenFGAClient
+
+
+class FakeChecks:
+    def __init__(self, client: OpenFGAClient, decisions: dict):
+        self.decisions = decisions
+        self.calls = []
+        self.release = asyncio.Event()
+        self.release.set()
+        client._check = self.check
+
+    async def check(self, username: str, resource_name: str, access_token: str):
+        self.calls.append((username, resource_name))
+        await self.release.wait()
+        decision = self.decisions[resource_name]
+        if isinstance(decision, Exception):
+            raise decision
+        return decision
+
+
+@pytest.fixture
+def fga_client():
+    return OpenFGAClient(
+        url="http://openfga/check", allow_cache_ttl=60, deny_cache_ttl=10
+    )
+
+
+async def test_decisions_are_cached_with_separate_ttls(fga_client, monkeypatch):
+    checks = FakeChecks(fga_client, {"cluster-a": True, "cluster-b": False})
+
+    await fga_client.authorize("test-user", "cluster-a", "token")
+    await fga_client.authorize("test-user", "cluster-a", "token")
+    for _ in range(2):
+        with pytest.raises(HTTPException) as exc:
+            await fga_client.authorize("test-user", "cluster-b", "token")
+        assert exc.value.status_code == 403
+    assert checks.calls == [("test-user", "cluster-a"), ("test-user", "cluster-b")]
+    assert fga_client.decision_cache.get_stats()["hits"] == 2
+
+    # Denied decisions expire first
+    now = decision_cache_module.time() + 30
+    monkeypatch.setattr(decision_cache_module, "time", lambda: now)
+    await fga_client.authorize("test-user", "cluster-a", "token")
+    with pytest.raises(HTTPException):
+        await fga_client.authorize("test-user", "cluster-b", "token")
+    assert len(checks.calls) == 3
+
+
+async def test_concurrent_checks_are_coalesced(fga_client):
+    checks = FakeChecks(fga_client, {"cluster-a": True})
+    checks.release.clear()
+
+    authorizations = [
+        asyncio.create_task(fga_client.authorize("test-user", "cluster-a", "token"))
+        for _ in range(5)
+    ]
+    await asyncio.sleep(0)
+    checks.release.set()
+    await asyncio.gather(*authorizations)
+
+    assert len(checks.calls) == 1
+    assert fga_client.decision_cache.get_stats()["coalesced"] == 4
+    assert not fga_client.decision_cache.in_flight
+
+
+async def test_failed_checks_are_not_cached(fga_client):
+    checks = FakeChecks(fga_client, {"cluster-a": aiohttp.ClientError()})
+
+    for _ in range(2):
+        with pytest.raises(HTTPException) as exc:
+            await fga_client.authorize("test-user", "cluster-a", "token")
+        assert exc.value.status_code == 401
+    assert len(checks.calls) == 2
+    assert len(fga_client.decision_cache.entries) == 0
+
+
+async def test_systems_are_authorized_in_one_batch(fga_client):
+    checks = FakeChecks(fga_client, {"cluster-a": True, "cluster-b": False})
+    batches = []
+
+    async def check_many(keys, access_token):
+        batches.append(keys)
+        return {
+            key: checks.decisions[key[1]] for key in keys if key[1] in checks.decisions
+        }
+
+    fga_client._check_many = check_many
+
+    decisions = await fga_client.authorize_many(
+        "test-user", ["cluster-a", "cluster-b", "cluster-c"], "token"
+    )
+    # Undecided systems are omitted and not cached
+    assert decisions == {"cluster-a": True, "cluster-b": False}
+    assert len(fga_client.decision_cache.entries) == 2
+
+    # The decisions of the batch are used by the checks on each system
+    await fga_client.authorize("test-user", "cluster-a", "token")
+    with pytest.raises(HTTPException):
+        await fga_client.authorize("test-user", "cluster-b", "token")
+    assert checks.calls == []
+
+    await fga_client.authorize_many("test-user", ["cluster-a", "cluster-c"], "token")
+    assert batches == [
+        [
+            ("test-user", "cluster-a"),
+            ("test-user", "cluster-b"),
+            ("test-user", "cluster-c"),
+        ],
+        [("test-user", "cluster-c")],
+    ]
+
+
+async def test_systems_are_checked_individually_without_batch_url(fga_client):
+    checks = FakeChecks(
+        fga_client, {"cluster-a": True, "cluster-b": aiohttp.ClientError()}
+    )
+
+    decisions = await fga_client.authorize_many(
+        "test-user", ["cluster-a", "cluster-b"], "token"
+    )
+    assert decisions == {"cluster-a": True}
+    assert len(checks.calls) == 2
+
+
+@pytest.mark.parametrize(
+    "response,status_code,cached",
+    [
+        (web.json_response({"allowed": True}), None, True),
+        (web.json_response({"allowed": False}), 403, True),
+        # Only explicit decisions are cached, other responses can't be verified
+        (web.json_response({"code": "forbidden"}, status=403), 401, False),
+        (web.json_response({"code": "internal_error"}, status=500), 401, False),
+        (web.Response(text="OK"), 401, False),
+    ],
+)
+async def test_check_responses(response, status_code, cached):
+    async def check(request):
+        return response
+
+    app = web.Application()
+    app.router.add_post("/check", check)
+    async with TestServer(app) as server:
+        fga_client = OpenFGAClient(url=str(server.make_url("/check")))
+        try:
+            if status_code is None:
+                await fga_client.authorize("test-user", "cluster-a", "token")
+            else:
+                with pytest.raises(HTTPException) as exc:
+                    await fga_client.authorize("test-user", "cluster-a", "token")
+                assert exc.value.status_code == status_code
+        finally:
+            await fga_client.close_aiohttp_client()
+
+    assert (len(fga_client.decision_cache.entries) == 1) == cached
@@ -0,0 +1,96 @@
+# Copyright (c) 2025, ETH Zurich. All rights reserved.
+#
+# Please, refer to the LICENSE file in the root directory.
+# SPDX-License-Identifier: BSD-3-Clause
+
+import asyncio
+from time import time
+
+import asyncssh
+from jose import jwt
+
+from lib.ssh_clients.ssh_cached_credentials_provider import (
+    SSHCachedCredentialsProvider,
+)
+from lib.ssh_clients.ssh_credentials_provider import SSHCredentialsProvider
+
+CA_KEY = asyncssh.generate_private_key("ssh-ed25519")
+TOKEN = jwt.encode({"sub": "subject-1"}, "secret", algorithm="HS256")
+
+
+def _make_credentials(validity: int) -> SSHCredentialsProvider.SSHCredentials:
+    user_key = asyncssh.generate_private_key("ssh-ed25519")
+    certificate = CA_KEY.generate_user_certificate(
+        user_key, "fireuser", valid_before=int(time()) + validity
+    )
+    return SSHCredentialsProvider.SSHCredentials(
+        private_key=user_key.export_private_key().decode(),
+        public_certificate=certificate.export_certificate().decode(),
+    )
+
+
+class CountingProvider(SSHCredentialsProvider):
+
+    def __init__(self, validity: int = 300):
+        self.validity = validity
+        self.calls = 0
+
+    async def get_credentials(self, username: str, jwt_token: str):
+        self.calls += 1
+        await asyncio.sleep(0.01)
+        return _make_credentials(self.validity)
+
+
+async def test_cached_credentials_are_reused_until_expiry():
+    provider = CountingProvider()
+    cache = SSHCachedCredentialsProvider(provider)
+
+    first = await cache.get_credentials("fireuser", TOKEN)
+    second = await cache.get_credentials("fireuser", TOKEN)
+
+    assert first is second
+    assert provider.calls == 1
+    assert cache.get_stats()["hits"] == 1
+
+
+async def test_concurrent_misses_are_coalesced():
+    provider = CountingProvider()
+    cache = SSHCachedCredentialsProvider(provider)
+
+    results = await asyncio.gather(
+        *[cache.get_credentials("fireuser", TOKEN) for _ in range(10)]
+    )
+
+    assert provider.calls == 1
+    assert all(result is results[0] for result in results)
+
+
+async def test_credentials_close_to_expiry_are_refreshed_in_background():
+    provider = CountingProvider(validity=10)
+    cache = SSHCachedCredentialsProvider(provider, refresh_margin=15, min_validity=5)
+
+    first = await cache.get_credentials("fireuser", TOKEN)
+    # Still valid: served from cache while a refresh is started
+    second = await cache.get_credentials("fireuser", TOKEN)
+    assert second is first
+    await asyncio.sleep(0.05)
+
+    assert provider.calls == 2
+    assert cache.get_stats()["refreshes"] == 1
+    assert cache.entries[("fireuser", "subject-1")].credentials is not first
+
+
+async def test_credentials_without_certificate_are_not_cached():
+    class StaticProvider(SSHCredentialsProvider):
+        calls = 0
+
+        async def get_credentials(self, username: str, jwt_token: str):
+            StaticProvider.calls += 1
+            return SSHCredentialsProvider.SSHCredentials(private_key="key")
+
+    cache = SSHCachedCredentialsProvider(StaticProvider())
+    await cache.get_credentials("fireuser", TOKEN)
+    await cache.get_credentials("fireuser", TOKEN)
+
+    assert StaticProvider.calls == 2
+    assert len(cache.entries) == 0
@@ -0,0 +1,337 @@
+# Copyright (c) 2025, ETH Zurich. All rights reserved.
+#
+# Please, refer to the LICENSE file in the root directory.
+# SPDX-License-Identifier: BSD-3-Clause
+
+import asyncio
+import heapq
+from contextlib import AsyncExitStack
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import asyncssh
+import pytest
+
+from lib.ssh_clients.ssh_channel_limiter import SSHChannelLimiter
+from lib.ssh_clients.ssh_client import SSHClient, SSHClientPool, SSHConnectionError
+from lib.ssh_clients.ssh_endpoint_balancer import SSHEndpointBalancer
+from tests.mock_ssh_client import simple_ssh_server
+
+
+def _make_client(max_channels: int = 1) -> SSHClient:
+    conn = MagicMock()
+    conn.is_closed = MagicMock(return_value=False)
+    return SSHClient(conn, max_channels=max_channels)
+
+
+def _make_pool(**kwargs) -> SSHClientPool:
+    pool = SSHClientPool(host="localhost", port=22, **kwargs)
+    pool._connect = AsyncMock(
+        side_effect=lambda username, jwt_token: _make_client(
+            pool.max_channels_per_connection
+        )
+    )
+    return pool
+
+
+# ---------------------------------------------------------------------------
+# SSHChannelLimiter
+# ---------------------------------------------------------------------------
+
+
+async def test_channel_limiter_admits_waiters_in_fifo_order():
+    limiter = SSHChannelLimiter(max_channels=1)
+    order = []
+
+    async def worker(i):
+        async with limiter:
+            order.append(i)
+            await asyncio.sleep(0)
+
+    await limiter.acquire()
+    tasks = [asyncio.create_task(worker(i)) for i in range(5)]
+    await asyncio.sleep(0)
+    assert limiter.waiting == 5
+
+    limiter.release()
+    await asyncio.gather(*tasks)
+
+    assert order == [0, 1, 2, 3, 4]
+    assert limiter.active == 0
+    assert limiter.get_stats()["channels_queued"] == 5
+
+
+async def test_channel_limiter_cancelled_waiter_does_not_leak_channel():
+    limiter = SSHChannelLimiter(max_channels=1)
+    await limiter.acquire()
+
+    waiter = asyncio.create_task(limiter.acquire())
+    await asyncio.sleep(0)
+    waiter.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await waiter
+
+    limiter.release()
+    assert limiter.active == 0
+    assert limiter.waiting == 0
+
+
+# ---------------------------------------------------------------------------
+# SSHClientPool sub-pools per user
+# ---------------------------------------------------------------------------
+
+
+async def test_pool_grows_user_connections_when_channels_are_busy():
+    pool = _make_pool(max_channels_per_connection=1, max_connections_per_user=2)
+
+    async with AsyncExitStack() as stack:
+        first = await stack.enter_async_context(pool.get_client("user", "token"))
+        second = await stack.enter_async_context(pool.get_client("user", "token"))
+        third = await stack.enter_async_context(pool.get_client("user", "token"))
+
+        assert first is not second
+        assert third in (first, second)
+        assert len(pool.clients["user"]) == 2
+
+    assert pool._connect.await_count == 2
+    assert all(client.leases == 0 for client in pool.clients["user"])
+
+
+async def test_pool_does_not_count_reserved_channels_as_free():
+    pool = _make_pool(max_channels_per_connection=2, max_connections_per_user=2)
+
+    async with pool.get_client("user", "token") as first:
+        # The open SFTP session holds the other channel of the connection
+        first.sftp_session.sftp = MagicMock()
+        assert first.available_channels == 1
+        async with pool.get_client("user", "token") as second:
+            assert first is not second
+
+    assert pool._connect.await_count == 2
+
+
+async def test_pool_reuses_connection_with_free_channels():
+    pool = _make_pool(max_channels_per_connection=10, max_connections_per_user=4)
+
+    async with pool.get_client("user", "token") as first:
+        async with pool.get_client("user", "token") as second:
+            assert first is second
+
+    assert pool.connections_count() == 1
+
+
+async def test_pool_capacity_exceeded_for_new_users_only():
+    pool = _make_pool(
+        max_clients=1,
+        max_channels_per_connection=1,
+        max_connections_per_user=4,
+        max_capacity_waiters=0,
+    )
+
+    async with pool.get_client("user", "token") as first:
+        # Existing users fall back to their own busy connections
+        async with pool.get_client("user", "token") as second:
+            assert first is second
+        with pytest.raises(SSHConnectionError):
+            async with pool.get_client("other-user", "token"):
+                pass
+
+
+async def test_pool_evicts_least_recently_used_idle_connection():
+    pool = _make_pool(max_clients=2)
+
+    async with pool.get_client("user1", "token") as first:
+        pass
+    async with pool.get_client("user2", "token"):
+        pass
+    async with pool.get_client("user3", "token"):
+        assert "user1" not in pool.clients
+        first.conn.close.assert_called_once()
+
+    assert pool.connections_count() == 2
+    assert pool.get_stats()["evictions"] == 1
+
+
+async def test_pool_new_user_waits_for_a_connection_to_become_idle():
+    pool = _make_pool(max_clients=1, connect_timeout=2)
+    release = asyncio.Event()
+
+    async def hold_connection():
+        async with pool.get_client("user1", "token"):
+            await release.wait()
+
+    holder = asyncio.create_task(hold_connection())
+    await asyncio.sleep(0)
+    waiter = asyncio.create_task(pool.get_client("user2", "token").__aenter__())
+    await asyncio.sleep(0.01)
+    assert pool.get_stats()["capacity_waiting"] == 1
+
+    release.set()
+    await holder
+    client = await waiter
+    assert pool.clients == {"user2": [client]}
+    assert pool.get_stats()["capacity_waits"] == 1
+
+
+async def test_pool_rejects_new_users_after_waiting_timeout():
+    pool = _make_pool(max_clients=1, connect_timeout=0.05)
+
+    async with pool.get_client("user1", "token"):
+        with pytest.raises(SSHConnectionError):
+            async with pool.get_client("user2", "token"):
+                pass
+
+    assert pool.get_stats()["rejections"] == 1
+
+
+async def test_prune_visits_only_expired_idle_deadlines():
+    pool = _make_pool()
+
+    for username in ("user1", "user2", "user3"):
+        async with pool.get_client(username, "token"):
+            pass
+    assert len(pool.idle_deadlines) == 3
+    # Locks are dropped once no request references them
+    assert pool.user_locks == {}
+
+    user1_client = pool.clients["user1"][0]
+    user2_client = pool.clients["user2"][0]
+    # user1 expired, user2 used again after its idle deadline was scheduled
+    user1_client.last_used -= 120
+    pool.idle_deadlines = [
+        (deadline - 120, seq, username, client)
+        for deadline, seq, username, client in pool.idle_deadlines
+        if username in ("user1", "user2")
+    ] + [entry for entry in pool.idle_deadlines if entry[2] == "user3"]
+    heapq.heapify(pool.idle_deadlines)
+
+    pool.prune_connection_pool()
+
+    assert set(pool.clients) == {"user2", "user3"}
+    assert pool.connections_count() == 2
+    user1_client.conn.close.assert_called_once()
+    user2_client.conn.close.assert_not_called()
+    # user2 is rescheduled with its new deadline
+    assert len(pool.idle_deadlines) == 2
+    assert pool.get_stats()["pruned_connections"] == 1
+
+
+async def test_user_lock_is_kept_while_referenced():
+    pool = _make_pool()
+    release = asyncio.Event()
+
+    async def hold_lock():
+        async with pool._user_lock("user"):
+            await release.wait()
+
+    tasks = [asyncio.create_task(hold_lock()) for _ in range(2)]
+    await asyncio.sleep(0)
+    lock = pool.user_locks["user"]
+    assert pool.user_lock_refs["user"] == 2
+
+    release.set()
+    await asyncio.gather(*tasks)
+    assert "user" not in pool.user_locks
+    assert "user" not in pool.user_lock_refs
+    assert not lock.locked()
+
+
+async def test_execute_waits_for_a_free_channel():
+    client = _make_client(max_channels=1)
+    release = asyncio.Event()
+
+    async def slow_execute(command, stdin=None):
+        await release.wait()
+        return "done"
+
+    with patch.object(client, "_execute", side_effect=slow_execute):
+        tasks = [asyncio.create_task(client.execute(None)) for _ in range(3)]
+        await asyncio.sleep(0)
+        assert client.channels.active == 1
+        assert client.channels.waiting == 2
+
+        release.set()
+        assert await asyncio.gather(*tasks) == ["done", "done", "done"]
+
+    assert client.channels.active == 0
+
+
+# ---------------------------------------------------------------------------
+# Login node endpoints
+# ---------------------------------------------------------------------------
+
+
+def test_endpoint_balancer_prefers_fast_and_idle_endpoints():
+    balancer = SSHEndpointBalancer([("node1", 22), ("node2", 22)])
+    node1, node2 = balancer.endpoints
+    balancer.record_success(node1, 0.1)
+    balancer.record_success(node2, 0.2)
+
+    load = {node1: 0, node2: 0}
+    assert balancer.select(load.get) is node1
+    # node1 cost: 0.1 * 4 > node2 cost: 0.2 * 1
+    load[node1] = 3
+    assert balancer.select(load.get) is node2
+
+
+def test_endpoint_balancer_ejects_failing_endpoints():
+    balancer = SSHEndpointBalancer(
+        [("node1", 22), ("node2", 22)], ejection_threshold=2, ejection_time=30
+    )
+    node1, node2 = balancer.endpoints
+    balancer.record_success(node2, 1.0)
+
+    balancer.record_failure(node1)
+    assert balancer.select(lambda endpoint: 0) is node1
+    balancer.record_failure(node1)
+    assert balancer.select(lambda endpoint: 0) is node2
+    assert balancer.get_stats(lambda endpoint: 0)["node1:22"]["ejected"]
+
+    # With every endpoint ejected, the one recovering first is used
+    for _ in range(2):
+        balancer.record_failure(node2)
+    assert balancer.select(lambda endpoint: 0) is node1
+
+
+async def test_pool_fails_over_to_reachable_endpoint():
+    async def handler(process):
+        process.exit(0)
+
+    async with simple_ssh_server(handler) as port:
+        # Nothing listens on port 1 of localhost
+        pool = SSHClientPool(host="localhost", port=1, endpoints=[("localhost", port)])
+        pool.get_conn_options = AsyncMock(
+            return_value=asyncssh.SSHClientConnectionOptions(known_hosts=None)
+        )
+
+        async with pool.get_client("user", "token") as client:
+            assert client.endpoint.port == port
+
+        stats = pool.get_stats()["endpoints"]
+        assert stats["localhost:1"]["failures"] == 1
+        assert stats[f"localhost:{port}"]["connections_opened"] == 1
+        client.close()
+
+
+async def test_pool_does_not_charge_proxy_failures_to_endpoints():
+    async def handler(process):
+        process.exit(0)
+
+    async with simple_ssh_server(handler) as port:
+        # Nothing listens on port 1 of localhost
+        pool = SSHClientPool(
+            host="localhost",
+            port=port,
+            endpoints=[("127.0.0.1", port)],
+            proxy_host="localhost",
+            proxy_port=1,
+        )
+        pool.get_conn_options = AsyncMock(
+            return_value=asyncssh.SSHClientConnectionOptions(known_hosts=None)
+        )
+
+        with pytest.raises(ConnectionRefusedError):
+            async with pool.get_client("user", "token"):
+                pass
+
+        stats = pool.get_stats()["endpoints"]
+        assert all(endpoint["failures"] == 0 for endpoint in stats.values())
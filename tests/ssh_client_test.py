@@ -0,0 +1,410 @@
+# Copyright (c) 2025, ETH Zurich. All rights reserved.
+#
+# Please, refer to the LICENSE file in the root directory.
+# SPDX-License-Identifier: BSD-3-Clause
+
+import asyncio
+import shlex
+import threading
+from contextlib import aclosing
+
+import asyncssh
+import pytest
+from fastapi import HTTPException
+
+from firecrest.filesystem.ops.commands.find_command import FindCommand
+from firecrest.filesystem.ops.commands.tail_command import TailCommand
+from firecrest.filesystem.ops.commands.write_file_command import WriteFileCommand
+from lib.ssh_clients.ssh_client import (
+    BaseCommand,
+    CompositeCommand,
+    LineStreamCommand,
+    OutputLimitExceeded,
+    SSHClient,
+    TimeoutLimitExceeded,
+)
+from tests.mock_ssh_client import (
+    MockedCommand,
+    MockSSHClientPool,
+    simple_ssh_server,
+)
+
+
+class EchoLinesCommand(LineStreamCommand):
+
+    def get_command(self) -> str:
+        return "echo-lines"
+
+    def parse_output(self, stdout: str, stderr: str, exit_status: int):
+        if exit_status != 0:
+            raise HTTPException(status_code=500, detail=stderr)
+        return stdout.splitlines()
+
+    def parse_stream_line(self, line: str):
+        return line.upper() if line else None
+
+
+@pytest.fixture
+def ssh_pool():
+    return MockSSHClientPool()
+
+
+async def test_execute_stream_yields_bounded_chunks(ssh_pool):
+    stdout = "x" * 1000
+    async with ssh_pool.mocked_output(
+        [MockedCommand(command="tail", stdout=stdout, stderr="")]
+    ):
+        async with ssh_pool.get_client("user", "token") as client:
+            chunks = [
+                chunk
+                async for chunk in client.execute_stream(
+                    TailCommand("/home/file"), chunk_size=128, parse=False
+                )
+            ]
+
+    assert all(len(chunk) <= 128 for chunk in chunks)
+    assert b"".join(chunks).decode() == stdout
+    assert client.channels.active == 0
+
+
+async def test_execute_stream_parses_lines_across_chunks(ssh_pool):
+    async with ssh_pool.mocked_output(
+        [MockedCommand(command="echo-lines", stdout="first\nsecond\nthird", stderr="")]
+    ):
+        async with ssh_pool.get_client("user", "token") as client:
+            records = [
+                record
+                async for record in client.execute_stream(
+                    EchoLinesCommand(), chunk_size=4
+                )
+            ]
+
+    assert records == ["FIRST", "SECOND", "THIRD"]
+
+
+async def test_execute_stream_reports_errors_at_the_end(ssh_pool):
+    async with ssh_pool.mocked_output(
+        [
+            MockedCommand(
+                command="echo-lines", stdout="", stderr="failure", exit_code=1
+            )
+        ]
+    ):
+        async with ssh_pool.get_client("user", "token") as client:
+            with pytest.raises(HTTPException):
+                async for _ in client.execute_stream(EchoLinesCommand()):
+                    pass
+
+
+async def test_execute_stream_releases_channel_when_closed_early(ssh_pool):
+    async with ssh_pool.mocked_output(
+        [MockedCommand(command="tail", stdout="y" * 4096, stderr="")]
+    ):
+        async with ssh_pool.get_client("user", "token") as client:
+            async with aclosing(
+                client.execute_stream(TailCommand("/home/file"), chunk_size=16)
+            ) as stream:
+                async for _ in stream:
+                    break
+
+    assert client.channels.active == 0
+
+
+# ---------------------------------------------------------------------------
+# Persistent shell worker
+# ---------------------------------------------------------------------------
+
+
+async def _bash_process_handler(process: asyncssh.SSHServerProcess):
+    # Runs the requested command in a local bash, emulating a login node
+    await _run_local_process(process, ["bash", "-c", process.command])
+
+
+async def _simple_process_handler(process: asyncssh.SSHServerProcess):
+    # Runs the requested command without a POSIX shell, emulating a login
+    # shell only understanding simple commands (e.g. csh with a POSIX script)
+    await _run_local_process(process, shlex.split(process.command))
+
+
+async def _run_local_process(process: asyncssh.SSHServerProcess, argv: list):
+    local = await asyncio.create_subprocess_exec(
+        *argv,
+        stdin=asyncio.subprocess.PIPE,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.PIPE,
+    )
+    await process.redirect(stdin=local.stdin)
+
+    async def forward(reader, writer):
+        # Output is forwarded before exiting, so that none of it is lost
+        while chunk := await reader.read(64 * 1024):
+            writer.write(chunk.decode(errors="replace"))
+
+    await asyncio.gather(
+        forward(local.stdout, process.stdout), forward(local.stderr, process.stderr)
+    )
+    process.exit(await local.wait())
+    # Runs the cleanup of the stdin redirection
+    await process.wait_closed()
+
+
+class EchoCommand(BaseCommand):
+
+    def __init__(self, command_line: str):
+        self.command_line = command_line
+
+    def get_command(self) -> str:
+        return self.command_line
+
+    def parse_output(self, stdout: str, stderr: str, exit_status: int):
+        return stdout, stderr, exit_status
+
+
+@pytest.fixture
+async def shell_worker_client():
+    async with simple_ssh_server(_bash_process_handler) as port:
+        async with asyncssh.connect(
+            host="localhost", port=port, known_hosts=None
+        ) as conn:
+            yield SSHClient(conn, persistent_shell=True)
+
+
+async def test_shell_worker_executes_framed_commands(shell_worker_client):
+    client = shell_worker_client
+
+    assert await client.execute(EchoCommand("printf 'a\\nb'")) == ("a\nb", "", 0)
+    assert await client.execute(EchoCommand("echo err >&2; exit 3")) == (
+        "",
+        "err\n",
+        3,
+    )
+    assert await client.execute(EchoCommand("cd /; pwd")) == ("/\n", "", 0)
+
+    assert client.shell_worker.commands_executed == 3
+    # The worker permanently holds a single channel
+    assert client.channels.active == 1
+
+
+async def test_shell_worker_is_restarted_after_timeout(shell_worker_client):
+    client = shell_worker_client
+    client.execute_timeout = 0.5
+
+    with pytest.raises(TimeoutLimitExceeded):
+        await client.execute(EchoCommand("sleep 5"))
+    assert not client.shell_worker.is_alive()
+    assert client.channels.active == 0
+
+    assert await client.execute(EchoCommand("echo ok")) == ("ok\n", "", 0)
+
+
+# ---------------------------------------------------------------------------
+# Command batching
+# ---------------------------------------------------------------------------
+
+
+class FailingCommand(EchoCommand):
+
+    def parse_output(self, stdout: str, stderr: str, exit_status: int):
+        if exit_status != 0:
+            raise HTTPException(status_code=500, detail=stderr)
+        return stdout
+
+
+@pytest.fixture
+async def bash_client():
+    async with simple_ssh_server(_bash_process_handler) as port:
+        async with asyncssh.connect(
+            host="localhost", port=port, known_hosts=None
+        ) as conn:
+            yield SSHClient(conn)
+
+
+@pytest.fixture
+async def simple_shell_client():
+    async with simple_ssh_server(_simple_process_handler) as port:
+        async with asyncssh.connect(
+            host="localhost", port=port, known_hosts=None
+        ) as conn:
+            yield SSHClient(conn)
+
+
+async def test_execute_many_demultiplexes_outputs(bash_client):
+    results = await bash_client.execute_many(
+        [
+            EchoCommand("printf 'a\\nb'"),
+            EchoCommand("echo err >&2; exit 3"),
+            EchoCommand("echo last"),
+        ]
+    )
+
+    assert results == [("a\nb", "", 0), ("", "err\n", 3), ("last\n", "", 0)]
+    assert bash_client.channels.get_stats()["channels_acquired"] == 1
+
+
+async def test_execute_many_returns_exceptions_in_place(bash_client):
+    commands = [FailingCommand("echo boom >&2; false"), FailingCommand("echo ok")]
+
+    results = await bash_client.execute_many(commands, return_exceptions=True)
+    assert isinstance(results[0], HTTPException)
+    assert results[0].detail == "boom\n"
+    assert results[1] == "ok\n"
+
+    with pytest.raises(HTTPException):
+        await bash_client.execute_many(commands)
+
+
+async def test_execute_many_budgets_each_command(bash_client):
+    bash_client.execute_timeout = 1
+    bash_client.buffer_limit = 1024
+    commands = [
+        EchoCommand("sleep 3"),
+        EchoCommand("head -c 4096 /dev/zero"),
+        EchoCommand("echo ok"),
+    ]
+
+    # A slow or a large command only fails itself
+    results = await bash_client.execute_many(commands, return_exceptions=True)
+    assert isinstance(results[0], TimeoutLimitExceeded)
+    assert isinstance(results[1], OutputLimitExceeded)
+    assert results[2] == ("ok\n", "", 0)
+
+
+async def test_execute_many_tells_timeouts_from_exit_statuses(bash_client):
+    bash_client.execute_timeout = 1
+
+    results = await bash_client.execute_many(
+        [EchoCommand("exit 124"), EchoCommand("sleep 3")], return_exceptions=True
+    )
+    assert results[0] == ("", "", 124)
+    assert isinstance(results[1], TimeoutLimitExceeded)
+
+
+async def test_execute_many_does_not_depend_on_the_login_shell(simple_shell_client):
+    results = await simple_shell_client.execute_many(
+        [EchoCommand("echo a | tr a b"), EchoCommand("echo err >&2; exit 3")]
+    )
+    assert results == [("b\n", "", 0), ("", "err\n", 3)]
+
+
+def test_composite_command_rejects_truncated_output():
+    composite = CompositeCommand([EchoCommand("a"), EchoCommand("b")])
+
+    with pytest.raises(Exception, match="Unexpected output"):
+        composite.parse_output(f"x\n{composite.token}:0:0\n", "", 137)
+
+
+# ---------------------------------------------------------------------------
+# SFTP session
+# ---------------------------------------------------------------------------
+
+
+async def test_sftp_session_is_shared_and_reads_are_bounded(tmp_path):
+    path = tmp_path / "data.bin"
+    path.write_bytes(b"z" * 1000)
+
+    async with simple_ssh_server(_bash_process_handler, sftp_factory=True) as port:
+        async with asyncssh.connect(
+            host="localhost", port=port, known_hosts=None
+        ) as conn:
+            client = SSHClient(conn)
+
+            chunks = [
+                chunk
+                async for chunk in client.sftp_read_stream(
+                    str(path), size=900, offset=50, chunk_size=256
+                )
+            ]
+            assert [len(chunk) for chunk in chunks] == [256, 256, 256, 132]
+            assert await client.sftp_read(str(path), 10, 995) == b"zzzzz"
+
+            # A single session holding one channel serves all the operations
+            assert client.sftp_session.operations == 2
+            assert client.channels.active == 1
+            client.close()
+            assert client.channels.active == 0
+
+
+# ---------------------------------------------------------------------------
+# Parse offloading
+# ---------------------------------------------------------------------------
+
+
+class ThreadRecordingCommand(EchoCommand):
+
+    def parse_output(self, stdout: str, stderr: str, exit_status: int):
+        return len(stdout), threading.get_ident()
+
+
+async def test_large_outputs_are_parsed_off_the_event_loop(bash_client):
+    bash_client.parse_offload_threshold = 1000
+
+    size, thread = await bash_client.execute(ThreadRecordingCommand("echo small"))
+    assert thread == threading.get_ident()
+
+    size, thread = await bash_client.execute(
+        ThreadRecordingCommand("head -c 5000 /dev/zero")
+    )
+    assert size == 5000
+    assert thread != threading.get_ident()
+    assert bash_client.parse_offloads == 1
+
+
+# ---------------------------------------------------------------------------
+# Streamed standard input
+# ---------------------------------------------------------------------------
+
+
+async def _chunks(*chunks, error=None):
+    for chunk in chunks:
+        yield chunk
+    if error:
+        raise error
+
+
+async def test_stdin_stream_writes_files_atomically(bash_client, tmp_path):
+    target = tmp_path / "upload.bin"
+    target.write_bytes(b"old")
+    target.chmod(0o600)
+
+    await bash_client.execute_stdin_stream(
+        WriteFileCommand(str(target), 8), _chunks(b"new ", b"data")
+    )
+    assert target.read_bytes() == b"new data"
+    assert target.stat().st_mode & 0o777 == 0o600
+
+    # An interrupted upload leaves the target untouched and no temporary file
+    with pytest.raises(ValueError):
+        await bash_client.execute_stdin_stream(
+            WriteFileCommand(str(target), 8), _chunks(b"part", error=ValueError())
+        )
+    assert target.read_bytes() == b"new data"
+    assert [path.name for path in tmp_path.iterdir()] == ["upload.bin"]
+    assert bash_client.channels.active == 0
+
+
+async def test_find_name_patterns_are_quoted(bash_client, tmp_path):
+    (tmp_path / "it's; done.out").write_text("")
+    (tmp_path / "other.out").write_text("")
+
+    entries = await bash_client.execute(
+        FindCommand(str(tmp_path), name="*'s; done*")
+    )
+    assert [entry["name"] for entry in entries] == ["it's; done.out"]
+
+    # Patterns are never run as commands
+    entries = await bash_client.execute(
+        FindCommand(str(tmp_path), name=f"x'; touch {tmp_path}/injected; echo '")
+    )
+    assert entries == []
+    assert not (tmp_path / "injected").exists()
+
+
+async def test_stdin_stream_does_not_depend_on_the_login_shell(
+    simple_shell_client, tmp_path
+):
+    target = tmp_path / "upload.bin"
+
+    await simple_shell_client.execute_stdin_stream(
+        WriteFileCommand(str(target), 8), _chunks(b"new ", b"data")
+    )
+    assert target.read_bytes() == b"new data"
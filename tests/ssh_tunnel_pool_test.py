@@ -0,0 +1,64 @@
+# Copyright (c) 2025, ETH Zurich. All rights reserved.
+#
+# Please, refer to the LICENSE file in the root directory.
+# SPDX-License-Identifier: BSD-3-Clause
+
+from contextlib import asynccontextmanager
+from socket import AF_INET
+
+import asyncssh
+
+from lib.ssh_clients.ssh_tunnel_pool import SSHTunnelPool
+from tests.mock_ssh_client import NoAuthSSHServer, simple_ssh_server
+
+
+class ForwardingSSHServer(NoAuthSSHServer):
+
+    def connection_requested(self, dest_host, dest_port, orig_host, orig_port):
+        return True
+
+
+@asynccontextmanager
+async def jump_host():
+    server = await asyncssh.create_server(
+        ForwardingSSHServer,
+        "localhost",
+        0,
+        server_host_keys=[asyncssh.generate_private_key("ssh-ed25519")],
+    )
+    port = next(
+        socket.getsockname()[1] for socket in server.sockets if socket.family == AF_INET
+    )
+    async with server:
+        yield port
+
+
+async def _handler(process: asyncssh.SSHServerProcess):
+    process.exit(0)
+
+
+async def test_tunnels_are_shared_per_user_and_pruned():
+    options = asyncssh.SSHClientConnectionOptions(known_hosts=None)
+
+    async with jump_host() as proxy_port, simple_ssh_server(_handler) as port:
+        tunnels = SSHTunnelPool(
+            "localhost", proxy_port, max_connections_per_tunnel=2, idle_timeout=0
+        )
+        conns = [
+            await tunnels.connect("user", "localhost", port, options) for _ in range(3)
+        ]
+        conns.append(await tunnels.connect("other", "localhost", port, options))
+
+        assert len(tunnels.tunnels["user"]) == 2
+        assert len(tunnels.tunnels["other"]) == 1
+        assert tunnels.get_stats()["tunnels_reused"] == 1
+
+        # Tunnels still forwarding a connection are kept
+        tunnels.prune()
+        assert tunnels.get_stats()["tunnels"] == 3
+
+        for conn in conns:
+            conn.close()
+            await conn.wait_closed()
+        tunnels.prune()
+        assert tunnels.tunnels == {}
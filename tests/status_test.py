@@ -5,6 +5,7 @@
 
 # Add src folder to python paths
 import json
+import uuid
 
 import aiohttp
 
@@ -22,6 +23,7 @@ import pytest
 from aioresponses import aioresponses
 
 from firecrest.config import HPCCluster, Scheduler
+from firecrest.dependencies import APIAuthDependency
 
 from tests.helpers import helper_test_userinfo, load_ssh_output
 
@@ -239,3 +241,34 @@ async def test_liveness_check(client):
 
     response = client.get("/status/liveness")
     assert response.status_code == 200
+
+
+async def test_request_middleware(client):
+    correlation_id = uuid.uuid4().hex
+    # Paths are case-insensitive
+    response = client.get(
+        "/Status/Liveness", headers={"X-Correlation-ID": correlation_id}
+    )
+    assert response.status_code == 200
+    assert response.headers["X-Correlation-ID"] == correlation_id
+    assert uuid.UUID(response.headers["X-Request-ID"], version=4)
+    assert response.headers["F7T-AppVersion"] == client.app.version
+    assert "F7T-Timestamp" in response.headers
+
+    response = client.get("/status/liveness", headers={"X-Request-ID": "invalid"})
+    assert response.status_code == 400
+
+
+async def test_systems_listing_does_not_wait_for_authorization(client, monkeypatch):
+    calls = []
+
+    class FailingAuthZ:
+        async def authorize_many(self, username, resource_names, access_token):
+            calls.append(resource_names)
+            raise aiohttp.ClientError("AuthZ service unavailable")
+
+    monkeypatch.setattr(APIAuthDependency, "globalAuthZ", FailingAuthZ())
+
+    response = client.get("/status/systems")
+    assert response.status_code == 200
+    assert len(response.json()["systems"]) == len(calls[0])
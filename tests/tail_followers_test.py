@@ -0,0 +1,123 @@
+# Copyright (c) 2025, ETH Zurich. All rights reserved.
+#
+# Please, refer to the LICENSE file in the root directory.
+# SPDX-License-Identifier: BSD-3-Clause
+
+import asyncio
+from contextlib import aclosing
+
+import pytest
+
+from firecrest.filesystem.ops.tail_followers import SubscriberLagging, TailFollowers
+
+
+class FakeReader:
+    """Remote reader yielding the chunks put in its queue, `None` ends it."""
+
+    def __init__(self):
+        self.chunks = asyncio.Queue()
+        self.opened = 0
+        self.closed = 0
+
+    async def read(self):
+        self.opened += 1
+        try:
+            while (chunk := await self.chunks.get()) is not None:
+                yield chunk
+        finally:
+            self.closed += 1
+
+
+async def test_subscribers_share_a_reader():
+    followers = TailFollowers(idle_timeout=60)
+    reader = FakeReader()
+
+    async with aclosing(followers.follow("user", "/home/log", reader.read)) as first:
+        async with aclosing(
+            followers.follow("user", "/home/./log", reader.read)
+        ) as second:
+            first_chunk = asyncio.ensure_future(anext(first))
+            second_chunk = asyncio.ensure_future(anext(second))
+            await asyncio.sleep(0)
+            reader.chunks.put_nowait(b"line\n")
+
+            assert await first_chunk == b"line\n"
+            assert await second_chunk == b"line\n"
+
+    assert reader.opened == 1
+    assert followers.get_stats()["subscriptions"] == 2
+
+    # Another user gets its own reader
+    other_reader = FakeReader()
+    async with aclosing(
+        followers.follow("other", "/home/log", other_reader.read)
+    ) as third:
+        third_chunk = asyncio.ensure_future(anext(third))
+        await asyncio.sleep(0.01)
+        assert other_reader.opened == 1
+        other_reader.chunks.put_nowait(None)
+        with pytest.raises(StopAsyncIteration):
+            await third_chunk
+
+    await followers.close()
+
+
+async def test_reader_is_stopped_after_idle_timeout():
+    followers = TailFollowers(idle_timeout=0.1)
+    reader = FakeReader()
+
+    async with aclosing(followers.follow("user", "/home/log", reader.read)) as chunks:
+        with pytest.raises(TimeoutError):
+            async with asyncio.timeout(0.05):
+                await anext(chunks)
+
+    # A subscriber arriving within the idle timeout reuses the reader
+    await asyncio.sleep(0.05)
+    async with aclosing(followers.follow("user", "/home/log", reader.read)) as chunks:
+        chunk = asyncio.ensure_future(anext(chunks))
+        await asyncio.sleep(0.1)
+        reader.chunks.put_nowait(b"again")
+        assert await chunk == b"again"
+    assert reader.opened == 1
+
+    await asyncio.sleep(0.2)
+    assert reader.closed == 1
+    assert followers.get_stats()["readers"] == 0
+
+
+async def test_keepalive_and_slow_subscribers():
+    followers = TailFollowers(max_queued=2)
+    reader = FakeReader()
+
+    async with aclosing(
+        followers.follow("user", "/home/log", reader.read, keepalive=0.05)
+    ) as chunks:
+        assert await anext(chunks) == b""
+
+        for chunk in (b"a", b"b", b"c"):
+            reader.chunks.put_nowait(chunk)
+        await asyncio.sleep(0.05)
+        with pytest.raises(SubscriberLagging):
+            await anext(chunks)
+
+    assert followers.get_stats()["lagging"] == 1
+    await followers.close()
+    assert reader.closed == 1
+
+
+async def test_subscriptions_end_after_max_duration():
+    followers = TailFollowers(idle_timeout=0.05, max_duration=0.2)
+    reader = FakeReader()
+
+    async with aclosing(
+        followers.follow("user", "/home/log", reader.read, keepalive=0.05)
+    ) as chunks:
+        # Keep-alives don't extend the subscription
+        keepalives = [chunk async for chunk in chunks]
+    assert 1 <= len(keepalives) <= 4
+    assert set(keepalives) == {b""}
+
+    # The idle reader is then stopped
+    await asyncio.sleep(0.1)
+    assert reader.closed == 1
+    assert followers.get_stats()["readers"] == 0